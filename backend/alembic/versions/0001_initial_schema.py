@@ -0,0 +1,131 @@
+"""Initial schema
+
+patients, alerts and an unpartitioned vitals_observations (already with
+the packed news2_components / mews_components columns): the baseline the
+later revisions build on.
+
+Databases that app.main's create_all built before migrations owned the
+schema are marked as being at this revision with `alembic stamp 0001`
+before the first `alembic upgrade head`. Whichever version of the models
+built them, 0002-0004 check for and skip what is already there (rollup
+table, partitioning, composite indexes).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('patients',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('mrn', sa.String(length=50), nullable=False, comment='Medical Record Number'),
+    sa.Column('first_name', sa.String(length=100), nullable=False),
+    sa.Column('last_name', sa.String(length=100), nullable=False),
+    sa.Column('date_of_birth', sa.Date(), nullable=False),
+    sa.Column('gender', sa.Enum('MALE', 'FEMALE', 'OTHER', 'UNKNOWN', name='genderenum'), nullable=False),
+    sa.Column('contact_number', sa.String(length=20), nullable=True),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('emergency_contact', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='Emergency contact details'),
+    sa.Column('allergies', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='List of known allergies'),
+    sa.Column('current_medications', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='Current medications'),
+    sa.Column('medical_history', sa.Text(), nullable=True, comment='Past medical history'),
+    sa.Column('admission_date', sa.DateTime(), nullable=True),
+    sa.Column('ward', sa.String(length=50), nullable=True, comment='Current ward/unit'),
+    sa.Column('bed_number', sa.String(length=20), nullable=True, comment='Current bed number'),
+    sa.Column('attending_doctor_id', sa.UUID(), nullable=True),
+    sa.Column('is_active', sa.String(length=20), nullable=True, comment='Patient status: active, discharged, transferred'),
+    sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='Additional hospital-specific data'),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_patients_id'), 'patients', ['id'], unique=False)
+    op.create_index(op.f('ix_patients_mrn'), 'patients', ['mrn'], unique=True)
+    op.create_table('vitals_observations',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('patient_id', sa.UUID(), nullable=False),
+    sa.Column('observed_at', sa.DateTime(), nullable=False),
+    sa.Column('recorded_by', sa.UUID(), nullable=True, comment='Staff member who recorded'),
+    sa.Column('heart_rate', sa.Float(), nullable=True, comment='Heart rate (bpm)'),
+    sa.Column('systolic_bp', sa.Float(), nullable=True, comment='Systolic BP (mmHg)'),
+    sa.Column('diastolic_bp', sa.Float(), nullable=True, comment='Diastolic BP (mmHg)'),
+    sa.Column('spo2', sa.Float(), nullable=True, comment='Oxygen saturation (%)'),
+    sa.Column('respiratory_rate', sa.Float(), nullable=True, comment='Respiratory rate (breaths/min)'),
+    sa.Column('temperature', sa.Float(), nullable=True, comment='Temperature (°C)'),
+    sa.Column('consciousness_level', sa.String(length=20), nullable=True, comment='AVPU: Alert, Voice, Pain, Unresponsive'),
+    sa.Column('supplemental_oxygen', sa.Boolean(), nullable=True, comment='Patient on supplemental O2'),
+    sa.Column('oxygen_flow_rate', sa.Float(), nullable=True, comment='O2 flow rate (L/min)'),
+    sa.Column('news2_score', sa.Float(), nullable=True, comment='NEWS2 score at time of observation'),
+    sa.Column('news2_components', sa.Integer(), nullable=True, comment='Packed NEWS2 component scores (2 bits each + present flags)'),
+    sa.Column('mews_score', sa.Float(), nullable=True, comment='MEWS score at time of observation'),
+    sa.Column('mews_components', sa.Integer(), nullable=True, comment='Packed MEWS component scores (2 bits each + present flags)'),
+    sa.Column('source', sa.String(length=20), nullable=True, comment='Data source: manual, device, ehr_import'),
+    sa.Column('device_id', sa.String(length=100), nullable=True, comment='Device identifier if automated'),
+    sa.Column('notes', sa.Text(), nullable=True, comment='Clinical notes from observer'),
+    sa.Column('is_valid', sa.Boolean(), nullable=True, comment='Data validation flag'),
+    sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='Additional vitals or device data'),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_vitals_observations_observed_at'), 'vitals_observations', ['observed_at'], unique=False)
+    op.create_index(op.f('ix_vitals_observations_patient_id'), 'vitals_observations', ['patient_id'], unique=False)
+    op.create_table('alerts',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('patient_id', sa.UUID(), nullable=False),
+    sa.Column('vitals_id', sa.UUID(), nullable=True),
+    sa.Column('alert_type', sa.String(length=50), nullable=False),
+    sa.Column('severity', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('reason', sa.Text(), nullable=True, comment='Clinical reasoning for alert'),
+    sa.Column('recommendations', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='Suggested clinical actions'),
+    sa.Column('triggered_at', sa.DateTime(), nullable=False),
+    sa.Column('acknowledged_at', sa.DateTime(), nullable=True),
+    sa.Column('acknowledged_by', sa.UUID(), nullable=True, comment='Staff ID'),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.Column('resolved_by', sa.UUID(), nullable=True, comment='Staff ID'),
+    sa.Column('news2_score', sa.Integer(), nullable=True, comment='NEWS2 score'),
+    sa.Column('mews_score', sa.Integer(), nullable=True, comment='MEWS score'),
+    sa.Column('requires_escalation', sa.Boolean(), nullable=True),
+    sa.Column('escalated_to', sa.UUID(), nullable=True, comment='Senior clinician ID'),
+    sa.Column('escalated_at', sa.DateTime(), nullable=True),
+    sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='Additional alert data'),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.ForeignKeyConstraint(['vitals_id'], ['vitals_observations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_alerts_alert_type'), 'alerts', ['alert_type'], unique=False)
+    op.create_index(op.f('ix_alerts_patient_id'), 'alerts', ['patient_id'], unique=False)
+    op.create_index(op.f('ix_alerts_severity'), 'alerts', ['severity'], unique=False)
+    op.create_index(op.f('ix_alerts_status'), 'alerts', ['status'], unique=False)
+    op.create_index(op.f('ix_alerts_triggered_at'), 'alerts', ['triggered_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_alerts_triggered_at'), table_name='alerts')
+    op.drop_index(op.f('ix_alerts_status'), table_name='alerts')
+    op.drop_index(op.f('ix_alerts_severity'), table_name='alerts')
+    op.drop_index(op.f('ix_alerts_patient_id'), table_name='alerts')
+    op.drop_index(op.f('ix_alerts_alert_type'), table_name='alerts')
+    op.drop_table('alerts')
+    op.drop_index(op.f('ix_vitals_observations_patient_id'), table_name='vitals_observations')
+    op.drop_index(op.f('ix_vitals_observations_observed_at'), table_name='vitals_observations')
+    op.drop_table('vitals_observations')
+    op.drop_index(op.f('ix_patients_mrn'), table_name='patients')
+    op.drop_index(op.f('ix_patients_id'), table_name='patients')
+    op.drop_table('patients')
+    sa.Enum(name='genderenum').drop(op.get_bind(), checkfirst=True)
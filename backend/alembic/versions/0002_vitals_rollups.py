@@ -0,0 +1,43 @@
+"""Vitals rollups
+
+5-minute, hourly and daily aggregates per patient and parameter
+(app.services.vitals_rollups). Skipped when create_all already made the
+table; fill it with `python -m app.services.vitals_rollups --since ...`.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("vitals_rollups"):
+        return
+    op.create_table('vitals_rollups',
+    sa.Column('patient_id', sa.UUID(), nullable=False),
+    sa.Column('resolution', sa.String(length=8), nullable=False),
+    sa.Column('parameter', sa.String(length=20), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('sum_value', sa.Float(), nullable=False),
+    sa.Column('sum_squares', sa.Float(), nullable=False),
+    sa.Column('min_value', sa.Float(), nullable=False),
+    sa.Column('max_value', sa.Float(), nullable=False),
+    sa.Column('last_value', sa.Float(), nullable=False),
+    sa.Column('last_observed_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('patient_id', 'resolution', 'parameter', 'bucket_start')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('vitals_rollups')
@@ -0,0 +1,167 @@
+"""Partition vitals_observations by month
+
+- Renames legacy recorded_at / data_source columns to observed_at / source
+  where a database still has them.
+- Drops the alerts.vitals_id foreign key (it cannot target a partitioned
+  table's id alone, and expired partitions are dropped) and indexes the
+  column instead.
+- Rebuilds vitals_observations as a table range-partitioned on observed_at
+  with primary key (id, observed_at), with monthly partitions from the
+  oldest observation to MONTHS_AHEAD months ahead (or the newest
+  observation, if later) plus a DEFAULT partition, and copies the rows
+  over. This rewrites the table and holds an exclusive lock on it while
+  it runs. app.services.partitions keeps creating partitions after that.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+PARTITIONED_TABLE = "vitals_observations"
+DEFAULT_PARTITION = "vitals_observations_default"
+LEGACY_TABLE = "vitals_observations_unpartitioned"
+
+# Frozen copy of VITALS_PARTITION_MONTHS_AHEAD: migrations must not
+# depend on application settings or code
+MONTHS_AHEAD = 3
+
+LEGACY_COLUMNS = {
+    "recorded_at": "observed_at",
+    "data_source": "source",
+}
+
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f"{PARTITIONED_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def _columns():
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('patient_id', sa.UUID(), nullable=False),
+        sa.Column('observed_at', sa.DateTime(), nullable=False),
+        sa.Column('recorded_by', sa.UUID(), nullable=True, comment='Staff member who recorded'),
+        sa.Column('heart_rate', sa.Float(), nullable=True, comment='Heart rate (bpm)'),
+        sa.Column('systolic_bp', sa.Float(), nullable=True, comment='Systolic BP (mmHg)'),
+        sa.Column('diastolic_bp', sa.Float(), nullable=True, comment='Diastolic BP (mmHg)'),
+        sa.Column('spo2', sa.Float(), nullable=True, comment='Oxygen saturation (%)'),
+        sa.Column('respiratory_rate', sa.Float(), nullable=True, comment='Respiratory rate (breaths/min)'),
+        sa.Column('temperature', sa.Float(), nullable=True, comment='Temperature (°C)'),
+        sa.Column('consciousness_level', sa.String(length=20), nullable=True, comment='AVPU: Alert, Voice, Pain, Unresponsive'),
+        sa.Column('supplemental_oxygen', sa.Boolean(), nullable=True, comment='Patient on supplemental O2'),
+        sa.Column('oxygen_flow_rate', sa.Float(), nullable=True, comment='O2 flow rate (L/min)'),
+        sa.Column('news2_score', sa.Float(), nullable=True, comment='NEWS2 score at time of observation'),
+        sa.Column('news2_components', sa.Integer(), nullable=True, comment='Packed NEWS2 component scores (2 bits each + present flags)'),
+        sa.Column('mews_score', sa.Float(), nullable=True, comment='MEWS score at time of observation'),
+        sa.Column('mews_components', sa.Integer(), nullable=True, comment='Packed MEWS component scores (2 bits each + present flags)'),
+        sa.Column('source', sa.String(length=20), nullable=True, comment='Data source: manual, device, ehr_import'),
+        sa.Column('device_id', sa.String(length=100), nullable=True, comment='Device identifier if automated'),
+        sa.Column('notes', sa.Text(), nullable=True, comment='Clinical notes from observer'),
+        sa.Column('is_valid', sa.Boolean(), nullable=True, comment='Data validation flag'),
+        sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='Additional vitals or device data'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    ]
+
+
+def _column_list() -> str:
+    return ", ".join(f'"{column.name}"' for column in _columns() if isinstance(column, sa.Column))
+
+
+def _is_partitioned(bind) -> bool:
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table"
+    ), {"table": PARTITIONED_TABLE}).first() is not None
+
+
+def _set_aside(table: str) -> None:
+    """Rename the current table and its index names out of the way"""
+    op.rename_table(PARTITIONED_TABLE, table)
+    op.execute(f"ALTER INDEX IF EXISTS {PARTITIONED_TABLE}_pkey RENAME TO {table}_pkey")
+    op.execute(f"ALTER INDEX IF EXISTS ix_{PARTITIONED_TABLE}_observed_at RENAME TO ix_{table}_observed_at")
+    op.execute(f"ALTER INDEX IF EXISTS ix_{PARTITIONED_TABLE}_patient_id RENAME TO ix_{table}_patient_id")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    columns = {column["name"] for column in inspector.get_columns(PARTITIONED_TABLE)}
+    for legacy, current in LEGACY_COLUMNS.items():
+        if legacy in columns and current not in columns:
+            op.alter_column(PARTITIONED_TABLE, legacy, new_column_name=current)
+
+    for foreign_key in inspector.get_foreign_keys("alerts"):
+        if foreign_key["referred_table"] == PARTITIONED_TABLE:
+            op.drop_constraint(foreign_key["name"], "alerts", type_="foreignkey")
+    op.create_index(op.f('ix_alerts_vitals_id'), 'alerts', ['vitals_id'], unique=False, if_not_exists=True)
+
+    if _is_partitioned(bind):
+        return
+
+    _set_aside(LEGACY_TABLE)
+    op.create_table(
+        PARTITIONED_TABLE,
+        *_columns(),
+        sa.PrimaryKeyConstraint('id', 'observed_at'),
+        postgresql_partition_by='RANGE (observed_at)'
+    )
+    op.create_index(op.f('ix_vitals_observations_observed_at'), PARTITIONED_TABLE, ['observed_at'], unique=False)
+    op.create_index(op.f('ix_vitals_observations_patient_id'), PARTITIONED_TABLE, ['patient_id'], unique=False)
+
+    oldest, newest = bind.execute(sa.text(f"SELECT min(observed_at), max(observed_at) FROM {LEGACY_TABLE}")).first()
+    month = _month_start(min(oldest or datetime.utcnow(), datetime.utcnow()))
+    # Cover future-dated rows too, so the DEFAULT partition starts empty
+    last = max(
+        _add_months(_month_start(datetime.utcnow()), MONTHS_AHEAD),
+        _month_start(newest or datetime.utcnow())
+    )
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {_partition_name(month)} PARTITION OF {PARTITIONED_TABLE} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        )
+        month = _add_months(month, 1)
+    op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARTITIONED_TABLE} DEFAULT")
+
+    op.execute(f"INSERT INTO {PARTITIONED_TABLE} ({_column_list()}) SELECT {_column_list()} FROM {LEGACY_TABLE}")
+    op.drop_table(LEGACY_TABLE)
+
+
+def downgrade() -> None:
+    partitioned_table = "vitals_observations_partitioned"
+    _set_aside(partitioned_table)
+    op.create_table(PARTITIONED_TABLE, *_columns(), sa.PrimaryKeyConstraint('id'))
+    op.create_index(op.f('ix_vitals_observations_observed_at'), PARTITIONED_TABLE, ['observed_at'], unique=False)
+    op.create_index(op.f('ix_vitals_observations_patient_id'), PARTITIONED_TABLE, ['patient_id'], unique=False)
+    op.execute(f"INSERT INTO {PARTITIONED_TABLE} ({_column_list()}) SELECT {_column_list()} FROM {partitioned_table}")
+    # Drops the partitions with it
+    op.drop_table(partitioned_table)
+
+    op.drop_index(op.f('ix_alerts_vitals_id'), table_name='alerts')
+    op.execute(
+        f"UPDATE alerts SET vitals_id = NULL WHERE vitals_id IS NOT NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM {PARTITIONED_TABLE} v WHERE v.id = alerts.vitals_id)"
+    )
+    op.create_foreign_key('alerts_vitals_id_fkey', 'alerts', PARTITIONED_TABLE, ['vitals_id'], ['id'])
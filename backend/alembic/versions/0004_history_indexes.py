@@ -0,0 +1,72 @@
+"""Composite indexes for patient history and alert boards
+
+- vitals_observations (patient_id, observed_at DESC) INCLUDE the trend
+  parameters: latest / history reads are one index range per partition
+  in the order they are returned, and trend, statistics and rollup reads
+  are index-only scans. It replaces the patient_id index.
+- alerts.severity_rank, generated from severity, and
+  (status, severity_rank, triggered_at) for the active-alerts board. It
+  replaces the status index.
+
+Every step is skipped where the database already has it (databases built
+by create_all from the current models). Checked by
+`python -m benchmarks.query_plans` and tests/test_query_plans.py.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+TREND_PARAMETERS = ["heart_rate", "systolic_bp", "diastolic_bp", "spo2", "respiratory_rate", "temperature"]
+
+SEVERITY_RANK = (
+    "CASE severity WHEN 'low' THEN 1 WHEN 'medium' THEN 2 "
+    "WHEN 'high' THEN 3 WHEN 'critical' THEN 4 ELSE 0 END"
+)
+
+
+def upgrade() -> None:
+    # Databases built by create_all from the current models already have
+    # some or all of this: every step checks first
+    inspector = sa.inspect(op.get_bind())
+
+    op.create_index(
+        'ix_vitals_observations_patient_observed',
+        'vitals_observations',
+        ['patient_id', sa.text('observed_at DESC')],
+        unique=False,
+        postgresql_include=TREND_PARAMETERS,
+        if_not_exists=True
+    )
+    op.drop_index(op.f('ix_vitals_observations_patient_id'), table_name='vitals_observations', if_exists=True)
+
+    if 'severity_rank' not in {column['name'] for column in inspector.get_columns('alerts')}:
+        op.add_column('alerts', sa.Column(
+            'severity_rank',
+            sa.SmallInteger(),
+            sa.Computed(SEVERITY_RANK, persisted=True),
+            nullable=True,
+            comment='Severity order: low=1, medium=2, high=3, critical=4'
+        ))
+    op.create_index('ix_alerts_status_severity_triggered', 'alerts', ['status', 'severity_rank', 'triggered_at'], unique=False, if_not_exists=True)
+    op.drop_index(op.f('ix_alerts_status'), table_name='alerts', if_exists=True)
+
+    op.execute("ANALYZE vitals_observations")
+    op.execute("ANALYZE alerts")
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_alerts_status'), 'alerts', ['status'], unique=False)
+    op.drop_index('ix_alerts_status_severity_triggered', table_name='alerts')
+    op.drop_column('alerts', 'severity_rank')
+
+    op.create_index(op.f('ix_vitals_observations_patient_id'), 'vitals_observations', ['patient_id'], unique=False)
+    op.drop_index('ix_vitals_observations_patient_observed', table_name='vitals_observations')
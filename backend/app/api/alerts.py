@@ -4,15 +4,17 @@ Handles clinical alert management and notifications
 """
 from typing import List, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc, or_
+from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel, Field
 from enum import Enum
 
-from ..core.database import get_db
+from ..core.database import get_db, is_foreign_key_violation
+from ..core.pagination import Cursor, cursor_param, fetch_page, set_cursor_headers
 from ..models.alert import Alert, AlertType, AlertSeverity, AlertStatus
-from ..models.patient import Patient
+from ..services.patient_registry import patient_registry
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
@@ -114,13 +116,8 @@ async def create_alert(
     Create a new alert (manual entry by clinician).
     Automatic alerts are created by the alert engine service.
     """
-    # Verify patient exists
-    result = await db.execute(
-        select(Patient).where(Patient.id == alert_data.patient_id)
-    )
-    patient = result.scalar_one_or_none()
-    
-    if not patient:
+    # Verify patient exists (no query for patients already in the registry)
+    if not await patient_registry.exists(db, alert_data.patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
     
     # Validate alert type and severity
@@ -146,7 +143,15 @@ async def create_alert(
     )
     
     db.add(alert)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        # The foreign key is the backstop for patients deleted since they were registered
+        await db.rollback()
+        if is_foreign_key_violation(e):
+            patient_registry.discard(alert_data.patient_id)
+            raise HTTPException(status_code=404, detail="Patient not found")
+        raise
     await db.refresh(alert)
     
     return alert
@@ -154,21 +159,25 @@ async def create_alert(
 
 @router.get("/", response_model=List[AlertResponse])
 async def get_alerts(
+    response: Response,
     db: AsyncSession = Depends(get_db),
     patient_id: Optional[str] = Query(None, description="Filter by patient ID"),
     severity: Optional[str] = Query(None, description="Filter by severity"),
     status: Optional[str] = Query(None, description="Filter by status"),
-    hours: int = Query(24, ge=1, le=168, description="Hours of history"),
-    limit: int = Query(100, ge=1, le=500)
+    hours: int = Query(24, ge=1, le=168, description="Hours of history on the first page"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[Cursor] = Depends(cursor_param)
 ):
     """
     Get alerts with optional filters.
     Default: All alerts from last 24 hours.
+    Pages are newest first; X-Next-Cursor / X-Previous-Cursor carry the
+    cursors of the older / newer pages (older pages go past the window).
     """
     since = datetime.utcnow() - timedelta(hours=hours)
     
     # Build query
-    conditions = [Alert.triggered_at >= since]
+    conditions = []
     
     if patient_id:
         conditions.append(Alert.patient_id == patient_id)
@@ -187,15 +196,18 @@ async def get_alerts(
         except KeyError:
             raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
     
-    result = await db.execute(
-        select(Alert)
-        .where(and_(*conditions))
-        .order_by(desc(Alert.triggered_at))
-        .limit(limit)
+    page = await fetch_page(
+        db,
+        select(Alert).where(*conditions),
+        Alert.triggered_at,
+        Alert.id,
+        limit,
+        cursor=cursor,
+        since=since
     )
-    alerts = result.scalars().all()
+    set_cursor_headers(response, page)
     
-    return list(alerts)
+    return page.rows
 
 
 @router.get("/active", response_model=List[AlertResponse])
@@ -215,7 +227,7 @@ async def get_active_alerts(
     result = await db.execute(
         select(Alert)
         .where(and_(*conditions))
-        .order_by(desc(Alert.severity), desc(Alert.triggered_at))
+        .order_by(desc(Alert.severity_rank), desc(Alert.triggered_at))
     )
     alerts = result.scalars().all()
     
@@ -2,20 +2,57 @@
 Vitals API Endpoints
 Handles recording and retrieval of patient vital signs
 """
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
+import uuid
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field, ValidationError
+import numpy as np
 
+from ..core.config import settings
 from ..core.database import get_db
+from ..core.pagination import MAX_ID, Cursor, Page, cursor_param, fetch_page, set_cursor_headers
 from ..models.vitals import VitalsObservation
+from ..models.alert import Alert, AlertStatus
 from ..models.patient import Patient
-from ..ml.news2 import NEWS2Calculator
+from ..ml.news2 import unpack_components
+from ..ml.scoring import scoring_engine
+from ..services.alert_engine import alert_engine
+from ..services.scoring_profiles import scoring_profiles
+from ..services.vitals_ingest import INVALID_PATIENT_ID, PATIENT_NOT_FOUND, IngestResult, vitals_ingestor
+from ..services.write_buffer import vitals_write_buffer
+from ..services.vitals_stream import BodyStreamingResponse, NDJSONIngest
+from ..services.device_channel import DeviceChannelHub
+from ..services.highres_store import HIGHRES_FIELDS, highres_store
+from ..services.recent_vitals import RecentObservation, recent_vitals
+from ..services.latest_vitals import latest_vitals_cache
+from ..services.patient_registry import ACTIVE_STATUS
+from ..services.downsampling import downsample
+from ..services import vitals_export, vitals_rollups
+from ..services.vitals_trends import (
+    TREND_PARAMETERS,
+    series_from_observations,
+    series_from_rows,
+    statistics_from_observations,
+    statistics_from_series,
+    trend_points,
+    trend_statistics,
+)
 
 router = APIRouter(prefix="/vitals", tags=["vitals"])
 
+# Largest batch accepted by POST /vitals/batch
+MAX_BATCH_SIZE = 1000
+
+# Most patients in one GET /vitals/latest
+MAX_LATEST_PATIENTS = 500
+
+# Most full-rate readings returned by GET /vitals/patient/{id}/highres (one day at 1 Hz)
+MAX_HIGHRES_POINTS = 86400
+
 
 # Pydantic schemas
 class VitalsCreate(BaseModel):
@@ -32,6 +69,7 @@ class VitalsCreate(BaseModel):
     oxygen_flow_rate: Optional[float] = Field(None, ge=0, le=15, description="O2 flow rate in L/min")
     notes: Optional[str] = Field(None, max_length=1000)
     data_source: str = Field("manual", description="Source: manual, monitor, ehr")
+    device_id: Optional[str] = Field(None, max_length=100, description="Identifier of the reporting device")
 
     class Config:
         json_schema_extra = {
@@ -51,11 +89,36 @@ class VitalsCreate(BaseModel):
         }
 
 
+class VitalsAmend(BaseModel):
+    """Schema for correcting values on a charted observation"""
+    heart_rate: Optional[int] = Field(None, ge=30, le=220, description="Heart rate in bpm")
+    systolic_bp: Optional[int] = Field(None, ge=50, le=250, description="Systolic BP in mmHg")
+    diastolic_bp: Optional[int] = Field(None, ge=30, le=150, description="Diastolic BP in mmHg")
+    spo2: Optional[int] = Field(None, ge=70, le=100, description="Oxygen saturation %")
+    respiratory_rate: Optional[int] = Field(None, ge=5, le=60, description="Respiratory rate per min")
+    temperature: Optional[float] = Field(None, ge=32.0, le=43.0, description="Temperature in Celsius")
+    consciousness_level: Optional[str] = Field(None, pattern="^[AVPU]$", description="AVPU scale: A, V, P, U")
+    # Not nullable: only fields sent are applied, and the column must stay true/false
+    supplemental_oxygen: bool = Field(False, description="Is patient on supplemental O2?")
+    oxygen_flow_rate: Optional[float] = Field(None, ge=0, le=15, description="O2 flow rate in L/min")
+    amended_by: Optional[str] = Field(None, description="Staff member making the correction")
+    reason: Optional[str] = Field(None, max_length=500, description="Reason for the correction")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "heart_rate": 78,
+                "amended_by": "Nurse Station 3",
+                "reason": "HR mistyped as 178"
+            }
+        }
+
+
 class VitalsResponse(BaseModel):
-    """Schema for vitals observation response"""
-    id: str
-    patient_id: str
-    recorded_at: datetime
+    """Schema for vitals observation response (from models or RecentObservation)"""
+    id: uuid.UUID
+    patient_id: uuid.UUID
+    recorded_at: datetime = Field(validation_alias=AliasChoices("recorded_at", "observed_at"))
     heart_rate: Optional[int]
     systolic_bp: Optional[int]
     diastolic_bp: Optional[int]
@@ -66,93 +129,393 @@ class VitalsResponse(BaseModel):
     supplemental_oxygen: bool
     oxygen_flow_rate: Optional[float]
     news2_score: Optional[int]
+    news2_breakdown: Optional[Dict[str, int]] = None
     mews_score: Optional[int]
     notes: Optional[str]
-    data_source: str
-    recorded_by: Optional[str]
+    data_source: str = Field(validation_alias=AliasChoices("data_source", "source"))
+    recorded_by: Optional[uuid.UUID]
 
     class Config:
         from_attributes = True
 
 
+class VitalsBatchItemResult(BaseModel):
+    """Outcome of one observation in a batch"""
+    index: int
+    status: str  # created, rejected
+    id: Optional[str] = None
+    news2_score: Optional[float] = None
+    mews_score: Optional[float] = None
+    alerts: List[str] = []
+    errors: List[str] = []
+
+
+class VitalsBatchResponse(BaseModel):
+    """Schema for bulk vitals ingestion response"""
+    created: int
+    rejected: int
+    results: List[VitalsBatchItemResult]
+
+
 class VitalsTrendResponse(BaseModel):
     """Schema for vitals trend data"""
     parameter: str
-    data_points: List[dict]
+    data_points: Optional[List[dict]] = None  # only with include_points=true
+    count: int
+    min_value: Optional[float]
+    max_value: Optional[float]
+    avg_value: Optional[float]
+    stddev: Optional[float]
+    slope_per_hour: Optional[float]  # least-squares slope, units per hour
+    trend: str  # "increasing", "decreasing", "stable", "insufficient_data"
+
+
+class VitalsTrendStatistics(BaseModel):
+    """Statistics of one parameter in a multi-parameter trend"""
+    count: int
     min_value: Optional[float]
     max_value: Optional[float]
     avg_value: Optional[float]
-    trend: str  # "increasing", "decreasing", "stable"
+    stddev: Optional[float]
+    slope_per_hour: Optional[float]
+    trend: str
+
+
+class VitalsTrendsResponse(BaseModel):
+    """Schema for multi-parameter trends (columnar, null = not recorded)"""
+    patient_id: str
+    hours: int
+    timestamps: List[int]  # epoch milliseconds, shared by every series
+    series: Dict[str, List[Optional[float]]]
+    statistics: Dict[str, VitalsTrendStatistics]
+
+
+class VitalsHighResResponse(BaseModel):
+    """Schema for full-rate device readings (columnar, null = not measured)"""
+    patient_id: str
+    start: datetime
+    end: datetime
+    timestamps: List[int]  # epoch milliseconds
+    values: Dict[str, List[Optional[float]]]
+    truncated: bool
 
 
 @router.post("/", response_model=VitalsResponse, status_code=201)
-async def record_vitals(
-    vitals_data: VitalsCreate,
+async def record_vitals(vitals_data: VitalsCreate):
+    """
+    Record new vitals observation for a patient.
+    Automatically calculates NEWS2, MEWS, qSOFA and shock index scores
+    and raises alerts for any score that crosses its threshold.
+    Observations from concurrent requests are committed together by the
+    group-commit buffer; the response is sent once the commit has landed.
+    """
+    result, row = await vitals_write_buffer.submit(vitals_data)
+    
+    if result.status != "created":
+        if PATIENT_NOT_FOUND in result.errors:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        if INVALID_PATIENT_ID in result.errors:
+            raise HTTPException(status_code=422, detail=INVALID_PATIENT_ID)
+        raise HTTPException(status_code=500, detail="; ".join(result.errors))
+    
+    return VitalsResponse(
+        id=str(row["id"]),
+        patient_id=str(row["patient_id"]),
+        recorded_at=row["observed_at"],
+        heart_rate=row["heart_rate"],
+        systolic_bp=row["systolic_bp"],
+        diastolic_bp=row["diastolic_bp"],
+        spo2=row["spo2"],
+        respiratory_rate=row["respiratory_rate"],
+        temperature=row["temperature"],
+        consciousness_level=row["consciousness_level"],
+        supplemental_oxygen=row["supplemental_oxygen"],
+        oxygen_flow_rate=row["oxygen_flow_rate"],
+        news2_score=row["news2_score"],
+        news2_breakdown=unpack_components(row["news2_components"]) if row["news2_components"] is not None else None,
+        mews_score=row["mews_score"],
+        notes=row["notes"],
+        data_source=row["source"],
+        recorded_by=None
+    )
+
+
+def _nullable(values: np.ndarray) -> List[Optional[float]]:
+    """Array values for JSON, NaN (not recorded) as null"""
+    return [None if value != value else value for value in values.tolist()]
+
+
+def validate_observations(items: Iterable[Tuple[int, Any]]) -> Tuple[List[Tuple[int, VitalsCreate]], List[IngestResult]]:
+    """
+    Validate raw (index, observation) pairs one by one so a bad item only
+    rejects itself.
+    
+    Returns:
+        ((index, VitalsCreate) pairs, rejected results)
+    """
+    valid = []
+    rejected = []
+    for index, item in items:
+        try:
+            valid.append((index, VitalsCreate.model_validate(item)))
+        except ValidationError as e:
+            rejected.append(IngestResult.rejected(
+                index,
+                *(f"{'.'.join(str(loc) for loc in error['loc']) or 'body'}: {error['msg']}" for error in e.errors())
+            ))
+    return valid, rejected
+
+
+@router.post("/batch", response_model=VitalsBatchResponse)
+async def record_vitals_batch(
+    observations: List[Dict[str, Any]] = Body(..., max_length=MAX_BATCH_SIZE),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Record new vitals observation for a patient.
-    Automatically calculates NEWS2 and MEWS scores.
+    Record many vitals observations in one request (central monitoring gateways).
+    Items are validated and scored individually, then stored with multi-row
+    inserts in a single transaction. Invalid items and unknown patients are
+    reported per item and do not fail the rest of the batch.
+    """
+    valid, rejected = validate_observations(enumerate(observations))
+    results = sorted(rejected + await vitals_ingestor.ingest(db, valid), key=lambda result: result.index)
+    created = sum(result.status == "created" for result in results)
+    
+    return VitalsBatchResponse(
+        created=created,
+        rejected=len(results) - created,
+        results=[VitalsBatchItemResult(**vars(result)) for result in results]
+    )
+
+
+@router.post("/stream")
+async def stream_vitals(
+    request: Request,
+    batch_size: int = Query(200, ge=1, le=MAX_BATCH_SIZE, description="Readings per micro-batch"),
+    verbose: bool = Query(False, description="Acknowledge every stored line, not only rejected ones")
+):
+    """
+    Ingest a chunked newline-delimited JSON body (one VitalsCreate object per line)
+    from a monitor gateway.
+    Readings are scored and stored in micro-batches while the upload is in
+    progress; rejected lines and per-batch acks are streamed back as NDJSON.
+    The stream manages its own database session because it outlives the
+    request dependencies, and the response reads the body itself
+    (BodyStreamingResponse) while acks are sent.
+    """
+    ingest = NDJSONIngest(validate_observations, batch_size=batch_size, verbose=verbose)
+    return BodyStreamingResponse(ingest.run(request.stream()), media_type="application/x-ndjson")
+
+
+device_channels = DeviceChannelHub(validate_observations)
+
+
+@router.websocket("/ws")
+async def device_channel(websocket: WebSocket):
+    """
+    Persistent channel for bedside monitors.
+    The device authenticates once with a device token, then streams readings
+    with sequence numbers; they are scored and stored in batches (same path
+    as /vitals/batch) and acknowledged in batches.
+    See app.services.device_channel for the message protocol.
+    """
+    await device_channels.serve(websocket)
+
+
+@router.get("/ws/stats")
+async def device_channel_stats():
+    """Throughput of the device sockets open on this worker"""
+    connections = device_channels.stats()
+    return {"connections": len(connections), "devices": connections}
+
+
+@router.patch("/{vitals_id}", response_model=VitalsResponse)
+async def amend_vitals(
+    vitals_id: str,
+    amendment: VitalsAmend,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Correct charted values on an existing observation.
+    Only the NEWS2/MEWS components fed by the corrected fields are rescored
+    (from the stored packed breakdown), and only alert rules that read those
+    fields are re-evaluated.
     """
-    # Verify patient exists
     result = await db.execute(
-        select(Patient).where(Patient.id == vitals_data.patient_id)
+        select(VitalsObservation).where(VitalsObservation.id == vitals_id)
     )
-    patient = result.scalar_one_or_none()
-    
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
-    
-    # Calculate NEWS2 score if all required vitals present
-    news2_score = None
-    if all([
-        vitals_data.respiratory_rate,
-        vitals_data.spo2,
-        vitals_data.temperature,
-        vitals_data.systolic_bp,
-        vitals_data.heart_rate,
-        vitals_data.consciousness_level
-    ]):
-        calculator = NEWS2Calculator()
-        try:
-            result = calculator.calculate(
-                respiratory_rate=vitals_data.respiratory_rate,
-                spo2=vitals_data.spo2,
-                temperature=vitals_data.temperature,
-                systolic_bp=vitals_data.systolic_bp,
-                heart_rate=vitals_data.heart_rate,
-                consciousness_level=vitals_data.consciousness_level,
-                on_supplemental_oxygen=vitals_data.supplemental_oxygen
+    vitals = result.scalar_one_or_none()
+    
+    if not vitals:
+        raise HTTPException(status_code=404, detail="Vitals observation not found")
+    
+    updates = amendment.model_dump(exclude_unset=True, exclude={"amended_by", "reason"})
+    changes = {
+        field: (getattr(vitals, field), value)
+        for field, value in updates.items()
+        if getattr(vitals, field) != value
+    }
+    if not changes:
+        return vitals
+    
+    previous = {"news2": vitals.news2_breakdown, "mews": vitals.mews_breakdown}
+    for field, (_, value) in changes.items():
+        setattr(vitals, field, value)
+    
+    # Rescore only what the corrected fields feed into
+    profile = await scoring_profiles.get(db, vitals.patient_id)
+    outcomes = scoring_engine.rescore(vitals, changes, previous, profile=profile)
+    if "news2" in outcomes:
+        news2 = outcomes["news2"]
+        vitals.news2_score = news2.value if news2 else None
+        vitals.news2_components = news2.detail.packed_components if news2 else None
+    if "mews" in outcomes:
+        mews = outcomes["mews"]
+        vitals.mews_score = mews.value if mews else None
+        vitals.mews_components = mews.detail.packed_components if mews else None
+    
+    # Keep an audit trail of corrections on the observation
+    metadata = dict(vitals.extra_metadata or {})
+    metadata["amendments"] = metadata.get("amendments", []) + [{
+        "amended_at": datetime.utcnow().isoformat(),
+        "amended_by": amendment.amended_by,
+        "reason": amendment.reason,
+        "changes": {field: {"from": old, "to": new} for field, (old, new) in changes.items()},
+    }]
+    vitals.extra_metadata = metadata
+    
+    # Re-evaluate only the alert rules of the rescored scores
+    rules = {
+        scoring_engine.get(name).alert_type: name
+        for name in outcomes
+        if scoring_engine.get(name).alert_type
+    }
+    triggered = {
+        name for name, outcome in outcomes.items()
+        if outcome is not None and scoring_engine.get(name).triggers_alert(outcome)
+    }
+    open_alerts = []
+    if rules:
+        result = await db.execute(
+            select(Alert).where(
+                and_(
+                    Alert.vitals_id == vitals.id,
+                    Alert.alert_type.in_(list(rules)),
+                    Alert.status.in_([AlertStatus.ACTIVE.value, AlertStatus.ACKNOWLEDGED.value])
+                )
             )
-            news2_score = result["total_score"]
-        except Exception as e:
-            # Don't fail the request if scoring fails
-            print(f"NEWS2 calculation failed: {e}")
-    
-    # Create vitals observation
-    vitals = VitalsObservation(
-        patient_id=vitals_data.patient_id,
-        heart_rate=vitals_data.heart_rate,
-        systolic_bp=vitals_data.systolic_bp,
-        diastolic_bp=vitals_data.diastolic_bp,
-        spo2=vitals_data.spo2,
-        respiratory_rate=vitals_data.respiratory_rate,
-        temperature=vitals_data.temperature,
-        consciousness_level=vitals_data.consciousness_level,
-        supplemental_oxygen=vitals_data.supplemental_oxygen,
-        oxygen_flow_rate=vitals_data.oxygen_flow_rate,
-        news2_score=news2_score,
-        notes=vitals_data.notes,
-        data_source=vitals_data.data_source
+        )
+        open_alerts = result.scalars().all()
+    
+    already_raised = set()
+    for alert in open_alerts:
+        if rules[alert.alert_type] in triggered:
+            already_raised.add(rules[alert.alert_type])
+        else:
+            # The corrected reading no longer supports this alert
+            alert.status = AlertStatus.RESOLVED.value
+            alert.resolved_at = datetime.utcnow()
+    
+    new_alerts = alert_engine.build_alerts(
+        vitals.patient_id,
+        outcomes,
+        vitals_id=vitals.id,
+        names=[name for name in triggered if name not in already_raised]
     )
+    for alert in new_alerts:
+        alert.news2_score = vitals.news2_score
+        alert.mews_score = vitals.mews_score
+    db.add_all(new_alerts)
+    
+    if any(field in TREND_PARAMETERS for field in changes):
+        await db.flush()
+        await vitals_rollups.recompute(db, vitals.patient_id, [vitals.observed_at])
     
-    db.add(vitals)
     await db.commit()
     await db.refresh(vitals)
+    recent_vitals.update(vitals)
+    await recent_vitals.announce_change(vitals.patient_id)
+    await latest_vitals_cache.replace(RecentObservation.from_model(vitals))
     
     return vitals
 
 
+@router.get("/latest", response_model=Dict[str, Optional[VitalsResponse]])
+async def get_latest_vitals_bulk(
+    patient_ids: Optional[List[str]] = Query(None, alias="patient_id", description="Patients (repeatable)"),
+    ward: Optional[str] = Query(None, description="All active patients of a ward"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the most recent vitals observation of several patients (ward views).
+    Served from the latest vitals cache in one round trip; patients it misses
+    are loaded with a single query. Patients without vitals map to null.
+    """
+    try:
+        ids = [str(uuid.UUID(patient_id)) for patient_id in patient_ids or []]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid patient_id")
+    if ward:
+        result = await db.execute(
+            select(Patient.id).where(and_(Patient.ward == ward, Patient.is_active == ACTIVE_STATUS))
+        )
+        ids.extend(str(patient_id) for patient_id in result.scalars())
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_LATEST_PATIENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LATEST_PATIENTS} patients per request")
+    
+    latest = await latest_vitals_cache.get_many(ids)
+    missing = [uuid.UUID(patient_id) for patient_id, observation in latest.items() if observation is None]
+    if missing:
+        result = await db.execute(
+            select(VitalsObservation)
+            .where(VitalsObservation.patient_id.in_(missing))
+            .distinct(VitalsObservation.patient_id)
+            .order_by(VitalsObservation.patient_id, desc(VitalsObservation.observed_at))
+        )
+        loaded = [RecentObservation.from_model(vitals) for vitals in result.scalars()]
+        await latest_vitals_cache.put_many(loaded)
+        latest.update((observation.patient_id, observation) for observation in loaded)
+    
+    return {
+        patient_id: VitalsResponse.model_validate(observation) if observation is not None else None
+        for patient_id, observation in latest.items()
+    }
+
+
+@router.get("/export")
+async def export_vitals(
+    format: str = Query("parquet", pattern="^(arrow|parquet)$", description="arrow (IPC stream) or parquet"),
+    ward: Optional[str] = Query(None, description="Only patients on this ward"),
+    patient_ids: Optional[List[str]] = Query(None, alias="patient_id", description="Only these patients (repeatable)"),
+    start: Optional[datetime] = Query(None, description="Observed at or after (UTC)"),
+    end: Optional[datetime] = Query(None, description="Observed before (UTC)"),
+    batch_size: int = Query(settings.EXPORT_BATCH_SIZE, ge=1000, le=500000, description="Rows per record batch / row group")
+):
+    """
+    Export vitals observations for research / ML as a zstd-compressed Arrow
+    IPC stream or Parquet file, with dictionary-encoded categorical columns.
+    Rows are streamed from a server-side cursor one batch at a time, so
+    memory use stays constant whatever the size of the export.
+    The export manages its own database connection because it outlives the
+    request dependencies.
+    """
+    try:
+        ids = [uuid.UUID(patient_id) for patient_id in patient_ids or []]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid patient_id")
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    filters = vitals_export.ExportFilter(ward=ward, patient_ids=ids, start=start, end=end)
+    filename = f"vitals-{datetime.utcnow():%Y%m%dT%H%M%S}.{vitals_export.EXPORT_EXTENSIONS[format]}"
+    return StreamingResponse(
+        vitals_export.export_vitals(filters, format, batch_size),
+        media_type=vitals_export.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get("/{vitals_id}", response_model=VitalsResponse)
 async def get_vitals(
     vitals_id: str,
@@ -173,30 +536,79 @@ async def get_vitals(
 @router.get("/patient/{patient_id}", response_model=List[VitalsResponse])
 async def get_patient_vitals(
     patient_id: str,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    hours: int = Query(24, ge=1, le=168, description="Hours of history to retrieve"),
-    limit: int = Query(100, ge=1, le=500, description="Maximum number of records")
+    hours: int = Query(24, ge=1, le=168, description="Hours of history on the first page"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of records"),
+    cursor: Optional[Cursor] = Depends(cursor_param),
+    max_points: Optional[int] = Query(None, ge=50, le=10000, description="Downsample to at most this many points"),
+    downsampling: str = Query("lttb", pattern="^(lttb|minmax)$", description="lttb (shape) or minmax (every bucket's extremes)")
 ):
     """
     Get vitals history for a patient.
     Default: Last 24 hours, maximum 100 records.
+    Pages are newest first. While older records exist (within or beyond the
+    window) the X-Next-Cursor header carries a cursor for the next page;
+    pages fetched with a cursor also carry X-Previous-Cursor while newer
+    records exist. Paging has a constant cost per page at any depth.
+    With max_points, the whole window is downsampled to at most max_points
+    records (keeping the extremes of every parameter) instead of being cut
+    to the newest `limit`.
+    The first page is served from the recent vitals buffer when the window
+    fits in it.
     """
+    if cursor is not None and max_points:
+        raise HTTPException(status_code=400, detail="max_points cannot be combined with cursor")
+    try:
+        patient_uuid = uuid.UUID(patient_id)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid patient_id")
     since = datetime.utcnow() - timedelta(hours=hours)
     
-    result = await db.execute(
-        select(VitalsObservation)
-        .where(
-            and_(
-                VitalsObservation.patient_id == patient_id,
-                VitalsObservation.recorded_at >= since
+    vitals = await recent_vitals.window(db, patient_id, since) if cursor is None else None
+    if vitals is not None:
+        vitals = vitals[::-1]
+        if not max_points:
+            if len(vitals) > limit:
+                last = vitals[limit - 1]
+                next_cursor = Cursor(last.observed_at, uuid.UUID(last.id)).encode()
+            elif recent_vitals.has_older(patient_id, since):
+                # Older rows continue from the window edge, as in fetch_page
+                next_cursor = Cursor(since, MAX_ID).encode()
+            else:
+                next_cursor = None
+            page = Page(rows=vitals[:limit], next_cursor=next_cursor)
+            set_cursor_headers(response, page)
+            return page.rows
+    elif max_points:
+        result = await db.execute(
+            select(VitalsObservation)
+            .where(
+                and_(
+                    VitalsObservation.patient_id == patient_uuid,
+                    VitalsObservation.observed_at >= since
+                )
             )
+            .order_by(desc(VitalsObservation.observed_at))
         )
-        .order_by(desc(VitalsObservation.recorded_at))
-        .limit(limit)
-    )
-    vitals = result.scalars().all()
+        vitals = list(result.scalars().all())
+    else:
+        page = await fetch_page(
+            db,
+            select(VitalsObservation).where(VitalsObservation.patient_id == patient_uuid),
+            VitalsObservation.observed_at,
+            VitalsObservation.id,
+            limit,
+            cursor=cursor,
+            since=since
+        )
+        set_cursor_headers(response, page)
+        return page.rows
     
-    return list(vitals)
+    # Oldest first for downsampling, newest first in the response
+    timestamps, series = series_from_observations(vitals[::-1], TREND_PARAMETERS)
+    kept = downsample(timestamps, series, max_points, downsampling)
+    return [vitals[len(vitals) - 1 - position] for position in kept[::-1]]
 
 
 @router.get("/patient/{patient_id}/latest", response_model=VitalsResponse)
@@ -204,11 +616,24 @@ async def get_latest_vitals(
     patient_id: str,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get the most recent vitals observation for a patient"""
+    """
+    Get the most recent vitals observation for a patient.
+    Served from the latest vitals cache (Redis), then the database; the
+    in-process recent vitals buffer is used while Redis is unavailable.
+    """
+    cached = await latest_vitals_cache.get(patient_id)
+    if cached is not None:
+        return VitalsResponse.model_validate(cached)
+    
+    if not latest_vitals_cache.available:
+        recent = await recent_vitals.latest(db, patient_id)
+        if recent is not None:
+            return VitalsResponse.model_validate(recent)
+    
     result = await db.execute(
         select(VitalsObservation)
         .where(VitalsObservation.patient_id == patient_id)
-        .order_by(desc(VitalsObservation.recorded_at))
+        .order_by(desc(VitalsObservation.observed_at))
         .limit(1)
     )
     vitals = result.scalar_one_or_none()
@@ -216,6 +641,7 @@ async def get_latest_vitals(
     if not vitals:
         raise HTTPException(status_code=404, detail="No vitals found for this patient")
     
+    await latest_vitals_cache.put_many([RecentObservation.from_model(vitals)])
     return vitals
 
 
@@ -224,82 +650,187 @@ async def get_vitals_trend(
     patient_id: str,
     parameter: str,
     db: AsyncSession = Depends(get_db),
-    hours: int = Query(24, ge=1, le=168)
+    hours: int = Query(24, ge=1, le=168),
+    include_points: bool = Query(False, description="Also return the raw data points"),
+    resolution: Optional[str] = Query(None, pattern="^(5min|hour|day)$", description="Read pre-aggregated buckets (5min, hour, day)"),
+    max_points: Optional[int] = Query(None, ge=50, le=10000, description="Downsample to at most this many points"),
+    downsampling: str = Query("lttb", pattern="^(lttb|minmax)$", description="lttb (shape) or minmax (every bucket's extremes)")
 ):
     """
     Get trend analysis for a specific vital sign parameter.
     Parameters: heart_rate, systolic_bp, diastolic_bp, spo2, respiratory_rate, temperature
+    Statistics are computed by the database in one aggregate query (or from
+    the recent vitals buffer when the window fits); the trend is classified
+    from the least-squares slope. max_points downsamples the returned points.
+    With resolution, both come from the rollup buckets (points are bucket means).
     """
-    valid_parameters = [
-        "heart_rate", "systolic_bp", "diastolic_bp", 
-        "spo2", "respiratory_rate", "temperature"
-    ]
-    
-    if parameter not in valid_parameters:
+    if parameter not in TREND_PARAMETERS:
         raise HTTPException(
             status_code=400, 
-            detail=f"Invalid parameter. Must be one of: {', '.join(valid_parameters)}"
+            detail=f"Invalid parameter. Must be one of: {', '.join(TREND_PARAMETERS)}"
         )
+    try:
+        uuid.UUID(patient_id)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid patient_id")
     
     since = datetime.utcnow() - timedelta(hours=hours)
     
-    result = await db.execute(
-        select(VitalsObservation)
-        .where(
-            and_(
-                VitalsObservation.patient_id == patient_id,
-                VitalsObservation.recorded_at >= since
-            )
-        )
-        .order_by(VitalsObservation.recorded_at)
-    )
-    vitals_list = result.scalars().all()
-    
-    # Extract data points
-    data_points = []
-    values = []
-    
-    for v in vitals_list:
-        value = getattr(v, parameter)
-        if value is not None:
-            data_points.append({
-                "timestamp": v.recorded_at.isoformat(),
-                "value": value
-            })
-            values.append(float(value))
-    
-    if not values:
+    if resolution:
+        # Bucket means as points, statistics merged from the buckets
+        rollups = await vitals_rollups.read(db, patient_id, resolution, since, [parameter])
+        statistics = vitals_rollups.statistics_from_rollups(rollups, hours, [parameter])[parameter]
+        points = [(rollup.bucket_start, rollup.mean) for rollup in rollups] if include_points else None
+    elif (recent := await recent_vitals.window(db, patient_id, since)) is not None:
+        statistics = statistics_from_observations(recent, hours, [parameter])[parameter]
+        points = [(v.observed_at, getattr(v, parameter)) for v in recent] if include_points else None
+    else:
+        statistics = (await trend_statistics(db, patient_id, since, hours, [parameter]))[parameter]
+        points = await trend_points(db, patient_id, since, [parameter]) if include_points and statistics.count else None
+    
+    if not statistics.count:
         raise HTTPException(
             status_code=404, 
             detail=f"No {parameter} data found for this patient"
         )
     
-    # Calculate statistics
-    min_value = min(values)
-    max_value = max(values)
-    avg_value = sum(values) / len(values)
-    
-    # Simple trend analysis
-    if len(values) >= 2:
-        first_half = sum(values[:len(values)//2]) / (len(values)//2)
-        second_half = sum(values[len(values)//2:]) / (len(values) - len(values)//2)
-        
-        if second_half > first_half * 1.1:
-            trend = "increasing"
-        elif second_half < first_half * 0.9:
-            trend = "decreasing"
-        else:
-            trend = "stable"
-    else:
-        trend = "insufficient_data"
+    data_points = None
+    if points is not None:
+        points = [(observed_at, value) for observed_at, value in points if value is not None]
+        if max_points:
+            timestamps, series = series_from_rows(points, [parameter])
+            points = [points[position] for position in downsample(timestamps, series, max_points, downsampling)]
+        data_points = [
+            {"timestamp": observed_at.isoformat(), "value": value}
+            for observed_at, value in points
+        ]
     
     return VitalsTrendResponse(
         parameter=parameter,
         data_points=data_points,
-        min_value=min_value,
-        max_value=max_value,
-        avg_value=round(avg_value, 2),
-        trend=trend
+        count=statistics.count,
+        min_value=statistics.min_value,
+        max_value=statistics.max_value,
+        avg_value=statistics.avg_value,
+        stddev=statistics.stddev,
+        slope_per_hour=statistics.slope_per_hour,
+        trend=statistics.trend
+    )
+
+
+@router.get("/patient/{patient_id}/trends", response_model=VitalsTrendsResponse)
+async def get_vitals_trends(
+    patient_id: str,
+    db: AsyncSession = Depends(get_db),
+    parameters: Optional[List[str]] = Query(None, description="Parameters (repeatable, default all)"),
+    hours: int = Query(24, ge=1, le=168),
+    include_series: bool = Query(True, description="Return the series as well as the statistics"),
+    resolution: Optional[str] = Query(None, pattern="^(5min|hour|day)$", description="Read pre-aggregated buckets (5min, hour, day)"),
+    max_points: Optional[int] = Query(None, ge=50, le=10000, description="Downsample to at most this many points"),
+    downsampling: str = Query("lttb", pattern="^(lttb|minmax)$", description="lttb (shape) or minmax (every bucket's extremes)")
+):
+    """
+    Get statistics and series for several vital sign parameters at once.
+    One scan serves every parameter: the window's rows when series are
+    returned (statistics are computed from them), one aggregate query
+    otherwise, or the recent vitals buffer when the window fits.
+    max_points downsamples the series (statistics use every point).
+    With resolution, series are bucket means read from the rollup tables.
+    """
+    parameters = list(dict.fromkeys(parameters or TREND_PARAMETERS))
+    invalid = [name for name in parameters if name not in TREND_PARAMETERS]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid parameter. Must be one of: {', '.join(TREND_PARAMETERS)}"
+        )
+    try:
+        uuid.UUID(patient_id)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid patient_id")
+    
+    since = datetime.utcnow() - timedelta(hours=hours)
+    
+    rollups = await vitals_rollups.read(db, patient_id, resolution, since, parameters) if resolution else None
+    recent = await recent_vitals.window(db, patient_id, since) if rollups is None else None
+    if rollups is not None:
+        timestamps, series = vitals_rollups.series_from_rollups(rollups, parameters)
+    elif recent is not None:
+        timestamps, series = series_from_observations(recent, parameters)
+    elif include_series:
+        timestamps, series = series_from_rows(await trend_points(db, patient_id, since, parameters), parameters)
+    else:
+        timestamps, series = None, None
+    
+    if rollups is not None:
+        statistics = vitals_rollups.statistics_from_rollups(rollups, hours, parameters)
+    elif series is not None:
+        statistics = statistics_from_series(timestamps, series, hours)
+    else:
+        statistics = await trend_statistics(db, patient_id, since, hours, parameters)
+    
+    if not include_series:
+        timestamps, series = np.empty(0, dtype=np.int64), {}
+    else:
+        # Drop observations that recorded none of the requested parameters
+        recorded = np.zeros(len(timestamps), dtype=bool)
+        for values in series.values():
+            recorded |= ~np.isnan(values)
+        timestamps = timestamps[recorded]
+        series = {name: values[recorded] for name, values in series.items()}
+        if max_points:
+            kept = downsample(timestamps, series, max_points, downsampling)
+            timestamps = timestamps[kept]
+            series = {name: values[kept] for name, values in series.items()}
+    
+    return VitalsTrendsResponse(
+        patient_id=patient_id,
+        hours=hours,
+        timestamps=timestamps.tolist(),
+        series={name: _nullable(values) for name, values in series.items()},
+        statistics={name: VitalsTrendStatistics(**vars(item)) for name, item in statistics.items()}
+    )
+
+
+@router.get("/patient/{patient_id}/highres", response_model=VitalsHighResResponse)
+async def get_highres_vitals(
+    patient_id: str,
+    start: datetime = Query(..., description="Range start (UTC)"),
+    end: Optional[datetime] = Query(None, description="Range end (UTC), default now"),
+    parameters: Optional[List[str]] = Query(None, description="Parameters to return (default all)")
+):
+    """
+    Get the full-rate device readings behind charted observations.
+    Returns at most MAX_HIGHRES_POINTS readings from the start of the range.
+    """
+    if highres_store is None:
+        raise HTTPException(status_code=404, detail="High-rate store is not enabled")
+    
+    parameters = parameters or list(HIGHRES_FIELDS)
+    invalid = [name for name in parameters if name not in HIGHRES_FIELDS]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid parameter. Must be one of: {', '.join(HIGHRES_FIELDS)}"
+        )
+    
+    end = end or datetime.utcnow()
+    try:
+        columns = highres_store.read(patient_id, start, end, parameters)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid patient_id")
+    truncated = len(columns["ts"]) > MAX_HIGHRES_POINTS
+    
+    return VitalsHighResResponse(
+        patient_id=patient_id,
+        start=start,
+        end=end,
+        timestamps=columns["ts"][:MAX_HIGHRES_POINTS].tolist(),
+        values={
+            name: _nullable(columns[name][:MAX_HIGHRES_POINTS])
+            for name in parameters
+        },
+        truncated=truncated
     )
 
 
@@ -318,6 +849,11 @@ async def delete_vitals(
         raise HTTPException(status_code=404, detail="Vitals observation not found")
     
     await db.delete(vitals)
+    await db.flush()
+    await vitals_rollups.recompute(db, vitals.patient_id, [vitals.observed_at])
     await db.commit()
+    recent_vitals.remove(vitals.patient_id, vitals.id)
+    await recent_vitals.announce_change(vitals.patient_id)
+    await latest_vitals_cache.discard(vitals.patient_id, vitals.id)
     
     return None
@@ -0,0 +1,16 @@
+"""
+Redis connection for MedObsMind backend.
+
+Shared by every worker process; connections are opened lazily on first use.
+"""
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+redis_client = redis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT
+)
@@ -3,7 +3,10 @@ Configuration settings for MedObsMind backend.
 Uses pydantic-settings for environment variable management.
 """
 
-from typing import List
+from typing import Dict, List
+from pathlib import Path
+import os
+
 from pydantic_settings import BaseSettings
 from pydantic import validator
 
@@ -28,6 +31,7 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT: float = 0.5
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -42,6 +46,13 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(",")]
         return v
     
+    @validator("HIGHRES_STORE_PATH")
+    def require_absolute_store_path(cls, v):
+        # A relative path would follow the working directory of each worker / CLI run
+        if v and not os.path.isabs(v):
+            raise ValueError("HIGHRES_STORE_PATH must be an absolute path")
+        return v
+    
     # Medical Safety Settings
     REQUIRE_DOCTOR_CONFIRMATION: bool = True
     AUDIT_LOG_ENABLED: bool = True
@@ -51,6 +62,43 @@ class Settings(BaseSettings):
     NEWS2_MEDIUM_RISK_THRESHOLD: int = 5
     NEWS2_HIGH_RISK_THRESHOLD: int = 7
     
+    # Per-ward NEWS2 threshold overrides, e.g. {"ICU": {"medium": 6, "high": 8}}
+    NEWS2_WARD_THRESHOLDS: Dict[str, Dict[str, int]] = {}
+    
+    # Seconds a cached per-patient scoring profile is trusted without reload
+    SCORING_PROFILE_CACHE_TTL: int = 300
+    
+    # Group commit of single vitals inserts (app.services.write_buffer)
+    VITALS_GROUP_COMMIT_MAX_ROWS: int = 500
+    VITALS_GROUP_COMMIT_MAX_DELAY_MS: float = 5.0
+    
+    # Charting cadence for full-rate device readings (app.services.coalescing)
+    DEVICE_CHART_INTERVAL_SECONDS: int = 300
+    
+    # Full-rate device readings (app.services.highres_store; empty path disables)
+    HIGHRES_STORE_PATH: str = str(Path(__file__).resolve().parents[2] / "data" / "highres")
+    HIGHRES_RETENTION_DAYS: int = 7
+    HIGHRES_COMPACT_AFTER_HOURS: int = 24
+    
+    # Per-patient recent vitals kept in memory (app.services.recent_vitals)
+    RECENT_VITALS_HOURS: int = 24
+    RECENT_VITALS_MAX_OBSERVATIONS: int = 720
+    RECENT_VITALS_MAX_PATIENTS: int = 2000
+    RECENT_VITALS_REFRESH_SECONDS: int = 60
+    
+    # Latest observation per patient shared through Redis (app.services.latest_vitals)
+    LATEST_VITALS_CACHE_ENABLED: bool = True
+    LATEST_VITALS_CACHE_TTL: int = 86400
+    LATEST_VITALS_CACHE_RETRY_SECONDS: int = 30
+    
+    # Monthly vitals_observations partitions (app.services.partitions)
+    VITALS_PARTITION_MONTHS_AHEAD: int = 3
+    VITALS_RETENTION_MONTHS: int = 0  # 0 keeps every partition
+    VITALS_ARCHIVE_DIR: str = ""  # expired partitions are archived here before being dropped
+    
+    # Arrow / Parquet vitals export (app.services.vitals_export)
+    EXPORT_BATCH_SIZE: int = 50000  # rows per record batch / row group
+    
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
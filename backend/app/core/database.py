@@ -2,6 +2,7 @@
 Database configuration and session management.
 """
 
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
@@ -27,6 +28,18 @@ AsyncSessionLocal = async_sessionmaker(
 # Base class for models
 Base = declarative_base()
 
+# SQLSTATE for foreign_key_violation
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def is_foreign_key_violation(error: DBAPIError) -> bool:
+    """True if a database error was raised by a foreign key constraint"""
+    orig = getattr(error, "orig", None)
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if code is None and orig is not None:
+        code = getattr(orig.__cause__, "sqlstate", None)
+    return code == FOREIGN_KEY_VIOLATION
+
 
 async def get_db() -> AsyncSession:
     """
@@ -0,0 +1,173 @@
+"""
+Keyset (cursor) pagination for MedObsMind backend.
+
+Lists ordered newest first by (timestamp, id) are paged with opaque
+cursor tokens naming the last row seen, instead of OFFSET: every page is
+one index range read of limit + 1 rows, however deep into the history it
+is. A cursor also records its direction, so a page can be followed by the
+next (older) or the previous (newer) one. Endpoints return the cursors
+in X-Next-Cursor / X-Previous-Cursor headers, so list bodies keep their
+shape.
+"""
+
+from typing import Any, List, Optional
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import base64
+import json
+import uuid
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Select, and_, asc, desc, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Sorts after every id, so a cursor at (since, MAX_ID) starts just before `since`
+MAX_ID = uuid.UUID(int=(1 << 128) - 1)
+
+
+class InvalidCursor(ValueError):
+    """A cursor token that cannot be decoded"""
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREVIOUS_CURSOR_HEADER = "X-Previous-Cursor"
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Position between two rows.
+
+    Attributes:
+        moment: Timestamp of the row the cursor is next to
+        id: Its id (breaks ties between equal timestamps)
+        newer: True to page towards newer rows (previous page)
+    """
+    moment: datetime
+    id: uuid.UUID
+    newer: bool = False
+
+    def encode(self) -> str:
+        payload = json.dumps([self.moment.isoformat(), str(self.id), int(self.newer)], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        try:
+            payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            moment, row_id, newer = json.loads(payload)
+            moment = datetime.fromisoformat(moment)
+            if moment.tzinfo is not None:
+                # Timestamp columns are naive UTC; an aware bound fails to compare
+                moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+            return cls(moment, uuid.UUID(row_id), bool(newer))
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+
+@dataclass
+class Page:
+    """One page of rows, newest first, with the cursors around it"""
+    rows: List[Any]
+    next_cursor: Optional[str] = None      # older rows
+    previous_cursor: Optional[str] = None  # newer rows
+
+
+def _after(time_column, id_column, cursor: Cursor):
+    """Rows past the cursor in its direction"""
+    if cursor.newer:
+        return and_(
+            time_column >= cursor.moment,
+            or_(time_column > cursor.moment, id_column > cursor.id)
+        )
+    # The plain range on time_column is what an index on it can use
+    return and_(
+        time_column <= cursor.moment,
+        or_(time_column < cursor.moment, id_column < cursor.id)
+    )
+
+
+def _cursor(row, time_column, id_column, newer: bool) -> str:
+    return Cursor(getattr(row, time_column.key), getattr(row, id_column.key), newer).encode()
+
+
+async def fetch_page(
+    db: AsyncSession,
+    statement: Select,
+    time_column,
+    id_column,
+    limit: int,
+    cursor: Optional[Cursor] = None,
+    since: Optional[datetime] = None
+) -> Page:
+    """
+    Read one page of an entity query.
+
+    Args:
+        db: Database session
+        statement: select(Model) with its filters, unordered
+        time_column: Timestamp column of the order
+        id_column: Primary key column breaking timestamp ties
+        limit: Rows per page
+        cursor: Position to continue from (None = newest page)
+        since: Lower bound of the newest page only; rows older than it
+            are reached through its next cursor
+
+    Returns:
+        Page of rows, newest first. next_cursor / previous_cursor are set
+        only when rows exist past the page in that direction.
+    """
+    newer = cursor is not None and cursor.newer
+    query = statement
+    if cursor is not None:
+        query = query.where(_after(time_column, id_column, cursor))
+    elif since is not None:
+        # The newest page stops at `since`; older rows continue on the next page
+        query = query.where(time_column >= since)
+    order = asc if newer else desc
+    result = await db.execute(
+        query.order_by(order(time_column), order(id_column)).limit(limit + 1)
+    )
+    rows = list(result.scalars())
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    if newer:
+        rows.reverse()
+        return Page(
+            rows=rows,
+            next_cursor=_cursor(rows[-1], time_column, id_column, False) if rows else None,
+            previous_cursor=_cursor(rows[0], time_column, id_column, True) if more else None,
+        )
+
+    if cursor is None and since is not None and not more:
+        # One index probe tells whether anything older than `since` is left
+        older = await db.execute(statement.with_only_columns(id_column).where(time_column < since).limit(1))
+        if older.first() is not None:
+            return Page(rows=rows, next_cursor=Cursor(since, MAX_ID).encode())
+
+    return Page(
+        rows=rows,
+        next_cursor=_cursor(rows[-1], time_column, id_column, False) if more else None,
+        previous_cursor=_cursor(rows[0], time_column, id_column, True) if rows and cursor is not None else None,
+    )
+
+
+def cursor_param(
+    cursor: Optional[str] = Query(None, description=f"Page cursor from the {NEXT_CURSOR_HEADER} / {PREVIOUS_CURSOR_HEADER} header")
+) -> Optional[Cursor]:
+    """Dependency decoding the `cursor` query parameter"""
+    if cursor is None:
+        return None
+    try:
+        return Cursor.decode(cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def set_cursor_headers(response: Response, page: Page) -> None:
+    """Expose a page's cursors as response headers (the body stays a plain list)"""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.previous_cursor:
+        response.headers[PREVIOUS_CURSOR_HEADER] = page.previous_cursor
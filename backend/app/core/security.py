@@ -0,0 +1,55 @@
+"""
+Security helpers for MedObsMind backend.
+
+Device tokens are JWTs signed with settings.SECRET_KEY; the subject is the
+device identifier that readings from that device are attributed to.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+DEVICE_TOKEN_TYPE = "device"
+
+
+def create_device_token(device_id: str, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Issue a token a bedside device presents when it opens a channel.
+
+    Args:
+        device_id: Device identifier (stored on each observation)
+        expires_delta: Token lifetime (default: no expiry)
+
+    Returns:
+        Encoded JWT
+    """
+    claims = {"sub": device_id, "type": DEVICE_TOKEN_TYPE}
+    if expires_delta is not None:
+        claims["exp"] = datetime.utcnow() + expires_delta
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def verify_device_token(token: str) -> Optional[str]:
+    """
+    Validate a device token.
+
+    Returns:
+        The device identifier, or None if the token is invalid or expired
+    """
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if claims.get("type") != DEVICE_TOKEN_TYPE or not claims.get("sub"):
+        return None
+    return claims["sub"]
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m app.core.security <device_id>
+    print(create_device_token(sys.argv[1]))
@@ -4,12 +4,20 @@ MedObsMind Backend - Medical Observation & Clinical Decision Support System
 Main FastAPI application entry point.
 """
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.cache import redis_client
+from app.core.database import engine, AsyncSessionLocal
+from app.services.coalescing import device_coalescer
+from app.services.partitions import ensure_partitions
+from app.services.patient_registry import patient_registry
+from app.services.recent_vitals import recent_vitals
+from app.services.write_buffer import vitals_write_buffer
 
 # Import routers
 from app.api import patients, vitals, alerts, llm
@@ -31,17 +39,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create database tables (in production, use Alembic migrations)
+# Periodic tasks started at startup and cancelled at shutdown
+background_tasks = []
+
+# The schema is owned by the Alembic migrations (alembic upgrade head)
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
-    # Create tables
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        # Monthly vitals partitions up to VITALS_PARTITION_MONTHS_AHEAD
+        await ensure_partitions(conn)
     
-    print("✅ Database tables created")
+    print("✅ Vitals partitions ready")
+    
+    # Active patient IDs (and their scoring profiles) for write paths
+    async with AsyncSessionLocal() as db:
+        await patient_registry.load(db)
+    background_tasks.append(asyncio.create_task(patient_registry.refresh_forever(AsyncSessionLocal)))
+    # Device windows left open by monitors that stopped sending
+    background_tasks.append(asyncio.create_task(device_coalescer.flush_idle_forever()))
+    # Recent vitals amended or deleted by other workers
+    background_tasks.append(asyncio.create_task(recent_vitals.listen_forever()))
     print(f"🚀 MedObsMind API running on {settings.ENVIRONMENT} mode")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop periodic tasks, chart open device windows and commit vitals still waiting in the group-commit buffer"""
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await device_coalescer.close()
+    await vitals_write_buffer.close()
+    await redis_client.aclose()
+
 @app.get("/")
 async def root():
     """Root endpoint - API status"""
@@ -0,0 +1,251 @@
+"""
+MEWS (Modified Early Warning Score) Implementation
+
+MEWS is a bedside track-and-trigger score built from five physiological
+parameters. It predates NEWS2 and is still used by many Indian hospitals.
+
+Score ranges:
+- 0-2: Low risk
+- 3-4: Medium risk (increase observation frequency)
+- 5+: High risk (urgent medical review)
+
+Reference: Subbe et al., QJM (2001)
+"""
+
+from typing import Optional, Dict
+from dataclasses import dataclass
+import math
+
+import numpy as np
+
+from app.ml.news2 import AVPU_CODES, AVPU_MISSING, ScoreBands, is_recorded, pack_components
+
+
+# Column order of the component score matrix returned by calculate_batch
+MEWS_COMPONENTS = (
+    "systolic_bp",
+    "heart_rate",
+    "respiratory_rate",
+    "temperature",
+    "consciousness",
+)
+
+
+@dataclass
+class MEWSResult:
+    """MEWS calculation result"""
+    total_score: int
+    risk_level: str  # low, medium, high
+    component_scores: Dict[str, int]
+    requires_escalation: bool
+
+    @property
+    def packed_components(self) -> int:
+        """Component scores in the packed integer encoding (news2.pack_components)"""
+        return pack_components(self.component_scores, MEWS_COMPONENTS)
+
+
+@dataclass
+class MEWSBatchResult:
+    """Vectorized MEWS calculation result (one entry per observation)"""
+    total_scores: np.ndarray      # (n,) int16
+    component_scores: np.ndarray  # (n, 5) int8, columns ordered as MEWS_COMPONENTS
+    risk_levels: np.ndarray       # (n,) int8, index into news2.RISK_LEVELS
+
+
+class MEWSCalculator:
+    """
+    MEWS (Modified Early Warning Score) calculator.
+
+    Clinical parameters scored:
+    1. Systolic Blood Pressure (SBP)
+    2. Heart Rate (HR)
+    3. Respiratory Rate (RR)
+    4. Temperature
+    5. Level of Consciousness (AVPU)
+    """
+
+    # Scoring tables based on Subbe et al. Ranges are closed (see
+    # news2.ScoreBands); a "<x" band ends just below x so fractional
+    # readings under x are not scored as the next band.
+
+    SYSTOLIC_BP_SCORES = {
+        (0, 70): 3,         # ≤70
+        (71, 80): 2,        # 71-80
+        (81, 100): 1,       # 81-100
+        (101, 199): 0,      # 101-199 (normal)
+        (200, 999): 2,      # ≥200
+    }
+
+    HEART_RATE_SCORES = {
+        (0, 40): 2,         # ≤40
+        (41, 50): 1,        # 41-50
+        (51, 100): 0,       # 51-100 (normal)
+        (101, 110): 1,      # 101-110
+        (111, 129): 2,      # 111-129
+        (130, 999): 3,      # ≥130
+    }
+
+    RESPIRATORY_RATE_SCORES = {
+        (0, math.nextafter(9, 0)): 2,         # <9
+        (9, 14): 0,         # 9-14 (normal)
+        (15, 20): 1,        # 15-20
+        (21, 29): 2,        # 21-29
+        (30, 999): 3,       # ≥30
+    }
+
+    TEMPERATURE_SCORES = {
+        (0, math.nextafter(35.0, 0)): 2,      # <35
+        (35.0, 38.4): 0,    # 35.0-38.4 (normal)
+        (38.5, 999): 2,     # ≥38.5
+    }
+
+    CONSCIOUSNESS_SCORES = {
+        "A": 0,  # Alert
+        "V": 1,  # Reacting to Voice
+        "P": 2,  # Reacting to Pain
+        "U": 3,  # Unresponsive
+    }
+
+    SYSTOLIC_BP_BANDS = ScoreBands.compile(SYSTOLIC_BP_SCORES)
+    HEART_RATE_BANDS = ScoreBands.compile(HEART_RATE_SCORES)
+    RESPIRATORY_RATE_BANDS = ScoreBands.compile(RESPIRATORY_RATE_SCORES)
+    TEMPERATURE_BANDS = ScoreBands.compile(TEMPERATURE_SCORES)
+
+    MEDIUM_RISK_THRESHOLD = 3
+    HIGH_RISK_THRESHOLD = 5
+
+    # Observation field -> component it feeds
+    PARAMETER_COMPONENTS = {
+        "systolic_bp": "systolic_bp",
+        "heart_rate": "heart_rate",
+        "respiratory_rate": "respiratory_rate",
+        "temperature": "temperature",
+        "consciousness_level": "consciousness",
+    }
+
+    def calculate(
+        self,
+        systolic_bp: Optional[float] = None,
+        heart_rate: Optional[float] = None,
+        respiratory_rate: Optional[float] = None,
+        temperature: Optional[float] = None,
+        consciousness_level: Optional[str] = None
+    ) -> MEWSResult:
+        """
+        Calculate MEWS score.
+
+        Args:
+            systolic_bp: Systolic blood pressure (mmHg)
+            heart_rate: Heart rate (bpm)
+            respiratory_rate: Breaths per minute
+            temperature: Body temperature (°C)
+            consciousness_level: AVPU scale (A/V/P/U)
+
+        Returns:
+            MEWSResult with total score and risk level
+        """
+        component_scores = {}
+
+        for name, value in (
+            ("systolic_bp", systolic_bp),
+            ("heart_rate", heart_rate),
+            ("respiratory_rate", respiratory_rate),
+            ("temperature", temperature),
+            ("consciousness", consciousness_level),
+        ):
+            score = self.score_component(name, value)
+            if score is not None:
+                component_scores[name] = score
+
+        return self.from_components(component_scores)
+
+    def score_component(self, component: str, value) -> Optional[int]:
+        """Score a single component from its reading; None if not recorded"""
+        if not is_recorded(value):
+            return None
+        if component == "consciousness":
+            return self.CONSCIOUSNESS_SCORES.get(value.upper(), 0)
+        bands = {
+            "systolic_bp": self.SYSTOLIC_BP_BANDS,
+            "heart_rate": self.HEART_RATE_BANDS,
+            "respiratory_rate": self.RESPIRATORY_RATE_BANDS,
+            "temperature": self.TEMPERATURE_BANDS,
+        }[component]
+        return bands.score(value)
+
+    def rescore(
+        self,
+        component_scores: Dict[str, int],
+        observation: Dict[str, object],
+        changed
+    ) -> MEWSResult:
+        """Recompute only the components fed by the changed fields (see NEWS2Calculator.rescore)"""
+        component_scores = dict(component_scores)
+        for field in changed:
+            component = self.PARAMETER_COMPONENTS.get(field)
+            if component is None:
+                continue
+            score = self.score_component(component, observation.get(field))
+            if score is None:
+                component_scores.pop(component, None)
+            else:
+                component_scores[component] = score
+        return self.from_components(component_scores)
+
+    @classmethod
+    def from_components(cls, component_scores: Dict[str, int]) -> MEWSResult:
+        """Build a MEWSResult from component scores"""
+        total = sum(component_scores.values())
+
+        if total >= cls.HIGH_RISK_THRESHOLD:
+            risk_level = "high"
+        elif total >= cls.MEDIUM_RISK_THRESHOLD:
+            risk_level = "medium"
+        else:
+            risk_level = "low"
+
+        return MEWSResult(
+            total_score=total,
+            risk_level=risk_level,
+            component_scores=component_scores,
+            requires_escalation=risk_level != "low"
+        )
+
+    def calculate_batch(
+        self,
+        systolic_bp: np.ndarray,
+        heart_rate: np.ndarray,
+        respiratory_rate: np.ndarray,
+        temperature: np.ndarray,
+        consciousness_level: np.ndarray
+    ) -> MEWSBatchResult:
+        """
+        Calculate MEWS scores for many observations in one vectorized pass.
+
+        Float arrays use NaN for missing readings; consciousness_level holds
+        news2.AVPU_CODES with AVPU_MISSING for missing values.
+        """
+        n = len(systolic_bp)
+        components = np.zeros((n, len(MEWS_COMPONENTS)), dtype=np.int8, order="F")
+        components[:, 0] = self.SYSTOLIC_BP_BANDS.score_array(np.asarray(systolic_bp, dtype=np.float64))
+        components[:, 1] = self.HEART_RATE_BANDS.score_array(np.asarray(heart_rate, dtype=np.float64))
+        components[:, 2] = self.RESPIRATORY_RATE_BANDS.score_array(np.asarray(respiratory_rate, dtype=np.float64))
+        components[:, 3] = self.TEMPERATURE_BANDS.score_array(np.asarray(temperature, dtype=np.float64))
+
+        # AVPU codes are ordered A, V, P, U, which is exactly the MEWS score
+        avpu = np.asarray(consciousness_level, dtype=np.int8)
+        components[:, 4] = np.where(avpu == AVPU_MISSING, 0, avpu - AVPU_CODES["A"])
+
+        total = np.zeros(n, dtype=np.int16)
+        for column in components.T:
+            total += column
+        risk_levels = np.zeros(n, dtype=np.int8)
+        risk_levels[total >= self.MEDIUM_RISK_THRESHOLD] = 1
+        risk_levels[total >= self.HIGH_RISK_THRESHOLD] = 2
+
+        return MEWSBatchResult(
+            total_scores=total,
+            component_scores=components,
+            risk_levels=risk_levels
+        )
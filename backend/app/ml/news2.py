@@ -12,8 +12,11 @@ Score ranges:
 Reference: Royal College of Physicians (2017)
 """
 
+from bisect import bisect_left
 from typing import Optional, Dict, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+import numpy as np
 
 
 @dataclass
@@ -25,6 +28,168 @@ class NEWS2Result:
     recommendations: list
     requires_escalation: bool
 
+    @property
+    def packed_components(self) -> int:
+        """Component scores in the packed integer encoding (see pack_components)"""
+        return pack_components(self.component_scores)
+
+
+# Column order of the component score matrix returned by calculate_batch
+COMPONENTS = (
+    "respiratory_rate",
+    "spo2",
+    "supplemental_oxygen",
+    "temperature",
+    "systolic_bp",
+    "heart_rate",
+    "consciousness",
+)
+
+# Integer codes used by the batch API
+AVPU_CODES = {"A": 0, "V": 1, "P": 2, "U": 3}
+AVPU_MISSING = -1
+RISK_LEVELS = ("low", "medium", "high")
+
+# Packed component encoding (stored in VitalsObservation.news2_components):
+# bits 0-13 hold a 2-bit score per component in COMPONENTS order, bits 14-20
+# flag which components were actually scored, so a missing reading can be
+# told apart from a reading that scored 0.
+COMPONENT_SCORE_BITS = 2
+COMPONENT_SCORE_MASK = (1 << COMPONENT_SCORE_BITS) - 1
+COMPONENT_PRESENT_SHIFT = COMPONENT_SCORE_BITS * len(COMPONENTS)
+
+
+def pack_components(component_scores: Dict[str, int], components: Tuple[str, ...] = COMPONENTS) -> int:
+    """
+    Pack a component_scores dict into one integer.
+    
+    Other scores with 0-3 point components (e.g. MEWS) reuse the layout by
+    passing their own component order.
+    """
+    present_shift = COMPONENT_SCORE_BITS * len(components)
+    packed = 0
+    for index, name in enumerate(components):
+        if name in component_scores:
+            packed |= component_scores[name] << (COMPONENT_SCORE_BITS * index)
+            packed |= 1 << (present_shift + index)
+    return packed
+
+
+def unpack_components(packed: int, components: Tuple[str, ...] = COMPONENTS) -> Dict[str, int]:
+    """Decode a packed integer back into a component_scores dict"""
+    present_shift = COMPONENT_SCORE_BITS * len(components)
+    return {
+        name: (packed >> (COMPONENT_SCORE_BITS * index)) & COMPONENT_SCORE_MASK
+        for index, name in enumerate(components)
+        if packed & (1 << (present_shift + index))
+    }
+
+
+def unpack_component_matrix(packed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized decode of packed components.
+    
+    Returns:
+        (scores, present): (n, 7) int8 score matrix and (n, 7) bool mask,
+        columns ordered as COMPONENTS
+    """
+    packed = np.asarray(packed, dtype=np.int32)[:, None]
+    index = np.arange(len(COMPONENTS), dtype=np.int32)
+    scores = ((packed >> (COMPONENT_SCORE_BITS * index)) & COMPONENT_SCORE_MASK).astype(np.int8)
+    present = ((packed >> (COMPONENT_PRESENT_SHIFT + index)) & 1).astype(bool)
+    return scores, present
+
+
+@dataclass
+class NEWS2BatchResult:
+    """Vectorized NEWS2 calculation result (one entry per observation)"""
+    total_scores: np.ndarray      # (n,) int16
+    component_scores: np.ndarray  # (n, 7) int8, columns ordered as COMPONENTS
+    risk_levels: np.ndarray       # (n,) int8, index into RISK_LEVELS
+    packed_components: np.ndarray  # (n,) int32, see pack_components
+
+    def __len__(self) -> int:
+        return len(self.total_scores)
+
+    def risk_level_names(self) -> np.ndarray:
+        """Risk level codes mapped back to their string labels"""
+        return np.asarray(RISK_LEVELS, dtype=object)[self.risk_levels]
+
+
+@dataclass(frozen=True)
+class ScoreBands:
+    """
+    Range-based scoring table compiled into sorted breakpoints.
+    
+    Band i covers values in (upper_bounds[i-1], upper_bounds[i]]; the last
+    band is open-ended. Because only upper bounds are kept, fractional
+    readings between two integer table rows (HR 90.5, temperature 35.05)
+    fall into the next band instead of a gap, and lookup is O(log k).
+    """
+    upper_bounds: Tuple[float, ...]
+    scores: Tuple[int, ...]
+    _score_lookup: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if len(self.scores) != len(self.upper_bounds) + 1:
+            raise ValueError("ScoreBands needs exactly one more score than upper bounds")
+        if list(self.upper_bounds) != sorted(set(self.upper_bounds)):
+            raise ValueError("ScoreBands upper bounds must be strictly increasing")
+        object.__setattr__(self, "_score_lookup", np.asarray(self.scores, dtype=np.int8))
+
+    @classmethod
+    def compile(cls, score_table: Dict[Tuple[float, float], int]) -> "ScoreBands":
+        """Compile a {(min, max): score} table into breakpoints"""
+        ranges = sorted(score_table.items())
+        for ((_, prev_max), _), ((next_min, _), _) in zip(ranges, ranges[1:]):
+            if next_min <= prev_max:
+                raise ValueError(f"Overlapping score ranges at {next_min}")
+        return cls(
+            upper_bounds=tuple(max_val for (_, max_val), _ in ranges[:-1]),
+            scores=tuple(score for _, score in ranges),
+        )
+
+    def score(self, value: float) -> int:
+        """Score a single reading (bisect on the upper bounds); NaN (missing) scores 0"""
+        if value != value:
+            return 0
+        return self.scores[bisect_left(self.upper_bounds, value)]
+
+    def score_array(self, values: np.ndarray) -> np.ndarray:
+        """
+        Score an array of readings; NaN (missing) scores 0.
+        
+        Same result as indexing scores by np.searchsorted(upper_bounds, values),
+        but with a handful of breakpoints it is several times faster to start
+        every row at the lowest band and add the score step of each bound it
+        exceeds, using reused buffers.
+        """
+        scores = np.full(values.shape, self.scores[0], dtype=np.int8)
+        above = np.empty(values.shape, dtype=bool)
+        step = np.empty(values.shape, dtype=np.int8)
+        for bound, delta in zip(self.upper_bounds, np.diff(self._score_lookup)):
+            if delta:
+                np.greater(values, bound, out=above)
+                np.multiply(above.view(np.int8), delta, out=step)
+                scores += step
+        # NaN compares False against every bound, so it sits in the lowest band
+        np.equal(values, values, out=above)
+        scores *= above.view(np.int8)
+        return scores
+
+
+def is_recorded(value) -> bool:
+    """Whether a reading was taken (None, "" and NaN mean missing, as in the batch API)"""
+    return value is not None and value == value and value != ""
+
+
+def encode_avpu(levels) -> np.ndarray:
+    """Encode an iterable of AVPU strings (or None) as batch API codes"""
+    return np.fromiter(
+        (AVPU_CODES.get(level.upper(), AVPU_MISSING) if level else AVPU_MISSING for level in levels),
+        dtype=np.int8,
+    )
+
 
 class NEWS2Calculator:
     """
@@ -99,13 +264,34 @@ class NEWS2Calculator:
         "U": 3,  # Unresponsive
     }
     
-    @staticmethod
-    def _score_from_range(value: float, score_table: Dict[Tuple[float, float], int]) -> int:
-        """Get score from a range-based scoring table"""
-        for (min_val, max_val), score in score_table.items():
-            if min_val <= value <= max_val:
-                return score
-        return 0
+    # Tables compiled once at import time; shared by calculate() and calculate_batch()
+    RESPIRATORY_RATE_BANDS = ScoreBands.compile(RESPIRATORY_RATE_SCORES)
+    SPO2_BANDS_SCALE_1 = ScoreBands.compile(SPO2_SCORES_SCALE_1)
+    SPO2_BANDS_SCALE_2 = ScoreBands.compile(SPO2_SCORES_SCALE_2)
+    TEMPERATURE_BANDS = ScoreBands.compile(TEMPERATURE_SCORES)
+    SYSTOLIC_BP_BANDS = ScoreBands.compile(SYSTOLIC_BP_SCORES)
+    HEART_RATE_BANDS = ScoreBands.compile(HEART_RATE_SCORES)
+    
+    # Observation field -> component it feeds (Scale 2 changes the SpO₂ score)
+    PARAMETER_COMPONENTS = {
+        "respiratory_rate": "respiratory_rate",
+        "spo2": "spo2",
+        "use_scale_2": "spo2",
+        "supplemental_oxygen": "supplemental_oxygen",
+        "temperature": "temperature",
+        "systolic_bp": "systolic_bp",
+        "heart_rate": "heart_rate",
+        "consciousness_level": "consciousness",
+    }
+    
+    def __init__(self, medium_risk_threshold: int = 5, high_risk_threshold: int = 7):
+        """
+        Args:
+            medium_risk_threshold: Lowest total scored as medium risk (RCP default 5)
+            high_risk_threshold: Lowest total scored as high risk (RCP default 7)
+        """
+        self.medium_risk_threshold = medium_risk_threshold
+        self.high_risk_threshold = high_risk_threshold
     
     def calculate(
         self,
@@ -135,63 +321,119 @@ class NEWS2Calculator:
             NEWS2Result with total score, risk level, and recommendations
         """
         component_scores = {}
-        total = 0
         
         # 1. Respiratory Rate
-        if respiratory_rate is not None:
-            rr_score = self._score_from_range(respiratory_rate, self.RESPIRATORY_RATE_SCORES)
+        if is_recorded(respiratory_rate):
+            rr_score = self.RESPIRATORY_RATE_BANDS.score(respiratory_rate)
             component_scores["respiratory_rate"] = rr_score
-            total += rr_score
         
         # 2. Oxygen Saturation
-        if spo2 is not None:
-            spo2_table = self.SPO2_SCORES_SCALE_2 if use_scale_2 else self.SPO2_SCORES_SCALE_1
-            spo2_score = self._score_from_range(spo2, spo2_table)
+        if is_recorded(spo2):
+            spo2_bands = self.SPO2_BANDS_SCALE_2 if use_scale_2 else self.SPO2_BANDS_SCALE_1
+            spo2_score = spo2_bands.score(spo2)
             component_scores["spo2"] = spo2_score
-            total += spo2_score
         
         # 3. Supplemental Oxygen (2 points if on oxygen)
         oxygen_score = 2 if supplemental_oxygen else 0
         component_scores["supplemental_oxygen"] = oxygen_score
-        total += oxygen_score
         
         # 4. Temperature
-        if temperature is not None:
-            temp_score = self._score_from_range(temperature, self.TEMPERATURE_SCORES)
+        if is_recorded(temperature):
+            temp_score = self.TEMPERATURE_BANDS.score(temperature)
             component_scores["temperature"] = temp_score
-            total += temp_score
         
         # 5. Systolic Blood Pressure
-        if systolic_bp is not None:
-            sbp_score = self._score_from_range(systolic_bp, self.SYSTOLIC_BP_SCORES)
+        if is_recorded(systolic_bp):
+            sbp_score = self.SYSTOLIC_BP_BANDS.score(systolic_bp)
             component_scores["systolic_bp"] = sbp_score
-            total += sbp_score
         
         # 6. Heart Rate
-        if heart_rate is not None:
-            hr_score = self._score_from_range(heart_rate, self.HEART_RATE_SCORES)
+        if is_recorded(heart_rate):
+            hr_score = self.HEART_RATE_BANDS.score(heart_rate)
             component_scores["heart_rate"] = hr_score
-            total += hr_score
         
         # 7. Level of Consciousness
         if consciousness_level:
             consciousness_score = self.CONSCIOUSNESS_SCORES.get(consciousness_level.upper(), 0)
             component_scores["consciousness"] = consciousness_score
-            total += consciousness_score
+        
+        return self.from_components(component_scores)
+    
+    def score_component(
+        self,
+        component: str,
+        value,
+        use_scale_2: bool = False
+    ) -> Optional[int]:
+        """Score a single component from its reading; None if not recorded"""
+        if component == "supplemental_oxygen":
+            return 2 if value else 0
+        if not is_recorded(value):
+            return None
+        if component == "consciousness":
+            return self.CONSCIOUSNESS_SCORES.get(value.upper(), 0)
+        if component == "spo2":
+            return (self.SPO2_BANDS_SCALE_2 if use_scale_2 else self.SPO2_BANDS_SCALE_1).score(value)
+        bands = {
+            "respiratory_rate": self.RESPIRATORY_RATE_BANDS,
+            "temperature": self.TEMPERATURE_BANDS,
+            "systolic_bp": self.SYSTOLIC_BP_BANDS,
+            "heart_rate": self.HEART_RATE_BANDS,
+        }[component]
+        return bands.score(value)
+    
+    def rescore(
+        self,
+        component_scores: Dict[str, int],
+        observation: Dict[str, object],
+        changed
+    ) -> NEWS2Result:
+        """
+        Recompute only the components fed by the changed fields.
+        
+        Args:
+            component_scores: Previous breakdown (e.g. decoded news2_components)
+            observation: Current (amended) readings keyed by field name
+            changed: Names of the fields that were amended
+        
+        Returns:
+            NEWS2Result for the amended observation
+        """
+        component_scores = dict(component_scores)
+        readings = {
+            component: field
+            for field, component in self.PARAMETER_COMPONENTS.items()
+            if field != "use_scale_2"
+        }
+        for component in {self.PARAMETER_COMPONENTS[f] for f in changed if f in self.PARAMETER_COMPONENTS}:
+            score = self.score_component(
+                component,
+                observation.get(readings[component]),
+                use_scale_2=bool(observation.get("use_scale_2"))
+            )
+            if score is None:
+                component_scores.pop(component, None)
+            else:
+                component_scores[component] = score
+        return self.from_components(component_scores)
+    
+    def from_components(self, component_scores: Dict[str, int]) -> NEWS2Result:
+        """Build a NEWS2Result (total, risk level, recommendations) from component scores"""
+        total = sum(component_scores.values())
         
         # Determine risk level and recommendations
         if total == 0:
             risk_level = "low"
             recommendations = ["Continue routine monitoring"]
             requires_escalation = False
-        elif 1 <= total <= 4:
+        elif total < self.medium_risk_threshold:
             risk_level = "low"
             recommendations = [
                 "Continue routine monitoring",
                 "Assess frequency of monitoring"
             ]
             requires_escalation = False
-        elif 5 <= total <= 6:
+        elif total < self.high_risk_threshold:
             risk_level = "medium"
             recommendations = [
                 "Increase monitoring frequency",
@@ -199,7 +441,7 @@ class NEWS2Calculator:
                 "Urgent review by ward-based doctor"
             ]
             requires_escalation = True
-        else:  # 7+
+        else:
             risk_level = "high"
             recommendations = [
                 "Continuous monitoring",
@@ -217,6 +459,116 @@ class NEWS2Calculator:
             requires_escalation=requires_escalation
         )
     
+    def calculate_batch(
+        self,
+        respiratory_rate=None,
+        spo2=None,
+        supplemental_oxygen=None,
+        temperature=None,
+        systolic_bp=None,
+        heart_rate=None,
+        consciousness_level=None,
+        use_scale_2=None
+    ) -> NEWS2BatchResult:
+        """
+        Calculate NEWS2 scores for many observations in one vectorized pass.
+        
+        All arguments are equal-length columnar arrays. Missing readings are
+        encoded as NaN (or AVPU_MISSING for consciousness) and, as in
+        calculate(), contribute nothing to the total.
+        
+        Args:
+            respiratory_rate: Breaths per minute
+            spo2: Oxygen saturation (%)
+            supplemental_oxygen: Boolean mask, patient on supplemental O2
+            temperature: Body temperature (°C)
+            systolic_bp: Systolic blood pressure (mmHg)
+            heart_rate: Heart rate (bpm)
+            consciousness_level: AVPU codes (see AVPU_CODES / encode_avpu)
+            use_scale_2: Boolean mask, use Scale 2 for SpO₂ (COPD patients)
+        
+        Returns:
+            NEWS2BatchResult with total scores, component matrix and risk codes
+        """
+        columns = [respiratory_rate, spo2, supplemental_oxygen, temperature,
+                   systolic_bp, heart_rate, consciousness_level, use_scale_2]
+        lengths = {len(c) for c in columns if c is not None}
+        if len(lengths) > 1:
+            raise ValueError("All input arrays must have the same length")
+        n = lengths.pop() if lengths else 0
+
+        def as_float(values):
+            if values is None:
+                return np.full(n, np.nan)
+            return np.asarray(values, dtype=np.float64)
+
+        def as_mask(values):
+            if values is None:
+                return np.zeros(n, dtype=bool)
+            return np.asarray(values, dtype=bool)
+
+        # Column-major so each component is written as one contiguous run
+        components = np.zeros((n, len(COMPONENTS)), dtype=np.int8, order="F")
+
+        # Which components were scored, for the packed encoding
+        present = np.empty((n, len(COMPONENTS)), dtype=bool, order="F")
+
+        # 1. Respiratory Rate
+        rr_values = as_float(respiratory_rate)
+        components[:, 0] = self.RESPIRATORY_RATE_BANDS.score_array(rr_values)
+        present[:, 0] = ~np.isnan(rr_values)
+
+        # 2. Oxygen Saturation (Scale 1 or Scale 2 per row)
+        spo2_values = as_float(spo2)
+        scale_2 = as_mask(use_scale_2)
+        spo2_scores = self.SPO2_BANDS_SCALE_1.score_array(spo2_values)
+        if scale_2.any():
+            spo2_scores[scale_2] = self.SPO2_BANDS_SCALE_2.score_array(spo2_values[scale_2])
+        components[:, 1] = spo2_scores
+        present[:, 1] = ~np.isnan(spo2_values)
+
+        # 3. Supplemental Oxygen (2 points if on oxygen, always scored)
+        components[:, 2] = np.where(as_mask(supplemental_oxygen), 2, 0)
+        present[:, 2] = True
+
+        # 4-6. Temperature, Systolic BP, Heart Rate
+        for column, values, bands in (
+            (3, as_float(temperature), self.TEMPERATURE_BANDS),
+            (4, as_float(systolic_bp), self.SYSTOLIC_BP_BANDS),
+            (5, as_float(heart_rate), self.HEART_RATE_BANDS),
+        ):
+            components[:, column] = bands.score_array(values)
+            present[:, column] = ~np.isnan(values)
+
+        # 7. Level of Consciousness (anything other than Alert scores 3)
+        if consciousness_level is not None:
+            avpu = np.asarray(consciousness_level, dtype=np.int8)
+            components[:, 6] = np.where(avpu > AVPU_CODES["A"], 3, 0)
+            present[:, 6] = avpu != AVPU_MISSING
+        else:
+            present[:, 6] = False
+
+        total = np.zeros(n, dtype=np.int16)
+        packed = np.zeros(n, dtype=np.int32)
+        for index in range(len(COMPONENTS)):
+            total += components[:, index]
+            packed |= components[:, index].astype(np.int32) << (COMPONENT_SCORE_BITS * index)
+            packed |= present[:, index].astype(np.int32) << (COMPONENT_PRESENT_SHIFT + index)
+
+        return NEWS2BatchResult(
+            total_scores=total,
+            component_scores=components,
+            risk_levels=self.risk_levels(total),
+            packed_components=packed
+        )
+    
+    def risk_levels(self, total_scores: np.ndarray) -> np.ndarray:
+        """Risk codes (index into RISK_LEVELS) of total scores under this calculator's thresholds"""
+        risk_levels = np.zeros(len(total_scores), dtype=np.int8)
+        risk_levels[total_scores >= self.medium_risk_threshold] = 1
+        risk_levels[total_scores >= self.high_risk_threshold] = 2
+        return risk_levels
+    
     @staticmethod
     def interpret_score(score: int) -> str:
         """Get clinical interpretation of NEWS2 score"""
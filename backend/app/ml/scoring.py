@@ -0,0 +1,597 @@
+"""
+Clinical Scoring Engine
+
+Registry of early-warning scores that are computed together. Each
+observation (or batch of observations) is read once into plain values or
+columnar arrays, and every registered score is derived from that single
+read, so adding a score does not add another traversal of the ingest
+stream.
+
+Registered scores:
+- news2: National Early Warning Score 2
+- mews: Modified Early Warning Score
+- qsofa: Quick Sequential Organ Failure Assessment (sepsis screen)
+- shock_index: Heart rate / systolic BP (haemodynamic instability)
+
+New scores subclass ClinicalScore and are added with @register_score.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.ml.news2 import NEWS2Calculator, AVPU_CODES, AVPU_MISSING, RISK_LEVELS, encode_avpu, is_recorded, unpack_components
+from app.ml.mews import MEWS_COMPONENTS, MEWSCalculator
+
+
+# Numeric observation fields read into float columns (NaN = missing)
+NUMERIC_FIELDS = (
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "spo2",
+    "respiratory_rate",
+    "temperature",
+)
+
+RISK_NOT_SCORED = -1
+
+
+@dataclass(frozen=True)
+class ScoringProfile:
+    """
+    Per-patient scoring parameters.
+
+    Resolved from patient metadata and ward configuration by
+    app.services.scoring_profiles; the defaults are the RCP NEWS2 values.
+    """
+    use_scale_2: bool = False
+    news2_medium_risk_threshold: int = 5
+    news2_high_risk_threshold: int = 7
+
+
+def _field(observation: Any, name: str) -> Any:
+    """Read a field from a dict-like observation or an ORM/pydantic object"""
+    if isinstance(observation, Mapping):
+        return observation.get(name)
+    return getattr(observation, name, None)
+
+
+@dataclass
+class VitalsColumns:
+    """Columnar view of a batch of observations, shared by every batch scorer"""
+    heart_rate: np.ndarray
+    systolic_bp: np.ndarray
+    diastolic_bp: np.ndarray
+    spo2: np.ndarray
+    respiratory_rate: np.ndarray
+    temperature: np.ndarray
+    consciousness_level: np.ndarray  # int8 AVPU codes
+    supplemental_oxygen: np.ndarray  # bool
+    use_scale_2: np.ndarray          # bool, observation flag or patient profile
+    # (n, 2) int16 NEWS2 (medium, high) thresholds per row; None = calculator defaults
+    news2_thresholds: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.heart_rate)
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Any],
+        profiles: Optional[Sequence[Optional[ScoringProfile]]] = None
+    ) -> "VitalsColumns":
+        """
+        Build columns from dicts or ORM rows in a single traversal.
+
+        Args:
+            records: Observations
+            profiles: Scoring profile of each record's patient (None where
+                the patient has none), as ScoringEngine.score takes per call
+        """
+        records = list(records)
+        n = len(records)
+        numeric = {name: np.full(n, np.nan) for name in NUMERIC_FIELDS}
+        supplemental_oxygen = np.zeros(n, dtype=bool)
+        use_scale_2 = np.zeros(n, dtype=bool)
+        avpu = []
+
+        for row, record in enumerate(records):
+            for name, column in numeric.items():
+                value = _field(record, name)
+                if value is not None:
+                    column[row] = value
+            supplemental_oxygen[row] = bool(_field(record, "supplemental_oxygen"))
+            use_scale_2[row] = bool(_field(record, "use_scale_2"))
+            avpu.append(_field(record, "consciousness_level"))
+
+        news2_thresholds = None
+        if profiles is not None:
+            if len(profiles) != n:
+                raise ValueError("profiles must have one entry per record")
+            default = ScoringProfile()
+            news2_thresholds = np.empty((n, 2), dtype=np.int16)
+            for row, profile in enumerate(profiles):
+                profile = profile or default
+                use_scale_2[row] |= profile.use_scale_2
+                news2_thresholds[row] = (profile.news2_medium_risk_threshold, profile.news2_high_risk_threshold)
+
+        return cls(
+            consciousness_level=encode_avpu(avpu),
+            supplemental_oxygen=supplemental_oxygen,
+            use_scale_2=use_scale_2,
+            news2_thresholds=news2_thresholds,
+            **numeric
+        )
+
+    def present(self, name: str) -> np.ndarray:
+        """Boolean mask of rows where a field was recorded"""
+        if name == "consciousness_level":
+            return self.consciousness_level != AVPU_MISSING
+        if name in ("supplemental_oxygen", "use_scale_2"):
+            return np.ones(len(self), dtype=bool)
+        return ~np.isnan(getattr(self, name))
+
+
+@dataclass
+class ScoreOutcome:
+    """Result of one registered score for one observation"""
+    name: str
+    value: float
+    risk_level: str  # low, medium, high
+    component_scores: Dict[str, int]
+    detail: Any = None  # Native calculator result (NEWS2Result, MEWSResult)
+
+    @property
+    def risk_code(self) -> int:
+        return RISK_LEVELS.index(self.risk_level)
+
+
+@dataclass
+class BatchScoreOutcome:
+    """Result of one registered score for a batch of observations"""
+    name: str
+    values: np.ndarray       # float64, NaN where the row could not be scored
+    risk_levels: np.ndarray  # int8 index into RISK_LEVELS, RISK_NOT_SCORED if not scored
+    detail: Any = None       # Native batch result (NEWS2BatchResult, MEWSBatchResult)
+
+
+class ClinicalScore:
+    """
+    Base class for a registered clinical score.
+
+    Attributes:
+        name: Registry key (also used in API payloads)
+        label: Human readable name for alerts
+        parameters: Observation fields the score reads
+        required: Fields that must be recorded for the score to be computed
+        alert_type: AlertType value raised when the score triggers
+        alert_min_risk: Lowest RISK_LEVELS index that raises an alert
+    """
+
+    name: str = ""
+    label: str = ""
+    parameters: Tuple[str, ...] = ()
+    required: Tuple[str, ...] = ()
+    alert_type: Optional[str] = None
+    alert_min_risk: int = 2
+
+    def is_scorable(self, observation: Any) -> bool:
+        # None, "" and NaN are missing, as in scorable_mask()
+        return all(is_recorded(_field(observation, name)) for name in self.required)
+
+    def scorable_mask(self, columns: VitalsColumns) -> np.ndarray:
+        mask = np.ones(len(columns), dtype=bool)
+        for name in self.required:
+            mask &= columns.present(name)
+        return mask
+
+    def score(self, observation: Any, profile: Optional[ScoringProfile] = None) -> ScoreOutcome:
+        raise NotImplementedError
+
+    def score_batch(self, columns: VitalsColumns) -> BatchScoreOutcome:
+        raise NotImplementedError
+
+    def rescore(
+        self,
+        observation: Any,
+        previous: Optional[Dict[str, int]],
+        changed: Iterable[str],
+        profile: Optional[ScoringProfile] = None
+    ) -> ScoreOutcome:
+        """
+        Score an amended observation given its previous component breakdown.
+
+        Scores that keep a stored breakdown override this to recompute only
+        the changed components; the default simply rescores from scratch.
+        """
+        return self.score(observation, profile)
+
+    def outcome_at(
+        self,
+        batch: BatchScoreOutcome,
+        columns: VitalsColumns,
+        row: int,
+        profile: Optional[ScoringProfile] = None
+    ) -> ScoreOutcome:
+        """
+        The ScoreOutcome score() gives for one scorable row of a batch.
+
+        Scores with component breakdowns override this to rebuild them from
+        the batch result instead of rescoring the row.
+        """
+        return ScoreOutcome(
+            name=self.name,
+            value=float(batch.values[row]),
+            risk_level=RISK_LEVELS[batch.risk_levels[row]],
+            component_scores={}
+        )
+
+    def triggers_alert(self, outcome: ScoreOutcome) -> bool:
+        return self.alert_type is not None and outcome.risk_code >= self.alert_min_risk
+
+    def _batch_outcome(self, columns, values, risk_levels, detail=None) -> BatchScoreOutcome:
+        """Mask out rows missing a required field"""
+        scorable = self.scorable_mask(columns)
+        values = np.where(scorable, values, np.nan)
+        risk_levels = np.where(scorable, risk_levels, RISK_NOT_SCORED).astype(np.int8)
+        return BatchScoreOutcome(name=self.name, values=values, risk_levels=risk_levels, detail=detail)
+
+
+class ScoringEngine:
+    """Registry of clinical scores evaluated together on each observation or batch"""
+
+    def __init__(self):
+        self._scores: Dict[str, ClinicalScore] = {}
+
+    def register(self, score: ClinicalScore) -> ClinicalScore:
+        if not score.name:
+            raise ValueError("Clinical scores must define a name")
+        self._scores[score.name] = score
+        return score
+
+    def unregister(self, name: str) -> None:
+        self._scores.pop(name, None)
+
+    def get(self, name: str) -> ClinicalScore:
+        return self._scores[name]
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._scores)
+
+    def scores_for_parameter(self, parameter: str) -> List[ClinicalScore]:
+        """Registered scores that read a given observation field"""
+        return [score for score in self._scores.values() if parameter in score.parameters]
+
+    def score(
+        self,
+        observation: Any,
+        names: Optional[Iterable[str]] = None,
+        profile: Optional[ScoringProfile] = None
+    ) -> Dict[str, ScoreOutcome]:
+        """
+        Evaluate registered scores on one observation.
+
+        Scores whose required fields are missing are left out of the result.
+        A profile, when given, supplies the patient's SpO2 scale and
+        threshold overrides.
+        """
+        selected = self._scores if names is None else {name: self._scores[name] for name in names}
+        return {
+            name: score.score(observation, profile)
+            for name, score in selected.items()
+            if score.is_scorable(observation)
+        }
+
+    def rescore(
+        self,
+        observation: Any,
+        changed: Iterable[str],
+        previous: Optional[Dict[str, Dict[str, int]]] = None,
+        profile: Optional[ScoringProfile] = None
+    ) -> Dict[str, Optional[ScoreOutcome]]:
+        """
+        Re-evaluate only the scores that read one of the changed fields.
+
+        Args:
+            observation: The observation with amended values applied
+            changed: Names of the amended fields
+            previous: Stored component breakdown per score name, if any
+            profile: Patient scoring profile, if any
+
+        Returns:
+            Outcome per affected score; None when the amendment left the
+            score without its required fields
+        """
+        changed = set(changed)
+        previous = previous or {}
+        outcomes = {}
+        for name, score in self._scores.items():
+            if changed.isdisjoint(score.parameters):
+                continue
+            if not score.is_scorable(observation):
+                outcomes[name] = None
+            else:
+                outcomes[name] = score.rescore(observation, previous.get(name), changed, profile)
+        return outcomes
+
+    def score_batch(
+        self,
+        observations,
+        profiles: Optional[Sequence[Optional[ScoringProfile]]] = None
+    ) -> Dict[str, BatchScoreOutcome]:
+        """
+        Evaluate every registered score on a batch (VitalsColumns or records).
+
+        profiles (one per record) supply each patient's SpO2 scale and
+        threshold overrides, as in score(); VitalsColumns carry them already.
+        """
+        if isinstance(observations, VitalsColumns):
+            columns = observations
+        else:
+            columns = VitalsColumns.from_records(observations, profiles)
+        return {name: score.score_batch(columns) for name, score in self._scores.items()}
+
+    def outcomes_at(
+        self,
+        batch: Dict[str, BatchScoreOutcome],
+        columns: VitalsColumns,
+        row: int,
+        profile: Optional[ScoringProfile] = None
+    ) -> Dict[str, ScoreOutcome]:
+        """
+        One row of a score_batch() result as score() returns it.
+
+        Args:
+            batch: Result of score_batch(columns)
+            columns: The scored columns
+            row: Row index
+            profile: The row's patient profile (the one the columns were built with)
+        """
+        return {
+            name: self._scores[name].outcome_at(outcome, columns, row, profile)
+            for name, outcome in batch.items()
+            if outcome.risk_levels[row] != RISK_NOT_SCORED
+        }
+
+
+scoring_engine = ScoringEngine()
+
+
+def register_score(cls):
+    """Class decorator registering a ClinicalScore with the default engine"""
+    scoring_engine.register(cls())
+    return cls
+
+
+class _ComponentScore(ClinicalScore):
+    """Score backed by a calculator with per-component rescoring (NEWS2, MEWS)"""
+
+    calculator = None
+
+    def calculator_for(self, profile: Optional[ScoringProfile]):
+        """Calculator configured for a patient's profile"""
+        return self.calculator
+
+    def readings(self, observation, profile: Optional[ScoringProfile]) -> Dict[str, Any]:
+        """Observation fields the calculator reads, with profile defaults applied"""
+        return {name: _field(observation, name) for name in self.parameters}
+
+    def rescore(self, observation, previous, changed, profile=None):
+        if previous is None:
+            return self.score(observation, profile)
+        readings = self.readings(observation, profile)
+        return self._outcome(self.calculator_for(profile).rescore(previous, readings, changed))
+
+    def components_at(self, detail, row: int) -> Dict[str, int]:
+        """Component scores of one row of the native batch result"""
+        raise NotImplementedError
+
+    def outcome_at(self, batch, columns, row, profile=None):
+        # Risk level and recommendations follow from the components alone
+        components = self.components_at(batch.detail, row)
+        return self._outcome(self.calculator_for(profile).from_components(components))
+
+    def _outcome(self, result) -> ScoreOutcome:
+        return ScoreOutcome(
+            name=self.name,
+            value=result.total_score,
+            risk_level=result.risk_level,
+            component_scores=result.component_scores,
+            detail=result
+        )
+
+
+@register_score
+class NEWS2Score(_ComponentScore):
+    name = "news2"
+    label = "NEWS2"
+    parameters = ("respiratory_rate", "spo2", "supplemental_oxygen", "temperature",
+                  "systolic_bp", "heart_rate", "consciousness_level", "use_scale_2")
+    required = ("respiratory_rate", "spo2", "temperature", "systolic_bp", "heart_rate", "consciousness_level")
+    alert_type = "news2_high"
+    alert_min_risk = 1  # NEWS2 5-6 already requires an urgent ward-based review
+
+    calculator = NEWS2Calculator()
+
+    def __init__(self):
+        # One calculator per (medium, high) threshold pair seen in profiles
+        self._calculators = {}
+
+    def calculator_for(self, profile):
+        if profile is None:
+            return self.calculator
+        return self._calculator_for((profile.news2_medium_risk_threshold, profile.news2_high_risk_threshold))
+
+    def _calculator_for(self, thresholds):
+        calculator = self._calculators.get(thresholds)
+        if calculator is None:
+            calculator = self._calculators[thresholds] = NEWS2Calculator(*thresholds)
+        return calculator
+
+    def readings(self, observation, profile):
+        readings = super().readings(observation, profile)
+        readings["use_scale_2"] = bool(readings["use_scale_2"]) or (profile is not None and profile.use_scale_2)
+        return readings
+
+    def score(self, observation, profile=None):
+        readings = self.readings(observation, profile)
+        result = self.calculator_for(profile).calculate(
+            respiratory_rate=readings["respiratory_rate"],
+            spo2=readings["spo2"],
+            supplemental_oxygen=bool(readings["supplemental_oxygen"]),
+            temperature=readings["temperature"],
+            systolic_bp=readings["systolic_bp"],
+            heart_rate=readings["heart_rate"],
+            consciousness_level=readings["consciousness_level"],
+            use_scale_2=readings["use_scale_2"]
+        )
+        return self._outcome(result)
+
+    def score_batch(self, columns):
+        result = self.calculator.calculate_batch(
+            respiratory_rate=columns.respiratory_rate,
+            spo2=columns.spo2,
+            supplemental_oxygen=columns.supplemental_oxygen,
+            temperature=columns.temperature,
+            systolic_bp=columns.systolic_bp,
+            heart_rate=columns.heart_rate,
+            consciousness_level=columns.consciousness_level,
+            use_scale_2=columns.use_scale_2
+        )
+        if columns.news2_thresholds is not None:
+            # Component scores do not depend on thresholds: re-grade each group of rows sharing a pair
+            pairs, groups = np.unique(columns.news2_thresholds, axis=0, return_inverse=True)
+            default = (self.calculator.medium_risk_threshold, self.calculator.high_risk_threshold)
+            for group, (medium, high) in enumerate(pairs):
+                thresholds = (int(medium), int(high))
+                if thresholds != default:
+                    rows = groups.reshape(-1) == group
+                    result.risk_levels[rows] = self._calculator_for(thresholds).risk_levels(result.total_scores[rows])
+        return self._batch_outcome(columns, result.total_scores, result.risk_levels, result)
+
+    def components_at(self, detail, row):
+        return unpack_components(int(detail.packed_components[row]))
+
+
+@register_score
+class MEWSScore(_ComponentScore):
+    name = "mews"
+    label = "MEWS"
+    parameters = ("systolic_bp", "heart_rate", "respiratory_rate", "temperature", "consciousness_level")
+    required = parameters
+    alert_type = "mews_high"
+
+    calculator = MEWSCalculator()
+
+    def score(self, observation, profile=None):
+        result = self.calculator.calculate(
+            systolic_bp=_field(observation, "systolic_bp"),
+            heart_rate=_field(observation, "heart_rate"),
+            respiratory_rate=_field(observation, "respiratory_rate"),
+            temperature=_field(observation, "temperature"),
+            consciousness_level=_field(observation, "consciousness_level")
+        )
+        return self._outcome(result)
+
+    def score_batch(self, columns):
+        result = self.calculator.calculate_batch(
+            systolic_bp=columns.systolic_bp,
+            heart_rate=columns.heart_rate,
+            respiratory_rate=columns.respiratory_rate,
+            temperature=columns.temperature,
+            consciousness_level=columns.consciousness_level
+        )
+        return self._batch_outcome(columns, result.total_scores, result.risk_levels, result)
+
+    def components_at(self, detail, row):
+        # Every MEWS component is required, so a scorable row has them all
+        return dict(zip(MEWS_COMPONENTS, detail.component_scores[row].tolist()))
+
+
+@register_score
+class QSOFAScore(ClinicalScore):
+    """
+    qSOFA: one point each for RR ≥22, SBP ≤100 and altered mentation
+    (anything below Alert on AVPU). A score of 2 or more flags sepsis risk.
+    An unrecorded AVPU is treated as Alert.
+    """
+
+    name = "qsofa"
+    label = "qSOFA"
+    parameters = ("respiratory_rate", "systolic_bp", "consciousness_level")
+    required = ("respiratory_rate", "systolic_bp")
+    alert_type = "sepsis_risk"
+
+    RESPIRATORY_RATE_THRESHOLD = 22
+    SYSTOLIC_BP_THRESHOLD = 100
+    HIGH_RISK_THRESHOLD = 2
+
+    def score(self, observation, profile=None):
+        consciousness_level = _field(observation, "consciousness_level")
+        component_scores = {
+            "respiratory_rate": int(_field(observation, "respiratory_rate") >= self.RESPIRATORY_RATE_THRESHOLD),
+            "systolic_bp": int(_field(observation, "systolic_bp") <= self.SYSTOLIC_BP_THRESHOLD),
+            "consciousness": int(bool(consciousness_level) and consciousness_level.upper() != "A"),
+        }
+        total = sum(component_scores.values())
+        return ScoreOutcome(
+            name=self.name,
+            value=total,
+            risk_level="high" if total >= self.HIGH_RISK_THRESHOLD else "low",
+            component_scores=component_scores
+        )
+
+    def score_batch(self, columns):
+        total = (
+            (columns.respiratory_rate >= self.RESPIRATORY_RATE_THRESHOLD).astype(np.int8)
+            + (columns.systolic_bp <= self.SYSTOLIC_BP_THRESHOLD)
+            + (columns.consciousness_level > AVPU_CODES["A"])
+        )
+        risk_levels = np.where(total >= self.HIGH_RISK_THRESHOLD, 2, 0)
+        return self._batch_outcome(columns, total, risk_levels)
+
+    def outcome_at(self, batch, columns, row, profile=None):
+        outcome = super().outcome_at(batch, columns, row, profile)
+        outcome.value = int(outcome.value)
+        outcome.component_scores = {
+            "respiratory_rate": int(columns.respiratory_rate[row] >= self.RESPIRATORY_RATE_THRESHOLD),
+            "systolic_bp": int(columns.systolic_bp[row] <= self.SYSTOLIC_BP_THRESHOLD),
+            "consciousness": int(columns.consciousness_level[row] > AVPU_CODES["A"]),
+        }
+        return outcome
+
+
+@register_score
+class ShockIndexScore(ClinicalScore):
+    """Shock index (HR / SBP); ≥0.9 is abnormal and ≥1.0 flags shock risk"""
+
+    name = "shock_index"
+    label = "Shock index"
+    parameters = ("heart_rate", "systolic_bp")
+    required = parameters
+    alert_type = "shock_risk"
+
+    MEDIUM_RISK_THRESHOLD = 0.9
+    HIGH_RISK_THRESHOLD = 1.0
+
+    def score(self, observation, profile=None):
+        systolic_bp = _field(observation, "systolic_bp")
+        value = _field(observation, "heart_rate") / systolic_bp if systolic_bp else float("inf")
+        if value >= self.HIGH_RISK_THRESHOLD:
+            risk_level = "high"
+        elif value >= self.MEDIUM_RISK_THRESHOLD:
+            risk_level = "medium"
+        else:
+            risk_level = "low"
+        return ScoreOutcome(name=self.name, value=value, risk_level=risk_level, component_scores={})
+
+    def score_batch(self, columns):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = columns.heart_rate / columns.systolic_bp
+        risk_levels = np.zeros(len(columns), dtype=np.int8)
+        risk_levels[values >= self.MEDIUM_RISK_THRESHOLD] = 1
+        risk_levels[values >= self.HIGH_RISK_THRESHOLD] = 2
+        return self._batch_outcome(columns, values, risk_levels)
@@ -4,12 +4,14 @@ Models package - Export all database models.
 
 from app.models.patient import Patient, GenderEnum
 from app.models.vitals import VitalsObservation
+from app.models.vitals_rollup import VitalsRollup
 from app.models.alert import Alert, AlertSeverity, AlertType, AlertStatus
 
 __all__ = [
     "Patient",
     "GenderEnum",
     "VitalsObservation",
+    "VitalsRollup",
     "Alert",
     "AlertSeverity",
     "AlertType",
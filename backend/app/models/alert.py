@@ -5,7 +5,7 @@ Tracks alerts generated by the system for patient deterioration or risk.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Integer, SmallInteger, Computed, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import uuid
@@ -51,6 +51,7 @@ class Alert(Base):
         vitals_id: Reference to vitals observation that triggered alert
         alert_type: Type of alert
         severity: Alert severity level
+        severity_rank: Severity as a number for ordering (generated)
         status: Current status of alert
         
         title: Short alert title
@@ -79,12 +80,24 @@ class Alert(Base):
     # Primary key and foreign keys
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False, index=True)
-    vitals_id = Column(UUID(as_uuid=True), ForeignKey("vitals_observations.id"), nullable=True)
+    # No foreign key: vitals_observations is partitioned by observed_at (its
+    # primary key is (id, observed_at)) and expired partitions are dropped
+    vitals_id = Column(UUID(as_uuid=True), nullable=True, index=True)
     
     # Alert classification
     alert_type = Column(String(50), nullable=False, index=True)
     severity = Column(String(20), nullable=False, index=True)
-    status = Column(String(20), default="active", nullable=False, index=True)
+    status = Column(String(20), default="active", nullable=False)
+    # Sortable severity (low=1 .. critical=4), generated by Postgres
+    severity_rank = Column(
+        SmallInteger,
+        Computed(
+            "CASE severity WHEN 'low' THEN 1 WHEN 'medium' THEN 2 "
+            "WHEN 'high' THEN 3 WHEN 'critical' THEN 4 ELSE 0 END",
+            persisted=True
+        ),
+        comment="Severity order: low=1, medium=2, high=3, critical=4"
+    )
     
     # Alert content
     title = Column(String(200), nullable=False)
@@ -109,7 +122,8 @@ class Alert(Base):
     escalated_at = Column(DateTime)
     
     # Metadata
-    metadata = Column(JSONB, default=dict, comment="Additional alert data")
+    # ("metadata" is reserved on declarative models, so the attribute is renamed)
+    extra_metadata = Column("metadata", JSONB, default=dict, comment="Additional alert data")
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -117,6 +131,11 @@ class Alert(Base):
     # Relationships
     patient = relationship("Patient", back_populates="alerts")
     
+    __table_args__ = (
+        # Active-alert boards: one status, most severe then newest first
+        Index("ix_alerts_status_severity_triggered", status, severity_rank, triggered_at),
+    )
+    
     def __repr__(self):
         return f"<Alert(type={self.alert_type}, severity={self.severity}, status={self.status})>"
     
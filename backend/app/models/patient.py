@@ -45,7 +45,7 @@ class Patient(Base):
         bed_number: Current bed number
         attending_doctor_id: ID of attending physician
         is_active: Patient active status
-        metadata: Additional flexible data (JSONB)
+        extra_metadata: Additional flexible data (JSONB, column "metadata")
         created_at: Record creation timestamp
         updated_at: Record update timestamp
     """
@@ -83,7 +83,8 @@ class Patient(Base):
     is_active = Column(String(20), default="active", comment="Patient status: active, discharged, transferred")
     
     # Flexible metadata for hospital-specific fields
-    metadata = Column(JSONB, default=dict, comment="Additional hospital-specific data")
+    # ("metadata" is reserved on declarative models, so the attribute is renamed)
+    extra_metadata = Column("metadata", JSONB, default=dict, comment="Additional hospital-specific data")
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -5,12 +5,21 @@ Supports both manual entry and device integration.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text, Boolean
+from typing import Dict, Optional
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text, Boolean, Integer, Index, case
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import uuid
 
 from app.core.database import Base
+from app.ml.news2 import (
+    COMPONENTS,
+    COMPONENT_PRESENT_SHIFT,
+    COMPONENT_SCORE_BITS,
+    COMPONENT_SCORE_MASK,
+    unpack_components,
+)
+from app.ml.mews import MEWS_COMPONENTS
 
 
 class VitalsObservation(Base):
@@ -46,7 +55,9 @@ class VitalsObservation(Base):
         
         # Scores calculated at time of observation
         news2_score: NEWS2 score calculated
+        news2_components: Packed NEWS2 component scores (app.ml.news2.pack_components)
         mews_score: MEWS score calculated
+        mews_components: Packed MEWS component scores (same encoding)
         
         # Metadata
         source: manual, device, ehr_import
@@ -59,10 +70,10 @@ class VitalsObservation(Base):
     
     # Primary key and foreign keys
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False, index=True)
+    patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False)
     
     # Observation metadata
-    observed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    observed_at = Column(DateTime, default=datetime.utcnow, primary_key=True, nullable=False, index=True)
     recorded_by = Column(UUID(as_uuid=True), comment="Staff member who recorded")
     
     # Core vital signs
@@ -80,7 +91,9 @@ class VitalsObservation(Base):
     
     # Calculated scores (stored for historical tracking)
     news2_score = Column(Float, comment="NEWS2 score at time of observation")
+    news2_components = Column(Integer, comment="Packed NEWS2 component scores (2 bits each + present flags)")
     mews_score = Column(Float, comment="MEWS score at time of observation")
+    mews_components = Column(Integer, comment="Packed MEWS component scores (2 bits each + present flags)")
     
     # Additional data
     source = Column(String(20), default="manual", comment="Data source: manual, device, ehr_import")
@@ -97,6 +110,21 @@ class VitalsObservation(Base):
     # Relationships
     patient = relationship("Patient", back_populates="vitals")
     
+    __table_args__ = (
+        # Latest / history reads walk one patient's entries newest first; the
+        # trend parameters are included so trend and rollup reads are
+        # index-only scans
+        Index(
+            "ix_vitals_observations_patient_observed",
+            patient_id,
+            observed_at.desc(),
+            postgresql_include=["heart_rate", "systolic_bp", "diastolic_bp", "spo2", "respiratory_rate", "temperature"],
+        ),
+        # Monthly range partitions, managed by app.services.partitions; the
+        # partition key has to be part of the primary key
+        {"postgresql_partition_by": "RANGE (observed_at)"},
+    )
+    
     def __repr__(self):
         return f"<VitalsObservation(patient_id={self.patient_id}, observed_at={self.observed_at})>"
     
@@ -114,6 +142,37 @@ class VitalsObservation(Base):
         ]
         return all(v is not None for v in required_vitals)
     
+    @property
+    def news2_breakdown(self) -> Optional[Dict[str, int]]:
+        """Per-parameter NEWS2 scores decoded from news2_components"""
+        if self.news2_components is None:
+            return None
+        return unpack_components(self.news2_components)
+    
+    @property
+    def mews_breakdown(self) -> Optional[Dict[str, int]]:
+        """Per-parameter MEWS scores decoded from mews_components"""
+        if self.mews_components is None:
+            return None
+        return unpack_components(self.mews_components, MEWS_COMPONENTS)
+    
+    @classmethod
+    def news2_component_score(cls, component: str):
+        """
+        SQL expression for one packed NEWS2 component score.
+        
+        Evaluates to NULL when the component was not scored, e.g.
+        select(VitalsObservation.news2_component_score("heart_rate")).
+        """
+        index = COMPONENTS.index(component)
+        return case(
+            (
+                cls.news2_components.bitwise_and(1 << (COMPONENT_PRESENT_SHIFT + index)) != 0,
+                cls.news2_components.bitwise_rshift(COMPONENT_SCORE_BITS * index).bitwise_and(COMPONENT_SCORE_MASK),
+            ),
+            else_=None,
+        )
+    
     @property
     def blood_pressure(self) -> str:
         """Format blood pressure as string"""
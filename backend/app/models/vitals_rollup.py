@@ -0,0 +1,61 @@
+"""
+Vitals rollup model - Per-bucket aggregates of charted vital signs.
+
+Maintained incrementally by app.services.vitals_rollups so dashboards and
+trend summaries read pre-aggregated buckets instead of raw observations.
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class VitalsRollup(Base):
+    """
+    Aggregates of one parameter of one patient over one time bucket.
+    
+    count / sum / sum of squares merge by addition and min / max by
+    comparison, so observations can be folded in in any order; the last
+    value is kept by comparing observation times.
+    
+    Attributes:
+        patient_id: Reference to patient
+        resolution: Bucket width: 5min, hour, day
+        parameter: Vital sign (heart_rate, spo2, ...)
+        bucket_start: Start of the bucket (UTC)
+        count: Observations with a value in the bucket
+        sum_value: Sum of values
+        sum_squares: Sum of squared values
+        min_value: Lowest value
+        max_value: Highest value
+        last_value: Value of the latest observation in the bucket
+        last_observed_at: Time of that observation
+    """
+    
+    __tablename__ = "vitals_rollups"
+    
+    # Primary key, in the order range reads use it
+    patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True)
+    resolution = Column(String(8), primary_key=True)
+    parameter = Column(String(20), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    
+    # Aggregates
+    count = Column(Integer, nullable=False)
+    sum_value = Column(Float, nullable=False)
+    sum_squares = Column(Float, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    last_value = Column(Float, nullable=False)
+    last_observed_at = Column(DateTime, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<VitalsRollup(patient_id={self.patient_id}, {self.resolution} {self.parameter} @ {self.bucket_start})>"
+    
+    @property
+    def mean(self) -> float:
+        return self.sum_value / self.count
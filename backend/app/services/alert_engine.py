@@ -0,0 +1,120 @@
+"""
+Alert Engine for MedObsMind
+
+Turns clinical scoring outcomes into Alert rows. Every score registered
+with app.ml.scoring declares the AlertType it raises and the risk level
+that triggers it, so NEWS2, MEWS, sepsis (qSOFA) and shock index alerts
+all come out of the same scoring pass as the observation itself.
+"""
+
+from typing import Dict, List, Optional
+import logging
+
+from app.ml.scoring import ScoringEngine, ScoreOutcome, scoring_engine
+from app.models.alert import Alert, AlertSeverity, AlertType
+
+logger = logging.getLogger(__name__)
+
+
+# Default clinical actions per alert type (NEWS2 carries its own)
+DEFAULT_RECOMMENDATIONS = {
+    AlertType.MEWS_HIGH: [
+        "Increase observation frequency",
+        "Urgent review by ward-based doctor",
+    ],
+    AlertType.SEPSIS_RISK: [
+        "Screen for sepsis (lactate, blood cultures)",
+        "Consider Sepsis Six bundle",
+        "Senior clinical review within 1 hour",
+    ],
+    AlertType.SHOCK_RISK: [
+        "Assess perfusion and fluid status",
+        "Repeat blood pressure and heart rate",
+        "Consider fluid challenge and senior review",
+    ],
+}
+
+
+class AlertEngine:
+    """
+    Builds alerts from scoring outcomes.
+
+    Alerts are returned unsaved so the caller can add them in the same
+    transaction as the observation that triggered them.
+    """
+
+    def __init__(self, engine: ScoringEngine = scoring_engine):
+        self.engine = engine
+
+    def build_alerts(
+        self,
+        patient_id,
+        outcomes: Dict[str, ScoreOutcome],
+        vitals_id=None,
+        names: Optional[List[str]] = None
+    ) -> List[Alert]:
+        """
+        Create Alert objects for every outcome that crosses its alert threshold.
+
+        Args:
+            patient_id: Patient the observation belongs to
+            outcomes: Result of ScoringEngine.score()
+            vitals_id: Observation that triggered the alerts
+            names: Restrict evaluation to these scores (default: all outcomes)
+
+        Returns:
+            Unsaved Alert instances
+        """
+        news2 = outcomes.get("news2")
+        mews = outcomes.get("mews")
+        alerts = []
+
+        for name, outcome in outcomes.items():
+            if names is not None and name not in names:
+                continue
+            score = self.engine.get(name)
+            if not score.triggers_alert(outcome):
+                continue
+
+            alert_type = AlertType(score.alert_type)
+            alerts.append(Alert(
+                patient_id=patient_id,
+                vitals_id=vitals_id,
+                alert_type=alert_type.value,
+                severity=AlertSeverity(outcome.risk_level).value,
+                title=f"{score.label} {self._format_value(outcome.value)} ({outcome.risk_level} risk)",
+                message=f"{score.label} of {self._format_value(outcome.value)} indicates {outcome.risk_level} clinical risk",
+                reason=self._reason(outcome),
+                recommendations=self._recommendations(alert_type, outcome),
+                news2_score=news2.value if news2 else None,
+                mews_score=mews.value if mews else None,
+                requires_escalation=True
+            ))
+            logger.info(f"{alert_type.value} alert raised for patient {patient_id}")
+
+        return alerts
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        return str(int(value)) if float(value).is_integer() else f"{value:.2f}"
+
+    @classmethod
+    def _reason(cls, outcome: ScoreOutcome) -> str:
+        """List the parameters that contributed to the score"""
+        contributing = [
+            f"{name.replace('_', ' ')} +{points}"
+            for name, points in outcome.component_scores.items()
+            if points
+        ]
+        if not contributing:
+            return f"{outcome.name} value {cls._format_value(outcome.value)}"
+        return "Contributing parameters: " + ", ".join(contributing)
+
+    @staticmethod
+    def _recommendations(alert_type: AlertType, outcome: ScoreOutcome) -> List[str]:
+        if outcome.detail is not None and getattr(outcome.detail, "recommendations", None):
+            return list(outcome.detail.recommendations)
+        return list(DEFAULT_RECOMMENDATIONS.get(alert_type, []))
+
+
+alert_engine = AlertEngine()
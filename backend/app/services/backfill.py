@@ -0,0 +1,298 @@
+"""
+NEWS2 Backfill / Rescoring for MedObsMind
+
+Rescores historical vitals_observations whenever the scoring tables or
+Scale 2 rules change. Rows are streamed through a server-side cursor in
+keyset-ordered chunks (ORDER BY id, resuming after the last id written),
+scored with the vectorized NEWS2 path under each patient's scoring profile
+(SpO2 Scale 2, see app.services.scoring_profiles) and written back with one
+UPDATE ... FROM (VALUES ...) statement per chunk. The UPDATE matches each
+row on its id, observed_at (so only the row's partition is touched) and
+the readings it was scored from, so a row amended between fetch and write
+keeps the score the amendment gave it. Progress is
+checkpointed to a JSON file after every chunk so an interrupted run
+resumes where it stopped.
+
+Usage:
+    python -m app.services.backfill --chunk-size 5000 --workers 4
+    python -m app.services.backfill --checkpoint news2.json --reset
+"""
+
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import Float, Integer, and_, cast, column, select, update, values, or_
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.database import engine as default_engine
+from app.ml.scoring import VitalsColumns, scoring_engine
+from app.models.vitals import VitalsObservation
+from app.services.scoring_profiles import scoring_profiles
+
+logger = logging.getLogger(__name__)
+
+
+# Columns read for scoring, in addition to the primary key
+SCORED_COLUMNS = (
+    VitalsObservation.patient_id,  # selects the scoring profile
+    VitalsObservation.heart_rate,
+    VitalsObservation.systolic_bp,
+    VitalsObservation.diastolic_bp,
+    VitalsObservation.spo2,
+    VitalsObservation.respiratory_rate,
+    VitalsObservation.temperature,
+    VitalsObservation.consciousness_level,
+    VitalsObservation.supplemental_oxygen,
+)
+
+# Columns a write-back must still match, besides id: the partition key and
+# the readings the chunk was scored from
+MATCHED_COLUMNS = (VitalsObservation.observed_at,) + SCORED_COLUMNS[1:]
+
+# Rows per UPDATE statement; 12 bind parameters per row (id, matched
+# columns, two scores) must stay under the 32767-parameter limit of the
+# Postgres wire protocol
+MAX_ROWS_PER_UPDATE = 2500
+
+
+@dataclass
+class BackfillCheckpoint:
+    """Resumable progress of a backfill run"""
+    last_id: Optional[str] = None
+    rows_scored: int = 0
+    rows_updated: int = 0
+    chunks: int = 0
+    updated_at: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "BackfillCheckpoint":
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def save(self, path: Optional[str]) -> None:
+        """Write atomically so a crash never leaves a truncated checkpoint"""
+        if not path:
+            return
+        self.updated_at = datetime.utcnow().isoformat()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+
+def score_chunk(columns: VitalsColumns) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score one chunk with the vectorized NEWS2 path.
+
+    Module-level so it can run in a worker process.
+
+    Returns:
+        (news2_scores, packed_components); NaN / -1 where not scorable
+    """
+    outcome = scoring_engine.get("news2").score_batch(columns)
+    packed = np.where(np.isnan(outcome.values), -1, outcome.detail.packed_components)
+    return outcome.values, packed
+
+
+class NEWS2Backfill:
+    """
+    Chunked, resumable NEWS2 rescoring of vitals_observations.
+
+    Scoring runs inline or, with workers > 1, in a process pool while the
+    event loop keeps reading the next chunks. Results are always written
+    and checkpointed in keyset order, so the checkpoint never skips rows.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine = default_engine,
+        chunk_size: int = 5000,
+        workers: int = 1,
+        checkpoint_path: Optional[str] = None,
+        dry_run: bool = False
+    ):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.checkpoint_path = checkpoint_path
+        self.dry_run = dry_run
+        self.checkpoint = BackfillCheckpoint.load(checkpoint_path)
+
+    async def fetch_chunk(self, after_id: Optional[str]) -> Tuple[List, VitalsColumns]:
+        """
+        Stream the next keyset chunk through a server-side cursor, with its patients' profiles.
+
+        Returns:
+            (rows with id and MATCHED_COLUMNS, columns to score)
+        """
+        query = (
+            select(VitalsObservation.id, VitalsObservation.observed_at, *SCORED_COLUMNS)
+            .order_by(VitalsObservation.id)
+            .limit(self.chunk_size)
+        )
+        if after_id is not None:
+            query = query.where(VitalsObservation.id > uuid.UUID(after_id))
+
+        async with self.engine.connect() as conn:
+            result = await conn.stream(query.execution_options(yield_per=self.chunk_size))
+            rows = [row async for row in result]
+
+        # One SELECT for the chunk's patients not already in the profile cache
+        async with AsyncSession(self.engine) as session:
+            profiles = await scoring_profiles.get_many(session, {row.patient_id for row in rows})
+        row_profiles = [profiles.get(str(row.patient_id)) for row in rows]
+
+        return rows, VitalsColumns.from_records(rows, row_profiles)
+
+    async def write_chunk(self, rows: List, scores: np.ndarray, packed: np.ndarray) -> int:
+        """Bulk UPDATE ... FROM (VALUES ...) of one chunk in a single transaction"""
+        data = [
+            (
+                row.id,
+                *(getattr(row, matched.key) for matched in MATCHED_COLUMNS),
+                None if np.isnan(score) else float(score),
+                None if code < 0 else int(code),
+            )
+            for row, score, code in zip(rows, scores, packed)
+        ]
+        updated = 0
+        async with self.engine.begin() as conn:
+            for start in range(0, len(data), MAX_ROWS_PER_UPDATE):
+                result = await conn.execute(self._update_statement(data[start:start + MAX_ROWS_PER_UPDATE]))
+                updated += result.rowcount
+        return updated
+
+    @staticmethod
+    def _update_statement(data: List[Tuple]):
+        """
+        UPDATE ... FROM (VALUES ...); rows whose scores did not change are
+        skipped, and so are rows whose readings changed since they were read
+        """
+        # NULLs render as untyped literals, and a VALUES column of only NULLs
+        # would be text: comparisons and assignments cast back explicitly
+        scored = values(
+            column("id", VitalsObservation.id.type),
+            *(column(matched.key, matched.type) for matched in MATCHED_COLUMNS),
+            column("news2_score", Float),
+            column("news2_components", Integer),
+            name="scored",
+        ).data(data)
+        news2_score = cast(scored.c.news2_score, Float)
+        news2_components = cast(scored.c.news2_components, Integer)
+
+        return (
+            update(VitalsObservation)
+            .where(
+                and_(
+                    VitalsObservation.id == scored.c.id,
+                    VitalsObservation.observed_at == scored.c.observed_at,
+                    *(
+                        matched.is_not_distinct_from(cast(scored.c[matched.key], matched.type))
+                        for matched in MATCHED_COLUMNS[1:]
+                    ),
+                    or_(
+                        VitalsObservation.news2_score.is_distinct_from(news2_score),
+                        VitalsObservation.news2_components.is_distinct_from(news2_components),
+                    )
+                )
+            )
+            .values(news2_score=news2_score, news2_components=news2_components)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def run(self, max_chunks: Optional[int] = None) -> BackfillCheckpoint:
+        """Run (or resume) the backfill until the table is exhausted"""
+        loop = asyncio.get_running_loop()
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        pending: List[Tuple[List, asyncio.Future]] = []  # (rows, scoring future)
+        after_id = self.checkpoint.last_id
+        exhausted = False
+        chunks = 0
+        started = time.perf_counter()
+
+        try:
+            while not exhausted or pending:
+                # Keep up to `workers` chunks scoring while older ones are written
+                while not exhausted and len(pending) < max(self.workers, 1):
+                    if max_chunks is not None and chunks >= max_chunks:
+                        exhausted = True
+                        break
+                    rows, columns = await self.fetch_chunk(after_id)
+                    if not rows:
+                        exhausted = True
+                        break
+                    after_id = str(rows[-1].id)
+                    chunks += 1
+                    if pool is not None:
+                        future = loop.run_in_executor(pool, score_chunk, columns)
+                    else:
+                        future = loop.create_future()
+                        future.set_result(score_chunk(columns))
+                    pending.append((rows, future))
+
+                if not pending:
+                    break
+
+                rows, future = pending.pop(0)
+                scores, packed = await future
+                updated = 0 if self.dry_run else await self.write_chunk(rows, scores, packed)
+
+                self.checkpoint.last_id = str(rows[-1].id)
+                self.checkpoint.rows_scored += len(rows)
+                self.checkpoint.rows_updated += updated
+                self.checkpoint.chunks += 1
+                if not self.dry_run:
+                    self.checkpoint.save(self.checkpoint_path)
+
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Chunk {self.checkpoint.chunks}: {len(rows)} rows scored, {updated} updated "
+                    f"({self.checkpoint.rows_scored / elapsed:.0f} rows/s)"
+                )
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        return self.checkpoint
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Rescore historical vitals observations with NEWS2")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per keyset chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Scoring processes (1 = score inline)")
+    parser.add_argument("--checkpoint", default="news2_backfill.checkpoint.json", help="Checkpoint file for resuming")
+    parser.add_argument("--reset", action="store_true", help="Ignore any existing checkpoint and start over")
+    parser.add_argument("--max-chunks", type=int, default=None, help="Stop after this many chunks")
+    parser.add_argument("--dry-run", action="store_true", help="Score without writing results or checkpoints")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    backfill = NEWS2Backfill(
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        dry_run=args.dry_run
+    )
+    checkpoint = asyncio.run(backfill.run(max_chunks=args.max_chunks))
+    print(f"✅ NEWS2 backfill: {checkpoint.rows_scored} rows scored, {checkpoint.rows_updated} updated")
+    return asdict(checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Device Reading Coalescing for MedObsMind
+
+Bedside monitors report every second, but observations are charted every
+few minutes. The coalescer keeps each device's full-rate readings in a
+compact float32 window buffer and turns them into charted observations:
+
+- once per DEVICE_CHART_INTERVAL_SECONDS, as the per-parameter median of
+  the window (min / max / median / count are kept in the observation's
+  metadata under "window");
+- immediately, when a reading falls in a different NEWS2 risk band than
+  the last charted observation for that device, so deterioration is
+  charted (and alerted on) without waiting for the cadence. Monitors
+  rarely send AVPU or temperature, so the band is computed from the
+  readings present, with each missing one carried forward from the
+  device's earlier readings; parameters never seen score nothing, as in
+  NEWS2Calculator.calculate();
+- when the device is attached to a different patient, or disconnects;
+- by flush_idle_forever() (started with the app), when a device stops
+  sending without disconnecting and its window outlives the interval;
+- by close() at shutdown, so no acknowledged reading is left in memory.
+
+Readings without a device_id are charted as they are. Every full-rate
+reading of a closed window is also appended to the high-rate store
+(app.services.highres_store), when one is configured.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime
+import asyncio
+import logging
+
+import numpy as np
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.ml.news2 import is_recorded
+from app.ml.scoring import ScoringEngine, scoring_engine
+from app.services.highres_store import HIGHRES_FIELDS, HighRateStore, highres_store, to_epoch_ms
+from app.services.scoring_profiles import ScoringProfileCache, scoring_profiles
+from app.services.vitals_ingest import VitalsIngestor, vitals_ingestor
+
+logger = logging.getLogger(__name__)
+
+
+# Numeric readings summarised per window, in buffer column order
+# (the high-rate store's record order, so windows are stored as they are)
+COALESCED_FIELDS = HIGHRES_FIELDS
+
+# Decimal places kept when charting a window median (None = integer)
+CHARTED_PRECISION = {"temperature": 1}
+
+INITIAL_CAPACITY = 64
+
+
+@dataclass
+class DeviceWindow:
+    """Readings from one device since its last charted observation"""
+    device_id: str
+    patient_id: str
+    started_at: datetime
+    values: np.ndarray = field(default_factory=lambda: np.full((INITIAL_CAPACITY, len(COALESCED_FIELDS)), np.nan, dtype=np.float32))
+    timestamps: np.ndarray = field(default_factory=lambda: np.zeros(INITIAL_CAPACITY, dtype=np.int64))  # epoch ms
+    count: int = 0
+    latest: Optional[Dict[str, Any]] = None  # most recent reading (non-numeric fields are charted from it)
+    first_index: Any = None
+    latest_index: Any = None
+    latest_at: Optional[datetime] = None
+
+    def append(self, index: Any, reading: Dict[str, Any], observed_at: datetime) -> None:
+        if self.count == len(self.values):
+            grown = np.full((len(self.values) * 2, len(COALESCED_FIELDS)), np.nan, dtype=np.float32)
+            grown[:self.count] = self.values
+            self.values = grown
+            self.timestamps = np.resize(self.timestamps, len(grown))
+        if self.count == 0:
+            self.first_index = index
+        self.timestamps[self.count] = to_epoch_ms(observed_at)
+        row = self.values[self.count]
+        for column, name in enumerate(COALESCED_FIELDS):
+            value = reading.get(name)
+            row[column] = np.nan if value is None else value
+        self.count += 1
+        self.latest = reading
+        self.latest_index = index
+        self.latest_at = observed_at
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """min / max / median / count per parameter over the window"""
+        summary = {}
+        values = self.values[:self.count]
+        for column, name in enumerate(COALESCED_FIELDS):
+            recorded = values[:, column][~np.isnan(values[:, column])]
+            if len(recorded):
+                summary[name] = {
+                    "min": float(recorded.min()),
+                    "max": float(recorded.max()),
+                    "median": float(np.median(recorded)),
+                    "count": int(len(recorded)),
+                }
+        return summary
+
+
+class ReadingCoalescer:
+    """
+    Per-device coalescing of full-rate readings into charted observations.
+
+    Attributes:
+        interval: Seconds between charted observations for a stable device
+        windows: Open window per device_id
+        last_band: NEWS2 risk level of each device's last charted observation
+        carried: Latest value of each NEWS2 reading per device, for partial bands
+        store: High-rate store closed windows are appended to (None = not kept)
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.DEVICE_CHART_INTERVAL_SECONDS,
+        engine: ScoringEngine = scoring_engine,
+        profiles: ScoringProfileCache = scoring_profiles,
+        store: Optional[HighRateStore] = highres_store
+    ):
+        self.interval = interval
+        self.engine = engine
+        self.profiles = profiles
+        self.store = store
+        self.windows: Dict[str, DeviceWindow] = {}
+        self.last_band: Dict[str, Optional[str]] = {}
+        self.carried: Dict[str, Dict[str, Any]] = {}
+
+    def offer(self, items: List[Tuple[Any, Any]]) -> Tuple[List[Tuple[Any, Dict[str, Any]]], int]:
+        """
+        Feed validated readings and collect the observations to chart.
+
+        Args:
+            items: (index, reading) pairs; readings are VitalsCreate or dicts
+
+        Returns:
+            ((index, observation) pairs to store, number of readings only buffered)
+        """
+        charted = []
+        buffered = 0
+        for index, reading in items:
+            reading = reading.model_dump() if hasattr(reading, "model_dump") else dict(reading)
+            device_id = reading.get("device_id")
+            if not device_id:
+                charted.append((index, reading))
+                continue
+
+            observed_at = reading.get("observed_at") or datetime.utcnow()
+            patient_id = str(reading["patient_id"])
+            window = self.windows.get(device_id)
+            if window is not None and window.patient_id != patient_id:
+                # Device moved to another patient: chart what the old window holds
+                charted.append(self._chart(window))
+                self.last_band.pop(device_id, None)
+                self.carried.pop(device_id, None)
+                window = None
+            if window is None:
+                window = self.windows[device_id] = DeviceWindow(device_id, patient_id, observed_at)
+
+            window.append(index, reading, observed_at)
+            self.carried.setdefault(device_id, {}).update(
+                (name, reading[name]) for name in self.engine.get("news2").required if is_recorded(reading.get(name))
+            )
+            band = self._band(device_id, reading)
+            if band is not None and band != self.last_band.get(device_id):
+                # Chart the reading that changed the band as it was measured
+                charted.append(self._chart(window, reading, band))
+            elif (observed_at - window.started_at).total_seconds() >= self.interval:
+                charted.append(self._chart(window))
+            else:
+                buffered += 1
+
+        return charted, buffered
+
+    def flush_due(self, now: Optional[datetime] = None) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Chart every window whose interval has elapsed without a new reading"""
+        now = now or datetime.utcnow()
+        return [
+            self._chart(window)
+            for window in list(self.windows.values())
+            if (now - window.started_at).total_seconds() >= self.interval
+        ]
+
+    def flush_all(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Chart every open window"""
+        return [self._chart(window) for window in list(self.windows.values())]
+
+    async def flush_idle_forever(
+        self,
+        ingestor: VitalsIngestor = vitals_ingestor,
+        session_factory: async_sessionmaker = AsyncSessionLocal
+    ) -> None:
+        """
+        Chart and store windows that flush_due() reports, every fifth of the
+        interval, so a device that goes quiet without disconnecting is still
+        charted and its readings leave memory (run as a task)
+        """
+        while True:
+            await asyncio.sleep(self.interval / 5)
+            await self._ingest(self.flush_due(), "idle", ingestor, session_factory)
+
+    async def close(
+        self,
+        ingestor: VitalsIngestor = vitals_ingestor,
+        session_factory: async_sessionmaker = AsyncSessionLocal
+    ) -> None:
+        """Chart and store every open window (at shutdown: buffered readings were acknowledged)"""
+        await self._ingest(self.flush_all(), "open", ingestor, session_factory)
+
+    async def _ingest(
+        self,
+        charted: List[Tuple[Any, Dict[str, Any]]],
+        kind: str,
+        ingestor: VitalsIngestor,
+        session_factory: async_sessionmaker
+    ) -> None:
+        if not charted:
+            return
+        # Indices belong to the streams the readings came from; renumber for this batch
+        observations = [(position, observation) for position, (_, observation) in enumerate(charted)]
+        try:
+            async with session_factory() as db:
+                results = await ingestor.ingest(db, observations)
+            rejected = sum(result.status == "rejected" for result in results)
+            logger.info(f"Charted {len(charted)} {kind} device windows ({rejected} rejected)")
+        except Exception as e:
+            logger.error(f"Storing {len(charted)} {kind} device windows failed: {e}")
+
+    def pending_since(self, device_id: str) -> Any:
+        """Index of the oldest reading in a device's open window (None: nothing buffered)"""
+        window = self.windows.get(device_id)
+        return window.first_index if window is not None else None
+
+    def flush_device(self, device_id: str) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Chart a device's open window (e.g. on disconnect)"""
+        window = self.windows.get(device_id)
+        return [self._chart(window)] if window is not None else []
+
+    def _band(self, device_id: str, reading: Dict[str, Any]) -> Optional[str]:
+        """NEWS2 risk level of a reading, missing readings carried forward (None: no NEWS2 reading yet)"""
+        carried = self.carried.get(device_id)
+        if not carried:
+            return None
+        readings = {**carried, **{name: value for name, value in reading.items() if is_recorded(value)}}
+        return self.engine.get("news2").score(readings, self.profiles.get_cached(reading["patient_id"])).risk_level
+
+    def _chart(
+        self,
+        window: DeviceWindow,
+        reading: Optional[Dict[str, Any]] = None,
+        band: Optional[str] = None
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Close a window into one observation (the given reading, or the window medians)"""
+        summary = window.summary()
+        observation = dict(window.latest)
+        if reading is None:
+            for name in COALESCED_FIELDS:
+                if name in summary:
+                    median = summary[name]["median"]
+                    observation[name] = round(median, CHARTED_PRECISION.get(name)) if name in CHARTED_PRECISION else int(round(median))
+            band = self._band(window.device_id, observation)
+        observation["observed_at"] = window.latest_at
+        observation["extra_metadata"] = {
+            "window": {
+                "started_at": window.started_at.isoformat(),
+                "ended_at": window.latest_at.isoformat(),
+                "readings": window.count,
+                "charted": "band_change" if reading is not None else "interval",
+                "parameters": summary,
+            }
+        }
+
+        del self.windows[window.device_id]
+        self._store(window)
+        if band is not None:
+            self.last_band[window.device_id] = band
+        return window.latest_index, observation
+
+    def _store(self, window: DeviceWindow) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.append(window.patient_id, window.timestamps[:window.count], window.values[:window.count])
+        except (OSError, ValueError) as e:
+            # The charted observation is still stored; only full-rate detail is lost
+            logger.error(f"High-rate store append failed for device {window.device_id}: {e}")
+
+
+device_coalescer = ReadingCoalescer()
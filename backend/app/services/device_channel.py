@@ -0,0 +1,275 @@
+"""
+Device Channel for MedObsMind
+
+Persistent WebSocket channel for bedside monitors. A device authenticates
+once with a device token and then streams readings tagged with sequence
+numbers over the same connection. Readings are micro-batched per
+connection, stored through the bulk ingestion path (so scoring and alerts
+match record_vitals) and acknowledged in batches.
+
+Protocol (JSON text frames):
+    device -> {"type": "auth", "token": "<device JWT>", "session": "<boot id>"}
+    server -> {"type": "auth_ok", "device_id": "...", "last_seq": 41}
+    device -> {"seq": 42, "data": {<VitalsCreate fields>}}    (or a list of these)
+    server -> {"type": "ack", "seq": 42, "created": 1, "buffered": 0, "duplicates": 0, "rejected": []}
+    device -> {"type": "stats"}
+    server -> {"type": "stats", "received": ..., "readings_per_second": ...}
+
+Readings pass through the device coalescer (app.services.coalescing), so
+most are reported as "buffered" and only charted observations are stored;
+the open window is charted when the device disconnects. The acknowledged
+"seq" only covers readings that are stored or settled (charted, rejected,
+duplicate): it stays below the oldest reading still buffered in the open
+window, so a device that loses its connection resends what was never
+stored.
+
+Readings with a sequence number at or below the last one received are
+treated as retransmissions and acknowledged without being stored again.
+The last acknowledged sequence is kept per device in this worker, so a
+device reconnecting to the same worker resumes from "last_seq". A device
+that restarts its sequence numbers (e.g. after a reboot) starts afresh
+when it authenticates with a different "session" than before, or, without
+a session, when the first reading of a connection does not resume after
+"last_seq".
+
+Each connection holds no database session between flushes; sessions are
+taken from the pool only while a batch is written, so one worker can keep
+thousands of idle or slow device sockets open.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+import asyncio
+import json
+import logging
+import time
+
+from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.database import AsyncSessionLocal
+from app.core.security import verify_device_token
+from app.services.coalescing import ReadingCoalescer, device_coalescer
+from app.services.vitals_ingest import VitalsIngestor, vitals_ingestor
+from app.services.vitals_stream import collect_batch
+
+logger = logging.getLogger(__name__)
+
+
+# Close code for a missing or invalid device token (RFC 6455 private range)
+CLOSE_AUTH_FAILED = 4401
+
+
+@dataclass
+class ConnectionStats:
+    """Per-connection throughput counters"""
+    device_id: str
+    connected_at: float = field(default_factory=time.monotonic)
+    received: int = 0
+    created: int = 0
+    buffered: int = 0
+    rejected: int = 0
+    duplicates: int = 0
+    batches: int = 0
+    last_seq: int = 0  # acknowledged: everything up to it is stored or settled
+    received_seq: int = 0  # highest sequence number taken in
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.connected_at
+        return {
+            "device_id": self.device_id,
+            "connected_seconds": round(elapsed, 1),
+            "received": self.received,
+            "created": self.created,
+            "buffered": self.buffered,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "batches": self.batches,
+            "last_seq": self.last_seq,
+            "received_seq": self.received_seq,
+            "readings_per_second": round(self.received / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class DeviceChannelHub:
+    """
+    Accepts device sockets and tracks the connections open in this worker.
+
+    Attributes:
+        batch_size: Readings per write for one connection
+        flush_interval: Seconds a reading may wait for its batch to fill
+        max_queued: Readings buffered per connection before the socket is
+            no longer read (backpressure)
+    """
+
+    def __init__(
+        self,
+        validate: Callable,
+        ingestor: VitalsIngestor = vitals_ingestor,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        coalescer: ReadingCoalescer = device_coalescer,
+        batch_size: int = 100,
+        flush_interval: float = 0.2,
+        max_queued: int = 1000,
+        auth_timeout: float = 10.0
+    ):
+        self.validate = validate
+        self.ingestor = ingestor
+        self.session_factory = session_factory
+        self.coalescer = coalescer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queued = max_queued
+        self.auth_timeout = auth_timeout
+        self.connections: Dict[int, ConnectionStats] = {}
+        self.last_acked: Dict[str, int] = {}
+        self.sessions: Dict[str, Optional[str]] = {}
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Throughput of every open connection"""
+        return [stats.as_dict() for stats in self.connections.values()]
+
+    async def serve(self, websocket: WebSocket) -> None:
+        """Run one device connection until it closes"""
+        await websocket.accept()
+        authenticated = await self._authenticate(websocket)
+        if authenticated is None:
+            return
+        device_id, session = authenticated
+
+        if session is not None and session != self.sessions.get(device_id):
+            # New device session: its sequence numbers start over
+            self.last_acked.pop(device_id, None)
+        self.sessions[device_id] = session
+        last_seq = self.last_acked.get(device_id, 0)
+        stats = ConnectionStats(device_id=device_id, last_seq=last_seq, received_seq=last_seq)
+        self.connections[id(websocket)] = stats
+        await websocket.send_json({"type": "auth_ok", "device_id": device_id, "last_seq": stats.last_seq})
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queued)
+        send_lock = asyncio.Lock()  # acks and replies come from two tasks
+        reader = asyncio.create_task(self._read(websocket, queue, stats, send_lock))
+        finished = False
+        try:
+            while not finished:
+                batch, finished = await collect_batch(queue, self.batch_size, self.flush_interval)
+                if batch:
+                    ack = await self._ingest(batch, stats)
+                    # After a disconnect the tail is still stored; the device
+                    # resends it on reconnect and gets it acked as duplicates
+                    if not finished:
+                        async with send_lock:
+                            await websocket.send_json(ack)
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error(f"Device channel for {device_id} failed: {e}")
+            if not finished:
+                await websocket.close(code=1011)
+        finally:
+            reader.cancel()
+            self.connections.pop(id(websocket), None)
+            try:
+                await self._store(self.coalescer.flush_device(device_id))
+                # The open window is stored: everything received is settled
+                stats.last_seq = stats.received_seq
+                self.last_acked[device_id] = stats.last_seq
+            except Exception as e:
+                logger.error(f"Could not chart the open window of device {device_id}: {e}")
+            logger.info(f"Device {device_id} disconnected: {stats.as_dict()}")
+
+    async def _authenticate(self, websocket: WebSocket) -> Optional[Tuple[str, Optional[str]]]:
+        """(device_id, session) from the auth frame, or None after closing the socket"""
+        try:
+            message = await asyncio.wait_for(websocket.receive_json(), self.auth_timeout)
+        except (asyncio.TimeoutError, ValueError, WebSocketDisconnect):
+            message = None
+        device_id = None
+        if isinstance(message, dict) and message.get("type") == "auth":
+            device_id = verify_device_token(str(message.get("token", "")))
+        if device_id is None:
+            await websocket.close(code=CLOSE_AUTH_FAILED)
+            return None
+        session = message.get("session")
+        return device_id, str(session) if session is not None else None
+
+    async def _read(self, websocket: WebSocket, queue: asyncio.Queue, stats: ConnectionStats, send_lock: asyncio.Lock) -> None:
+        """Parse frames into the connection queue; blocks on a full queue"""
+        async def reply(payload):
+            async with send_lock:
+                await websocket.send_json(payload)
+
+        try:
+            while True:
+                try:
+                    message = json.loads(await websocket.receive_text())
+                except ValueError:
+                    await reply({"type": "error", "errors": ["Frame is not valid JSON"]})
+                    continue
+
+                if isinstance(message, dict) and message.get("type") == "stats":
+                    await reply({"type": "stats", **stats.as_dict()})
+                    continue
+
+                for reading in message if isinstance(message, list) else [message]:
+                    if not isinstance(reading, dict) or not isinstance(reading.get("seq"), int):
+                        await reply({"type": "error", "errors": ["Readings need an integer seq"]})
+                        continue
+                    stats.received += 1
+                    await queue.put((reading["seq"], reading.get("data")))
+        except WebSocketDisconnect:
+            await queue.put(None)
+        except Exception:
+            await queue.put(None)
+            raise
+
+    async def _ingest(self, batch: List[Tuple[int, Any]], stats: ConnectionStats) -> Dict[str, Any]:
+        if stats.batches == 0 and stats.received_seq and batch[0][0] <= stats.received_seq:
+            # A resuming device continues after last_seq; this one restarted its numbering
+            logger.warning(
+                f"Device {stats.device_id} restarted at seq {batch[0][0]} (last acked {stats.received_seq})"
+            )
+            stats.last_seq = stats.received_seq = 0
+
+        fresh = []
+        seen = set()
+        for seq, data in batch:
+            if seq > stats.received_seq and seq not in seen:
+                seen.add(seq)
+                fresh.append((seq, data))
+        duplicates = len(batch) - len(fresh)
+
+        valid, rejected = self.validate(fresh)
+        charted, buffered = self.coalescer.offer([
+            (seq, reading.model_copy(update={"device_id": stats.device_id, "data_source": "device"}))
+            for seq, reading in valid
+        ])
+        results = await self._store(charted)
+        rejected.extend(result for result in results if result.status != "created")
+
+        created = sum(result.status == "created" for result in results)
+        stats.created += created
+        stats.buffered += buffered
+        stats.rejected += len(rejected)
+        stats.duplicates += duplicates
+        stats.batches += 1
+        stats.received_seq = max([stats.received_seq] + [seq for seq, _ in batch])
+        # Readings still buffered in the open window are not stored yet
+        pending = self.coalescer.pending_since(stats.device_id)
+        stats.last_seq = stats.received_seq if pending is None else max(stats.last_seq, pending - 1)
+        self.last_acked[stats.device_id] = stats.last_seq
+
+        return {
+            "type": "ack",
+            "seq": stats.last_seq,
+            "created": created,
+            "buffered": buffered,
+            "duplicates": duplicates,
+            "rejected": [{"seq": result.index, "errors": result.errors} for result in rejected],
+        }
+
+    async def _store(self, observations: List[Tuple[int, Any]]) -> List:
+        if not observations:
+            return []
+        async with self.session_factory() as db:
+            return await self.ingestor.ingest(db, observations)
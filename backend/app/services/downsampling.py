@@ -0,0 +1,112 @@
+"""
+Series Downsampling for MedObsMind
+
+Reduces long vitals series to a bounded number of points for charting:
+
+- "lttb": Largest-Triangle-Three-Buckets, which keeps the visual shape;
+  each parameter's minimum and maximum are always kept as well;
+- "minmax": the minimum and maximum of every bucket, which keeps every
+  local extreme (e.g. a short desaturation) at the cost of a noisier line.
+
+Both keep the first and last points and work on NaN-free positions of
+each parameter. For several parameters sharing one timestamp array, each
+gets an equal share of the budget and the union of the kept positions is
+returned, so every series stays aligned and the total stays bounded.
+"""
+
+from typing import Dict
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets.
+
+    Args:
+        x: Increasing x values
+        y: Values (no NaN)
+        max_points: Points to keep (>= 3)
+
+    Returns:
+        Sorted positions of the kept points
+    """
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+
+    # max_points - 2 buckets over the interior points; the ends are always kept
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    # Average of each bucket, the third corner of the triangles of the bucket before it
+    counts = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts, y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Twice the triangle area (a, candidate, next bucket average); the constant factor does not matter
+        area = np.abs(
+            (x[a] - avg_x[bucket + 1]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y[bucket + 1] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[bucket + 1] = a
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Minimum and maximum of equal-count buckets, plus the first and last points.
+
+    Returns:
+        Sorted positions of the kept points
+    """
+    n = len(x)
+    buckets = (max_points - 2) // 2
+    if n <= max_points or buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sorted by bucket then value, bucket k occupies edges[k]:edges[k + 1]
+    order = np.lexsort((y, bucket_of))
+    return np.unique(np.concatenate(([0, n - 1], order[edges[:-1]], order[edges[1:] - 1])))
+
+
+def downsample(x: np.ndarray, series: Dict[str, np.ndarray], max_points: int, method: str = "lttb") -> np.ndarray:
+    """
+    Positions to keep so that series sharing x fit in max_points.
+
+    Args:
+        x: Shared increasing x values (e.g. epoch ms)
+        series: Values per parameter, NaN where not recorded
+        max_points: Upper bound on the positions returned
+        method: "lttb" or "minmax"
+
+    Returns:
+        Sorted positions into x
+    """
+    if len(x) <= max_points:
+        return np.arange(len(x))
+    # The budget is shared by the parameters that were recorded at all
+    recorded = [np.flatnonzero(~np.isnan(y)) for y in series.values()]
+    populated = [(y, present) for y, present in zip(series.values(), recorded) if len(present)]
+    budget = max_points // max(len(populated), 1)
+    kept = []
+    for y, present in populated:
+        if len(present) <= budget:
+            kept.append(present)
+            continue
+        px, py = x[present], y[present]
+        if method == "minmax":
+            positions = minmax(px, py, budget)
+        else:
+            # Two points of the budget are reserved for the extremes
+            positions = np.concatenate((lttb(px, py, budget - 2), [np.argmin(py), np.argmax(py)]))
+        kept.append(present[positions])
+    if not kept:
+        return np.arange(0)
+    return np.unique(np.concatenate(kept))
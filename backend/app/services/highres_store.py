@@ -0,0 +1,290 @@
+"""
+High-Rate Vitals Store for MedObsMind
+
+Append-only columnar store for full-rate (1 Hz) device readings that are
+coalesced away before charting (app.services.coalescing). Keeping them in
+Postgres would add ~86k rows per patient per day; here they are fixed-width
+records in per-patient segment files that are read back with numpy.memmap,
+so a time-range query touches only the pages it needs.
+
+Layout under HIGHRES_STORE_PATH:
+    <patient_id>/H2026101714.seg   hourly segment (appended as windows close)
+    <patient_id>/D20261016.seg     daily segment (compacted, sorted, deduplicated)
+
+Records are RECORD_DTYPE: int64 epoch milliseconds plus one float32 per
+parameter (NaN = not measured). The time index is the segment name (hour or
+day) plus a binary search on the timestamp column of sorted segments.
+
+Maintenance (python -m app.services.highres_store):
+- compaction merges the hourly segments of days older than
+  HIGHRES_COMPACT_AFTER_HOURS into one sorted daily segment;
+- retention deletes segments older than HIGHRES_RETENTION_DAYS.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import argparse
+import logging
+import os
+import uuid
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Parameters stored per reading, in record order
+HIGHRES_FIELDS = (
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "spo2",
+    "respiratory_rate",
+    "temperature",
+)
+
+RECORD_DTYPE = np.dtype([("ts", "<i8")] + [(name, "<f4") for name in HIGHRES_FIELDS])
+
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+SEGMENT_SUFFIX = ".seg"
+
+
+def to_epoch_ms(moment: datetime) -> int:
+    """Naive datetimes are UTC, as everywhere else in the backend"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+@dataclass(frozen=True)
+class Segment:
+    """One segment file and the time span its name covers"""
+    path: str
+    kind: str  # "H" hourly, "D" daily
+    start_ms: int
+    end_ms: int  # exclusive
+
+    @classmethod
+    def parse(cls, directory: str, filename: str) -> Optional["Segment"]:
+        if not filename.endswith(SEGMENT_SUFFIX) or filename[:1] not in ("H", "D"):
+            return None
+        kind, stamp = filename[0], filename[1:-len(SEGMENT_SUFFIX)]
+        try:
+            start = datetime.strptime(stamp, "%Y%m%d%H" if kind == "H" else "%Y%m%d")
+        except ValueError:
+            return None
+        start_ms = to_epoch_ms(start)
+        return cls(os.path.join(directory, filename), kind, start_ms, start_ms + (HOUR_MS if kind == "H" else DAY_MS))
+
+    def records(self) -> np.ndarray:
+        """Memory-mapped records; a torn trailing record from a crash is ignored"""
+        count = os.path.getsize(self.path) // RECORD_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+
+class HighRateStore:
+    """
+    Per-patient segment files of full-rate readings.
+
+    Appends use O_APPEND writes of whole records, so several workers may
+    append to the same hourly segment.
+    """
+
+    def __init__(
+        self,
+        root: str = settings.HIGHRES_STORE_PATH,
+        retention_days: int = settings.HIGHRES_RETENTION_DAYS,
+        compact_after_hours: int = settings.HIGHRES_COMPACT_AFTER_HOURS
+    ):
+        self.root = root
+        self.retention_days = retention_days
+        self.compact_after_hours = compact_after_hours
+
+    def _patient_dir(self, patient_id) -> str:
+        # Normalised through UUID so an ID can never name a path outside root (ValueError otherwise)
+        return os.path.join(self.root, str(uuid.UUID(str(patient_id))))
+
+    def append(self, patient_id, timestamps_ms: np.ndarray, values: np.ndarray) -> int:
+        """
+        Append readings to the patient's hourly segments.
+
+        Args:
+            patient_id: Patient the readings belong to
+            timestamps_ms: (n,) epoch milliseconds
+            values: (n, len(HIGHRES_FIELDS)) readings, NaN where not measured
+
+        Returns:
+            Number of records written
+        """
+        n = len(timestamps_ms)
+        if n == 0:
+            return 0
+        records = np.empty(n, dtype=RECORD_DTYPE)
+        records["ts"] = timestamps_ms
+        for column, name in enumerate(HIGHRES_FIELDS):
+            records[name] = values[:, column]
+
+        directory = self._patient_dir(patient_id)
+        os.makedirs(directory, exist_ok=True)
+        hours = records["ts"] // HOUR_MS
+        for hour in np.unique(hours):
+            stamp = datetime.utcfromtimestamp(int(hour) * HOUR_MS / 1000).strftime("%Y%m%d%H")
+            with open(os.path.join(directory, f"H{stamp}{SEGMENT_SUFFIX}"), "ab") as f:
+                f.write(records[hours == hour].tobytes())
+        return n
+
+    def segments(self, patient_id) -> List[Segment]:
+        """Segments of a patient ordered by start time"""
+        directory = self._patient_dir(patient_id)
+        if not os.path.isdir(directory):
+            return []
+        segments = [Segment.parse(directory, name) for name in os.listdir(directory)]
+        return sorted((s for s in segments if s is not None), key=lambda s: (s.start_ms, s.kind))
+
+    def read(
+        self,
+        patient_id,
+        start: datetime,
+        end: datetime,
+        fields: Optional[Sequence[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Readings in [start, end), sorted by time.
+
+        A range within one daily segment is returned as read-only views of
+        its memory map (no copy). Otherwise the matching records are
+        concatenated once; hourly segments, which are appended out of order,
+        are sorted in, and readings a daily segment already holds (compaction
+        in progress, or late appends) are deduplicated by timestamp as
+        compact() does.
+
+        Returns:
+            {"ts": int64 epoch ms, <field>: float32, ...}
+        """
+        fields = list(fields or HIGHRES_FIELDS)
+        start_ms, end_ms = to_epoch_ms(start), to_epoch_ms(end)
+        segments = [
+            segment for segment in self.segments(patient_id)
+            if segment.end_ms > start_ms and segment.start_ms < end_ms
+        ]
+        compacted_days = {segment.start_ms for segment in segments if segment.kind == "D"}
+
+        parts = []
+        hourly = overlapping = False
+        for segment in segments:
+            records = segment.records()
+            ts = records["ts"]
+            if segment.kind == "D":
+                # Daily segments are written sorted by compact()
+                selected = records[np.searchsorted(ts, start_ms):np.searchsorted(ts, end_ms)]
+            else:
+                selected = records[(ts >= start_ms) & (ts < end_ms)]
+                hourly = True
+                overlapping |= segment.start_ms // DAY_MS * DAY_MS in compacted_days
+            if len(selected):
+                parts.append(selected)
+
+        if not parts:
+            return {"ts": np.empty(0, dtype=np.int64), **{name: np.empty(0, dtype=np.float32) for name in fields}}
+        if len(parts) == 1 and not hourly:
+            return {name: parts[0][name] for name in ["ts"] + fields}
+
+        merged = np.concatenate([part[["ts"] + fields] for part in parts])
+        if hourly:
+            # Stable, so a daily record stays ahead of an hourly one with the same timestamp
+            merged = merged[np.argsort(merged["ts"], kind="stable")]
+        if overlapping:
+            keep = np.ones(len(merged), dtype=bool)
+            keep[:-1] = merged["ts"][1:] != merged["ts"][:-1]
+            merged = merged[keep]
+        return {name: merged[name] for name in ["ts"] + fields}
+
+    def patients(self) -> Iterable[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return [name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name))]
+
+    def compact(self, now: Optional[datetime] = None) -> int:
+        """
+        Merge hourly segments of settled days into sorted daily segments.
+
+        Returns:
+            Number of hourly segments compacted
+        """
+        cutoff_ms = to_epoch_ms(now or datetime.utcnow()) - self.compact_after_hours * HOUR_MS
+        compacted = 0
+        for patient_id in self.patients():
+            days: Dict[int, List[Segment]] = {}
+            daily: Dict[int, Segment] = {}
+            for segment in self.segments(patient_id):
+                day = segment.start_ms // DAY_MS * DAY_MS
+                if segment.kind == "D":
+                    daily[day] = segment
+                elif day + DAY_MS <= cutoff_ms:
+                    days.setdefault(day, []).append(segment)
+
+            for day, hourly in days.items():
+                parts = [segment.records() for segment in ([daily[day]] if day in daily else []) + hourly]
+                merged = np.concatenate([np.array(part) for part in parts])
+                merged = merged[np.argsort(merged["ts"], kind="stable")]
+                # Keep the last record written for a duplicated timestamp
+                keep = np.ones(len(merged), dtype=bool)
+                keep[:-1] = merged["ts"][1:] != merged["ts"][:-1]
+                merged = merged[keep]
+
+                stamp = datetime.utcfromtimestamp(day / 1000).strftime("%Y%m%d")
+                path = os.path.join(self._patient_dir(patient_id), f"D{stamp}{SEGMENT_SUFFIX}")
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(merged.tobytes())
+                os.replace(tmp_path, path)
+                for segment in hourly:
+                    os.remove(segment.path)
+                compacted += len(hourly)
+        return compacted
+
+    def apply_retention(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete segments that ended before the retention window.
+
+        Returns:
+            Number of segments deleted
+        """
+        cutoff_ms = to_epoch_ms(now or datetime.utcnow()) - self.retention_days * DAY_MS
+        deleted = 0
+        for patient_id in self.patients():
+            segments = self.segments(patient_id)
+            for segment in segments:
+                if segment.end_ms <= cutoff_ms:
+                    os.remove(segment.path)
+                    deleted += 1
+            directory = self._patient_dir(patient_id)
+            if not os.listdir(directory):
+                os.rmdir(directory)
+        return deleted
+
+
+highres_store = HighRateStore() if settings.HIGHRES_STORE_PATH else None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compact and expire the high-rate vitals store")
+    parser.add_argument("--root", default=settings.HIGHRES_STORE_PATH, help="Store directory")
+    parser.add_argument("--skip-compaction", action="store_true", help="Only apply retention")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    store = HighRateStore(root=args.root)
+    compacted = 0 if args.skip_compaction else store.compact()
+    deleted = store.apply_retention()
+    print(f"✅ High-rate store: {compacted} hourly segments compacted, {deleted} segments expired")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Latest Vitals Cache for MedObsMind
+
+The latest observation of each patient (with its NEWS2 / MEWS scores) in a
+Redis hash, vitals:latest:<patient_id>, shared by all worker processes.
+
+Every committed insert is written through (a Lua script keeps whichever of
+the cached and the new observation was observed later, so late readings
+never replace newer ones). Amending the cached observation rewrites it;
+deleting it replaces the hash with a tombstone naming the deleted id, so
+the next read falls back to the database and a racing read cannot put the
+deleted observation back.
+
+Redis is an accelerator only: when it is unreachable, reads return a miss
+and writes are skipped for LATEST_VITALS_CACHE_RETRY_SECONDS, and callers
+serve from the database. An invalidation skipped while Redis is down is
+not replayed; the entry then lives until LATEST_VITALS_CACHE_TTL.
+"""
+
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+import logging
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import redis_client
+from app.core.config import settings
+from app.services.highres_store import to_epoch_ms
+from app.services.recent_vitals import RecentObservation
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "vitals:latest:"
+
+# Hash fields decoded back to numbers / flags (everything else is a string)
+FLOAT_FIELDS = {
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "spo2",
+    "respiratory_rate",
+    "temperature",
+    "oxygen_flow_rate",
+    "news2_score",
+    "mews_score",
+}
+INT_FIELDS = {"news2_components"}
+BOOL_FIELDS = {"supplemental_oxygen"}
+
+# KEYS[1] hash; ARGV[1] ttl, ARGV[2] observed_ms, ARGV[3] id, ARGV[4..] field/value pairs
+PUT_IF_NEWER = """
+if redis.call('HGET', KEYS[1], 'deleted') == ARGV[3] then return 0 end
+local current = redis.call('HGET', KEYS[1], 'observed_ms')
+if current and tonumber(current) > tonumber(ARGV[2]) then return 0 end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 4))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# KEYS[1] hash; ARGV[1] ttl, ARGV[2] id, ARGV[3..] field/value pairs
+REPLACE_IF_SAME = """
+if redis.call('HGET', KEYS[1], 'id') ~= ARGV[2] then return 0 end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# KEYS[1] hash; ARGV[1] ttl, ARGV[2] deleted id
+TOMBSTONE_IF_SAME = """
+if redis.call('HGET', KEYS[1], 'id') ~= ARGV[2] then return 0 end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'deleted', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def encode(observation: RecentObservation) -> List[str]:
+    """Flat field/value list for HSET; None values are left out"""
+    fields = ["observed_ms", str(to_epoch_ms(observation.observed_at))]
+    for name in RecentObservation.__slots__:
+        value = getattr(observation, name)
+        if value is None:
+            continue
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, bool):
+            value = int(value)
+        fields += [name, str(value)]
+    return fields
+
+
+def decode(fields: Dict[str, str]) -> Optional[RecentObservation]:
+    """Observation from a cached hash (None for a missing key or a tombstone)"""
+    if "id" not in fields:
+        return None
+    values = {}
+    for name in RecentObservation.__slots__:
+        value = fields.get(name)
+        if value is None:
+            continue
+        if name == "observed_at":
+            value = datetime.fromisoformat(value)
+        elif name in FLOAT_FIELDS:
+            value = float(value)
+        elif name in INT_FIELDS:
+            value = int(value)
+        elif name in BOOL_FIELDS:
+            value = value == "1"
+        values[name] = value
+    return RecentObservation(**values)
+
+
+class LatestVitalsCache:
+    """
+    Write-through Redis cache of each patient's latest observation.
+
+    Attributes:
+        ttl: Seconds a patient's entry lives without a new observation
+        retry_seconds: Seconds Redis is left alone after an error
+    """
+
+    def __init__(
+        self,
+        client: Redis = redis_client,
+        enabled: bool = settings.LATEST_VITALS_CACHE_ENABLED,
+        ttl: int = settings.LATEST_VITALS_CACHE_TTL,
+        retry_seconds: float = settings.LATEST_VITALS_CACHE_RETRY_SECONDS
+    ):
+        self.client = client
+        self.enabled = enabled
+        self.ttl = ttl
+        self.retry_seconds = retry_seconds
+        self._put_if_newer = client.register_script(PUT_IF_NEWER)
+        self._replace_if_same = client.register_script(REPLACE_IF_SAME)
+        self._tombstone_if_same = client.register_script(TOMBSTONE_IF_SAME)
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and time.monotonic() >= self._down_until
+
+    def _failed(self, action: str, error: Exception) -> None:
+        if self.available:
+            logger.warning(f"Latest vitals cache {action} failed, bypassing Redis for {self.retry_seconds}s: {error}")
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    async def get(self, patient_id) -> Optional[RecentObservation]:
+        """Cached latest observation, or None on a miss"""
+        return (await self.get_many([patient_id])).get(str(patient_id))
+
+    async def get_many(self, patient_ids: Iterable) -> Dict[str, Optional[RecentObservation]]:
+        """
+        Latest observation of several patients in one round trip.
+
+        Returns:
+            Observation (or None on a miss) per patient id, as str
+        """
+        keys = [str(patient_id) for patient_id in patient_ids]
+        if not keys or not self.available:
+            return {key: None for key in keys}
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hgetall(KEY_PREFIX + key)
+                hashes = await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._failed("read", e)
+            return {key: None for key in keys}
+        return {key: decode(fields) for key, fields in zip(keys, hashes)}
+
+    async def put_many(self, observations: Iterable[RecentObservation]) -> None:
+        """Cache observations unless a later one is already cached for the patient"""
+        observations = list(observations)
+        if not observations or not self.available:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for observation in observations:
+                    await self._put_if_newer(
+                        keys=[KEY_PREFIX + observation.patient_id],
+                        args=[self.ttl, to_epoch_ms(observation.observed_at), observation.id] + encode(observation),
+                        client=pipe
+                    )
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._failed("write", e)
+
+    async def replace(self, observation: RecentObservation) -> None:
+        """Rewrite an amended observation if it is the cached one"""
+        if not self.available:
+            return
+        try:
+            await self._replace_if_same(
+                keys=[KEY_PREFIX + observation.patient_id],
+                args=[self.ttl, observation.id] + encode(observation)
+            )
+        except (RedisError, OSError) as e:
+            self._failed("write", e)
+
+    async def discard(self, patient_id, vitals_id) -> None:
+        """Drop a deleted observation if it is the cached one"""
+        if not self.available:
+            return
+        try:
+            await self._tombstone_if_same(keys=[KEY_PREFIX + str(patient_id)], args=[self.ttl, str(vitals_id)])
+        except (RedisError, OSError) as e:
+            self._failed("write", e)
+
+
+latest_vitals_cache = LatestVitalsCache()
@@ -0,0 +1,329 @@
+"""
+Vitals Partition Management for MedObsMind
+
+vitals_observations is range-partitioned by observed_at into monthly
+partitions (vitals_observations_y2026m10, ...), so time-bounded reads only
+touch the months they cover and expiring old data is a DROP TABLE instead
+of a bulk DELETE.
+
+- ensure_partitions() creates the partitions for the current month and
+  VITALS_PARTITION_MONTHS_AHEAD months ahead (run at startup and from the
+  CLI, e.g. monthly from cron), plus a DEFAULT partition that catches
+  observations outside every range (imports of old records, device clocks
+  set in the future). Rows the DEFAULT partition holds for a month being
+  created are moved into the new partition; a month that still cannot be
+  created is logged and skipped, never failing startup.
+- apply_retention() archives partitions that ended more than
+  VITALS_RETENTION_MONTHS ago to a gzip CSV in VITALS_ARCHIVE_DIR (when
+  one is set) while they are still attached, then detaches and drops each
+  in a short transaction, so ingest and reads are only blocked for the
+  DETACH itself. Rows of the DEFAULT partition older than the window are
+  archived and deleted the same way. Rollups (app.services.vitals_rollups)
+  are kept.
+
+Usage:
+    python -m app.services.partitions
+    python -m app.services.partitions --retention-months 24 --archive-dir /backups/vitals
+"""
+
+from typing import List, Optional, Tuple
+from datetime import datetime
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.core.database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLE = "vitals_observations"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+PARTITION_PATTERN = re.compile(rf"^{PARTITIONED_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITIONED_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    """Month a partition covers, from its name (None for the default partition)"""
+    match = PARTITION_PATTERN.match(name)
+    return datetime(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    result = await conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :table"
+        ),
+        {"table": PARTITIONED_TABLE}
+    )
+    return result.first() is not None
+
+
+async def list_partitions(conn: AsyncConnection) -> List[str]:
+    """Names of the attached partitions"""
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table ORDER BY c.relname"
+        ),
+        {"table": PARTITIONED_TABLE}
+    )
+    return list(result.scalars())
+
+
+async def ensure_partitions(
+    conn: AsyncConnection,
+    now: Optional[datetime] = None,
+    months_ahead: int = settings.VITALS_PARTITION_MONTHS_AHEAD
+) -> List[str]:
+    """
+    Create missing monthly partitions from this month to months_ahead.
+
+    Returns:
+        Names of the partitions created
+    """
+    if not await is_partitioned(conn):
+        logger.warning(f"{PARTITIONED_TABLE} is not partitioned; run the partitioning migration")
+        return []
+
+    existing = set(await list_partitions(conn))
+    created = []
+    current = month_start(now or datetime.utcnow())
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        try:
+            # Savepoint: a failure leaves the caller's transaction usable
+            async with conn.begin_nested():
+                await create_partition(conn, month, has_default=DEFAULT_PARTITION in existing)
+        except DBAPIError as e:
+            logger.error(f"Could not create vitals partition {name}: {e.orig}")
+            continue
+        created.append(name)
+    if DEFAULT_PARTITION not in existing:
+        await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARTITIONED_TABLE} DEFAULT"))
+        created.append(DEFAULT_PARTITION)
+    if created:
+        logger.info(f"Created vitals partitions: {', '.join(created)}")
+    return created
+
+
+async def create_partition(conn: AsyncConnection, month: datetime, has_default: bool = True) -> None:
+    """
+    Create one month's partition.
+
+    If the DEFAULT partition already holds rows of that month, CREATE ...
+    PARTITION OF would violate its constraint, so the partition is built
+    as a plain table, the rows are moved into it and it is attached.
+    """
+    name = partition_name(month)
+    bounds = f"FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+    in_month = f"observed_at >= '{month:%Y-%m-%d}' AND observed_at < '{add_months(month, 1):%Y-%m-%d}'"
+    if has_default:
+        result = await conn.execute(text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month} LIMIT 1"))
+        if result.first() is not None:
+            await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            moved = await conn.execute(text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_month} RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ))
+            await conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+            logger.info(f"Moved {moved.rowcount} rows from {DEFAULT_PARTITION} into {name}")
+            return
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARTITIONED_TABLE} FOR VALUES {bounds}"))
+
+
+async def archive_partition(conn: AsyncConnection, name: str, archive_dir: str, query: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Stream a partition (or the rows of query) to <archive_dir>/<name>.csv.gz
+    with COPY (constant memory).
+
+    Returns:
+        (path of the archive, rows archived)
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    tmp_path = f"{path}.tmp"
+    raw = (await conn.get_raw_connection()).driver_connection
+    with gzip.open(tmp_path, "wb") as archive:
+        if query is None:
+            status = await raw.copy_from_table(name, output=archive, format="csv", header=True)
+        else:
+            status = await raw.copy_from_query(query, output=archive, format="csv", header=True)
+    os.replace(tmp_path, path)
+    return path, int(status.split()[-1])
+
+
+async def apply_retention(
+    engine: AsyncEngine = default_engine,
+    now: Optional[datetime] = None,
+    retention_months: int = settings.VITALS_RETENTION_MONTHS,
+    archive_dir: str = settings.VITALS_ARCHIVE_DIR,
+    dry_run: bool = False
+) -> List[str]:
+    """
+    Archive (optionally), detach and drop partitions that ended before the
+    retention window, then expire the DEFAULT partition's rows older than it.
+
+    A partition is archived while still attached (COPY only takes a share
+    lock, so ingest and reads go on) and then detached in a transaction of
+    its own, the only step that locks vitals_observations. Rows that
+    reached it after the archive are archived again from the detached
+    table before it is dropped. Expired tables left detached by an
+    interrupted run are archived and dropped by the next one; a failed
+    archive of an attached partition leaves it attached.
+
+    Returns:
+        Names of the partitions expired
+    """
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(now or datetime.utcnow()), -retention_months)
+    async with engine.connect() as conn:
+        names = await list_partitions(conn)
+        detached = await list_detached(conn)
+
+    def is_expired(name: str) -> bool:
+        return partition_month(name) is not None and add_months(partition_month(name), 1) <= cutoff
+
+    expired = [name for name in names if is_expired(name)]
+    leftovers = [name for name in detached if is_expired(name)]
+    if dry_run:
+        for name in expired + leftovers:
+            logger.info(f"Would expire {name}")
+        if DEFAULT_PARTITION in names:
+            await expire_default_rows(engine, cutoff, archive_dir, dry_run=True)
+        return expired + leftovers
+
+    for name in expired:
+        archived = None
+        if archive_dir:
+            async with engine.connect() as conn:
+                path, archived = await archive_partition(conn, name, archive_dir)
+            logger.info(f"Archived {archived} rows of {name} to {path}")
+        async with engine.begin() as conn:
+            # ACCESS EXCLUSIVE on vitals_observations until this commits
+            await conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"))
+        await drop_detached(engine, name, archive_dir, archived)
+
+    for name in leftovers:
+        await drop_detached(engine, name, archive_dir)
+
+    if DEFAULT_PARTITION in names:
+        await expire_default_rows(engine, cutoff, archive_dir)
+    return expired + leftovers
+
+
+async def list_detached(conn: AsyncConnection) -> List[str]:
+    """Monthly vitals tables that are not attached (left by an interrupted retention run)"""
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_class c "
+        "WHERE c.relkind = 'r' AND c.relname LIKE :prefix AND NOT c.relispartition ORDER BY c.relname"
+    ), {"prefix": f"{PARTITIONED_TABLE}_y%"})
+    return [name for name in result.scalars() if partition_month(name) is not None]
+
+
+async def drop_detached(engine: AsyncEngine, name: str, archive_dir: str, archived: Optional[int] = None) -> None:
+    """Archive a detached partition unless an archive already holds all its rows, then drop it"""
+    if archive_dir:
+        async with engine.connect() as conn:
+            rows = (await conn.execute(text(f"SELECT count(*) FROM {name}"))).scalar()
+            if rows != archived:
+                # Nothing writes to a detached table, so this archive is complete
+                path, archived = await archive_partition(conn, name, archive_dir)
+                logger.info(f"Archived {archived} rows of {name} to {path}")
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE {name}"))
+    logger.info(f"Dropped expired partition {name}")
+
+
+async def expire_default_rows(engine: AsyncEngine, cutoff: datetime, archive_dir: str, dry_run: bool = False) -> int:
+    """
+    Archive (optionally) and delete DEFAULT partition rows observed before
+    cutoff. Repeatable read makes the DELETE see exactly the rows the COPY
+    archived; rows inserted meanwhile wait for the next run.
+
+    Returns:
+        Rows deleted
+    """
+    older = f"observed_at < '{cutoff:%Y-%m-%d}'"
+    if dry_run:
+        async with engine.connect() as conn:
+            rows = (await conn.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {older}"))).scalar()
+        logger.info(f"Would expire {rows} rows of {DEFAULT_PARTITION}")
+        return 0
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="REPEATABLE READ")
+        async with conn.begin():
+            rows = (await conn.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {older}"))).scalar()
+            if not rows:
+                return 0
+            if archive_dir:
+                # Timestamped, so a later run never overwrites an earlier archive
+                name = f"{DEFAULT_PARTITION}_before_{cutoff:%Y%m}_{datetime.utcnow():%Y%m%d%H%M%S}"
+                path, archived = await archive_partition(
+                    conn, name, archive_dir, query=f"SELECT * FROM {DEFAULT_PARTITION} WHERE {older}"
+                )
+                logger.info(f"Archived {archived} rows of {DEFAULT_PARTITION} to {path}")
+            result = await conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {older}"))
+    logger.info(f"Deleted {result.rowcount} expired rows from {DEFAULT_PARTITION}")
+    return result.rowcount
+
+
+async def maintain(
+    engine: AsyncEngine = default_engine,
+    months_ahead: int = settings.VITALS_PARTITION_MONTHS_AHEAD,
+    retention_months: int = settings.VITALS_RETENTION_MONTHS,
+    archive_dir: str = settings.VITALS_ARCHIVE_DIR,
+    dry_run: bool = False
+):
+    async with engine.begin() as conn:
+        created = [] if dry_run else await ensure_partitions(conn, months_ahead=months_ahead)
+    expired = await apply_retention(engine, retention_months=retention_months, archive_dir=archive_dir, dry_run=dry_run)
+    return created, expired
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Create upcoming and expire old vitals_observations partitions")
+    parser.add_argument("--months-ahead", type=int, default=settings.VITALS_PARTITION_MONTHS_AHEAD, help="Months of partitions to create ahead")
+    parser.add_argument("--retention-months", type=int, default=settings.VITALS_RETENTION_MONTHS, help="Months of partitions to keep (0 = all)")
+    parser.add_argument("--archive-dir", default=settings.VITALS_ARCHIVE_DIR, help="Archive expired partitions here before dropping")
+    parser.add_argument("--dry-run", action="store_true", help="Only report partitions that would expire")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    created, expired = asyncio.run(maintain(
+        months_ahead=args.months_ahead,
+        retention_months=args.retention_months,
+        archive_dir=args.archive_dir,
+        dry_run=args.dry_run
+    ))
+    print(f"✅ Vitals partitions: {len(created)} created, {len(expired)} expired")
+
+
+if __name__ == "__main__":
+    main()
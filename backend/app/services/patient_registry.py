@@ -0,0 +1,117 @@
+"""
+Patient Registry for MedObsMind
+
+In-memory set of active patient IDs, so write paths (vitals ingestion,
+manual alerts) can skip the Patient SELECT they would otherwise run only
+to return a 404.
+
+The set is loaded at startup (which also primes the scoring profile cache
+with the same query), reloaded every SCORING_PROFILE_CACHE_TTL seconds by
+refresh_forever() and kept current from Patient insert, update
+(discharge / transfer) and delete events in this process. Vitals ingestion
+takes the scoring profiles of registered patients from the cache without
+a Patient SELECT, since the reload keeps them fresh. It is a positive
+cache only: an ID that is not in the set is still looked up in the
+database, so patients created by another worker are never refused. IDs
+that are in the set but were deleted elsewhere reach the INSERT, where
+the foreign key rejects them; callers map that violation to the same 404.
+
+A plain set is used rather than a Bloom filter: ~100k active patients cost
+a few MB, and a set has no false positives to fall back on.
+"""
+
+from typing import Set
+import asyncio
+import logging
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+
+from app.models.patient import Patient
+from app.services.scoring_profiles import resolve_profile, scoring_profiles
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUS = "active"
+
+
+class PatientRegistry:
+    """Set of patient IDs known to exist and be active"""
+
+    def __init__(self):
+        self._ids: Set[str] = set()
+
+    def __contains__(self, patient_id) -> bool:
+        return str(patient_id) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, patient_id) -> None:
+        self._ids.add(str(patient_id))
+
+    def discard(self, patient_id) -> None:
+        self._ids.discard(str(patient_id))
+
+    async def load(self, db: AsyncSession) -> int:
+        """
+        Load every active patient, priming the scoring profile cache too.
+
+        Returns:
+            Number of active patients
+        """
+        result = await db.execute(
+            select(Patient.id, Patient.ward, Patient.extra_metadata).where(Patient.is_active == ACTIVE_STATUS)
+        )
+        ids = set()
+        for row in result:
+            ids.add(str(row.id))
+            scoring_profiles.put(row.id, resolve_profile(row))
+        self._ids = ids
+        logger.info(f"Patient registry loaded {len(ids)} active patients")
+        return len(ids)
+
+    async def refresh_forever(
+        self,
+        session_factory: async_sessionmaker,
+        interval: float = settings.SCORING_PROFILE_CACHE_TTL
+    ) -> None:
+        """Reload the registry and the profiles it primes every interval seconds (run as a task)"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as db:
+                    await self.load(db)
+            except Exception as e:
+                logger.warning(f"Patient registry refresh failed: {e}")
+
+    async def exists(self, db: AsyncSession, patient_id) -> bool:
+        """True if the patient exists; only queries on a registry miss"""
+        if patient_id in self:
+            return True
+        result = await db.execute(select(Patient.id, Patient.is_active).where(Patient.id == patient_id))
+        row = result.one_or_none()
+        if row is None:
+            return False
+        if row.is_active == ACTIVE_STATUS:
+            self.add(row.id)
+        return True
+
+
+patient_registry = PatientRegistry()
+
+
+@event.listens_for(Patient, "after_insert")
+@event.listens_for(Patient, "after_update")
+def _track_patient(mapper, connection, patient: Patient) -> None:
+    if patient.is_active in (None, ACTIVE_STATUS):
+        patient_registry.add(patient.id)
+    else:
+        patient_registry.discard(patient.id)
+
+
+@event.listens_for(Patient, "after_delete")
+def _forget_patient(mapper, connection, patient: Patient) -> None:
+    patient_registry.discard(patient.id)
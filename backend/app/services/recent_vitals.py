@@ -0,0 +1,339 @@
+"""
+Recent Vitals Buffer for MedObsMind
+
+Dashboards poll the latest / history / trend endpoints for the same few
+hundred active patients. This keeps a bounded, time-ordered ring of each
+polled patient's last RECENT_VITALS_HOURS of observations in memory, so
+those reads are answered without a query when the requested window fits.
+
+A patient's ring is loaded from the database on first read and then kept
+current by the ingestor (every committed insert), amend and delete. It
+knows the earliest time from which it is complete (covered_since), and
+whether older observations exist; reads reaching further back return None
+and the caller queries the database.
+
+Amend and delete also announce the patient on a Redis pub/sub channel;
+every worker runs listen_forever() and drops its ring for that patient.
+Inserts made by other worker processes are only seen when a ring is
+reloaded, at most RECENT_VITALS_REFRESH_SECONDS after its last load, and
+so are amendments announced while Redis was unreachable.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import asyncio
+import bisect
+import logging
+import time
+import uuid
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select, and_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import redis_client
+from app.core.config import settings
+from app.ml.news2 import unpack_components
+from app.models.vitals import VitalsObservation
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub channel of "<origin> <patient_id>" messages: that patient's stored
+# observations were amended or deleted by the worker named origin
+INVALIDATION_CHANNEL = "vitals:recent:invalidate"
+
+
+class RecentObservation:
+    """Read-only copy of one stored observation (attribute names follow VitalsResponse)"""
+
+    __slots__ = (
+        "id",
+        "patient_id",
+        "observed_at",
+        "heart_rate",
+        "systolic_bp",
+        "diastolic_bp",
+        "spo2",
+        "respiratory_rate",
+        "temperature",
+        "consciousness_level",
+        "supplemental_oxygen",
+        "oxygen_flow_rate",
+        "news2_score",
+        "news2_components",
+        "mews_score",
+        "notes",
+        "data_source",
+        "recorded_by",
+    )
+
+    def __init__(self, **values: Any):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "RecentObservation":
+        """From the column values the ingestor inserted"""
+        values = {name: row.get(name) for name in cls.__slots__}
+        values.update(
+            id=str(row["id"]),
+            patient_id=str(row["patient_id"]),
+            data_source=row.get("source"),
+            recorded_by=str(row["recorded_by"]) if row.get("recorded_by") else None,
+        )
+        return cls(**values)
+
+    @classmethod
+    def from_model(cls, vitals: VitalsObservation) -> "RecentObservation":
+        values = {name: getattr(vitals, name, None) for name in cls.__slots__}
+        values.update(
+            id=str(vitals.id),
+            patient_id=str(vitals.patient_id),
+            data_source=vitals.source,
+            recorded_by=str(vitals.recorded_by) if vitals.recorded_by else None,
+        )
+        return cls(**values)
+
+    @property
+    def recorded_at(self) -> datetime:
+        return self.observed_at
+
+    @property
+    def news2_breakdown(self) -> Optional[Dict[str, int]]:
+        if self.news2_components is None:
+            return None
+        return unpack_components(self.news2_components)
+
+
+class PatientRing:
+    """One patient's recent observations, oldest first"""
+
+    __slots__ = ("observations", "times", "covered_since", "older", "loaded_at")
+
+    def __init__(self, covered_since: datetime):
+        self.observations: List[RecentObservation] = []
+        self.times: List[datetime] = []  # observed_at of each observation, for bisect
+        self.covered_since = covered_since
+        self.older = False  # observations exist before covered_since
+        self.loaded_at: Optional[float] = None  # None while the initial load runs
+
+    def insert(self, observation: RecentObservation) -> None:
+        if observation.observed_at < self.covered_since:
+            self.older = True
+            return
+        position = bisect.bisect_right(self.times, observation.observed_at)
+        self.times.insert(position, observation.observed_at)
+        self.observations.insert(position, observation)
+
+    def remove(self, vitals_id: str) -> bool:
+        for position, observation in enumerate(self.observations):
+            if observation.id == vitals_id:
+                del self.observations[position]
+                del self.times[position]
+                return True
+        return False
+
+    def trim(self, horizon: datetime, max_observations: int) -> None:
+        """Drop what is older than horizon, then the oldest beyond max_observations"""
+        if horizon > self.covered_since:
+            self.covered_since = horizon
+        start = bisect.bisect_left(self.times, self.covered_since)
+        overflow = len(self.times) - start - max_observations
+        if overflow > 0:
+            # Complete only after the newest dropped observation
+            self.covered_since = self.times[start + overflow - 1] + timedelta(microseconds=1)
+            start = bisect.bisect_left(self.times, self.covered_since)
+        if start:
+            self.older = True
+            del self.times[:start]
+            del self.observations[:start]
+
+    def since(self, moment: datetime) -> List[RecentObservation]:
+        return self.observations[bisect.bisect_left(self.times, moment):]
+
+
+class RecentVitalsBuffer:
+    """
+    LRU of per-patient observation rings.
+
+    Attributes:
+        hours: History kept per patient
+        max_observations: Observations kept per patient
+        max_patients: Patients kept before the least recently read is dropped
+        refresh_seconds: Age after which a ring is reloaded from the database
+        origin: Name of this buffer in invalidation messages (its own are ignored)
+    """
+
+    def __init__(
+        self,
+        hours: int = settings.RECENT_VITALS_HOURS,
+        max_observations: int = settings.RECENT_VITALS_MAX_OBSERVATIONS,
+        max_patients: int = settings.RECENT_VITALS_MAX_PATIENTS,
+        refresh_seconds: float = settings.RECENT_VITALS_REFRESH_SECONDS,
+        client: Redis = redis_client
+    ):
+        self.hours = hours
+        self.max_observations = max_observations
+        self.max_patients = max_patients
+        self.refresh_seconds = refresh_seconds
+        self.client = client
+        self.origin = uuid.uuid4().hex
+        self.listening = False
+        self._rings: "OrderedDict[str, PatientRing]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _horizon(self) -> datetime:
+        return datetime.utcnow() - timedelta(hours=self.hours)
+
+    async def window(self, db: AsyncSession, patient_id, since: datetime) -> Optional[List[RecentObservation]]:
+        """
+        Observations at or after since, oldest first.
+
+        Returns:
+            The observations, or None if the window reaches beyond the buffer
+        """
+        ring = await self._ring(db, patient_id)
+        if ring is None or since < ring.covered_since:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ring.since(since)
+
+    def has_older(self, patient_id, moment: datetime) -> bool:
+        """
+        Whether observations before moment exist, for a patient whose
+        window() was just served (True when the buffer cannot tell).
+        """
+        ring = self._rings.get(str(uuid.UUID(str(patient_id))))
+        if ring is None:
+            return True
+        return ring.older or bisect.bisect_left(ring.times, moment) > 0
+
+    async def latest(self, db: AsyncSession, patient_id) -> Optional[RecentObservation]:
+        """Most recent observation, or None if there is none within the buffer"""
+        ring = await self._ring(db, patient_id)
+        if ring is None or not ring.observations:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ring.observations[-1]
+
+    def record(self, observations: Iterable[RecentObservation]) -> None:
+        """Add committed observations to the rings of buffered patients"""
+        horizon = self._horizon()
+        for observation in observations:
+            ring = self._rings.get(observation.patient_id)
+            if ring is not None:
+                ring.insert(observation)
+                ring.trim(horizon, self.max_observations)
+
+    def update(self, vitals: VitalsObservation) -> None:
+        """Replace an amended observation"""
+        ring = self._rings.get(str(vitals.patient_id))
+        if ring is not None:
+            ring.remove(str(vitals.id))
+            ring.insert(RecentObservation.from_model(vitals))
+
+    def remove(self, patient_id, vitals_id) -> None:
+        """Forget a deleted observation"""
+        ring = self._rings.get(str(patient_id))
+        if ring is not None:
+            ring.remove(str(vitals_id))
+
+    def invalidate(self, patient_id=None) -> None:
+        if patient_id is None:
+            self._rings.clear()
+        else:
+            self._rings.pop(str(patient_id), None)
+
+    async def announce_change(self, patient_id) -> None:
+        """Tell the other workers a patient's stored observations were amended or deleted"""
+        try:
+            await self.client.publish(INVALIDATION_CHANNEL, f"{self.origin} {patient_id}")
+        except (RedisError, OSError) as e:
+            logger.warning(f"Could not announce the vitals change of patient {patient_id}: {e}")
+
+    async def listen_forever(self, retry_seconds: float = 5.0) -> None:
+        """Drop the rings other workers announce changes for (run as a background task)"""
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    # Announcements made while unsubscribed were missed
+                    self.invalidate()
+                    self.listening = True
+                    while True:
+                        # Polled: a blocking read would hit the client's socket timeout
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is None:
+                            continue
+                        origin, _, patient_id = message["data"].partition(" ")
+                        if origin != self.origin:
+                            self.invalidate(patient_id)
+            except (RedisError, OSError) as e:
+                logger.warning(f"Recent vitals invalidation channel lost, retrying in {retry_seconds}s: {e}")
+            finally:
+                self.listening = False
+            await asyncio.sleep(retry_seconds)
+
+    async def _ring(self, db: AsyncSession, patient_id) -> Optional[PatientRing]:
+        try:
+            key = str(uuid.UUID(str(patient_id)))
+        except ValueError:
+            return None
+        ring = self._rings.get(key)
+        if ring is not None and ring.loaded_at is not None and time.monotonic() - ring.loaded_at <= self.refresh_seconds:
+            self._rings.move_to_end(key)
+            return ring
+        return await self._load(db, key)
+
+    async def _load(self, db: AsyncSession, key: str) -> PatientRing:
+        horizon = self._horizon()
+        ring = PatientRing(horizon)
+        # Registered before the query so inserts committed meanwhile are not lost
+        self._rings[key] = ring
+        self._rings.move_to_end(key)
+        while len(self._rings) > self.max_patients:
+            self._rings.popitem(last=False)
+
+        try:
+            result = await db.execute(
+                select(VitalsObservation)
+                .where(
+                    and_(
+                        VitalsObservation.patient_id == uuid.UUID(key),
+                        VitalsObservation.observed_at >= horizon
+                    )
+                )
+                .order_by(desc(VitalsObservation.observed_at))
+                .limit(self.max_observations + 1)
+            )
+            if not ring.older:
+                older = await db.execute(
+                    select(VitalsObservation.id)
+                    .where(
+                        and_(
+                            VitalsObservation.patient_id == uuid.UUID(key),
+                            VitalsObservation.observed_at < horizon
+                        )
+                    )
+                    .limit(1)
+                )
+                ring.older = older.first() is not None
+        except Exception:
+            self._rings.pop(key, None)
+            raise
+
+        recorded = {observation.id for observation in ring.observations}
+        for vitals in result.scalars():
+            if str(vitals.id) not in recorded:
+                ring.insert(RecentObservation.from_model(vitals))
+        ring.trim(horizon, self.max_observations)
+        ring.loaded_at = time.monotonic()
+        return ring
+
+
+recent_vitals = RecentVitalsBuffer()
@@ -0,0 +1,223 @@
+"""
+Scoring Profiles for MedObsMind
+
+Resolves the per-patient parameters the scoring engine needs - SpO2
+Scale 2 for hypercapnic patients and NEWS2 risk thresholds - from patient
+metadata and ward configuration, and keeps them in an in-process cache so
+ingest does not re-derive them (or re-read the patient) per observation.
+
+Precedence for NEWS2 thresholds: patient metadata, then
+settings.NEWS2_WARD_THRESHOLDS for the patient's ward, then the global
+NEWS2_*_RISK_THRESHOLD settings.
+
+Patient metadata keys:
+    spo2_scale: 2 to score SpO2 on Scale 2
+    hypercapnic_respiratory_failure: true also selects Scale 2
+    news2_thresholds: {"medium": int, "high": int} (integer strings accepted;
+        invalid overrides are ignored with a warning)
+
+Cached profiles are dropped whenever a Patient row is updated or deleted
+in this process, and expire after SCORING_PROFILE_CACHE_TTL seconds so
+changes made by other workers are picked up. Patients in the patient
+registry are the exception: the registry reloads their profiles every
+SCORING_PROFILE_CACHE_TTL seconds in the background, so get_many() keeps
+serving them from the cache instead of re-reading the patient.
+"""
+
+from typing import Container, Dict, Optional
+from collections import OrderedDict
+import logging
+import time
+import uuid
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.ml.scoring import ScoringProfile
+from app.models.patient import Patient
+
+logger = logging.getLogger(__name__)
+
+
+def _threshold_overrides(overrides, source: str) -> Dict[str, int]:
+    """
+    Validate NEWS2 threshold overrides from free-form configuration.
+
+    Values may be integers or integer strings ("5"); anything else makes
+    the whole override ignored (with a warning) rather than failing the
+    patient's scoring.
+    """
+    if not overrides:
+        return {}
+    if not isinstance(overrides, dict):
+        logger.warning(f"Ignoring NEWS2 threshold overrides for {source}: expected an object, got {overrides!r}")
+        return {}
+    coerced = {}
+    for key in ("medium", "high"):
+        if key not in overrides:
+            continue
+        value = overrides[key]
+        try:
+            if isinstance(value, bool):
+                raise ValueError
+            number = float(value)
+        except (TypeError, ValueError):
+            number = None
+        if number is None or not number.is_integer() or number < 1:
+            logger.warning(f"Ignoring NEWS2 threshold overrides for {source}: {key} {value!r} is not a positive integer")
+            return {}
+        coerced[key] = int(number)
+    return coerced
+
+
+def resolve_profile(patient: Patient) -> ScoringProfile:
+    """
+    Build a scoring profile from a patient row.
+
+    Invalid threshold overrides (non-numeric, or medium above high) are
+    ignored with a warning, falling back to the ward, then global,
+    thresholds.
+
+    Args:
+        patient: Loaded Patient
+
+    Returns:
+        ScoringProfile with the patient's SpO2 scale and NEWS2 thresholds
+    """
+    metadata = patient.extra_metadata if isinstance(patient.extra_metadata, dict) else {}
+    thresholds = {
+        "medium": settings.NEWS2_MEDIUM_RISK_THRESHOLD,
+        "high": settings.NEWS2_HIGH_RISK_THRESHOLD,
+    }
+    layers = (
+        (f"ward {patient.ward}", settings.NEWS2_WARD_THRESHOLDS.get(patient.ward or "")),
+        (f"patient {patient.id}", metadata.get("news2_thresholds")),
+    )
+    for source, overrides in layers:
+        merged = {**thresholds, **_threshold_overrides(overrides, source)}
+        if merged["medium"] > merged["high"]:
+            logger.warning(
+                f"Ignoring NEWS2 threshold overrides for {source}: "
+                f"medium {merged['medium']} > high {merged['high']}"
+            )
+            continue
+        thresholds = merged
+
+    use_scale_2 = (
+        str(metadata.get("spo2_scale", "")) == "2"
+        or bool(metadata.get("hypercapnic_respiratory_failure"))
+    )
+
+    return ScoringProfile(
+        use_scale_2=use_scale_2,
+        news2_medium_risk_threshold=thresholds["medium"],
+        news2_high_risk_threshold=thresholds["high"]
+    )
+
+
+class ScoringProfileCache:
+    """
+    In-process LRU cache of scoring profiles keyed by patient id.
+
+    Attributes:
+        ttl: Seconds before a cached profile is reloaded
+        max_entries: Profiles kept before the least recently used is evicted
+    """
+
+    def __init__(self, ttl: float = settings.SCORING_PROFILE_CACHE_TTL, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # patient id -> (loaded_at, profile)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_cached(self, patient_id, allow_expired: bool = False) -> Optional[ScoringProfile]:
+        """Cached profile for a patient, or None if absent (or expired, unless allow_expired)"""
+        key = str(patient_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        loaded_at, profile = entry
+        if not allow_expired and time.monotonic() - loaded_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return profile
+
+    def put(self, patient_id, profile: ScoringProfile) -> ScoringProfile:
+        key = str(patient_id)
+        self._entries[key] = (time.monotonic(), profile)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return profile
+
+    def for_patient(self, patient: Patient) -> ScoringProfile:
+        """Profile for an already loaded patient, resolving it on a cache miss"""
+        profile = self.get_cached(patient.id)
+        if profile is None:
+            profile = self.put(patient.id, resolve_profile(patient))
+        return profile
+
+    async def get(self, db: AsyncSession, patient_id) -> Optional[ScoringProfile]:
+        """
+        Profile for a patient id, loading the patient only on a cache miss.
+
+        Returns:
+            ScoringProfile, or None if the patient does not exist
+        """
+        profile = self.get_cached(patient_id)
+        if profile is not None:
+            return profile
+        result = await db.execute(select(Patient).where(Patient.id == patient_id))
+        patient = result.scalar_one_or_none()
+        if patient is None:
+            return None
+        return self.put(patient.id, resolve_profile(patient))
+
+    async def get_many(self, db: AsyncSession, patient_ids, known: Container = ()) -> Dict[str, ScoringProfile]:
+        """
+        Profiles for several patients with one SELECT for all cache misses.
+
+        Args:
+            db: Database session
+            patient_ids: Patients to resolve
+            known: Patient ids kept fresh elsewhere (the patient registry),
+                whose cached profiles are used even past the TTL
+
+        Returns:
+            Profile per patient id (as str); unknown patients are absent
+        """
+        profiles = {}
+        missing = set()
+        for patient_id in {str(patient_id) for patient_id in patient_ids}:
+            profile = self.get_cached(patient_id, allow_expired=patient_id in known)
+            if profile is None:
+                missing.add(patient_id)
+            else:
+                profiles[patient_id] = profile
+
+        if missing:
+            result = await db.execute(select(Patient).where(Patient.id.in_([uuid.UUID(pid) for pid in missing])))
+            for patient in result.scalars():
+                profiles[str(patient.id)] = self.put(patient.id, resolve_profile(patient))
+        return profiles
+
+    def invalidate(self, patient_id=None) -> None:
+        """Drop one patient's profile, or every profile when no id is given"""
+        if patient_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(str(patient_id), None)
+
+
+scoring_profiles = ScoringProfileCache()
+
+
+@event.listens_for(Patient, "after_update")
+@event.listens_for(Patient, "after_delete")
+def _invalidate_patient_profile(mapper, connection, patient: Patient) -> None:
+    """Any change to a patient row (ward, metadata) invalidates its profile"""
+    scoring_profiles.invalidate(patient.id)
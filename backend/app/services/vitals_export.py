@@ -0,0 +1,228 @@
+"""
+Vitals Export for MedObsMind
+
+Streams vitals_observations (optionally filtered by ward, patients and
+time range) as Apache Arrow for research and ML pipelines:
+
+- "arrow": an Arrow IPC stream, one record batch per chunk, zstd-compressed;
+- "parquet": a Parquet file, one row group per chunk, zstd-compressed.
+
+Rows come from a server-side cursor EXPORT_BATCH_SIZE at a time, and each
+encoded chunk is handed to the caller before the next is read, so memory
+use does not grow with the export. Repetitive text columns (patient id,
+ward, AVPU, source, device) are dictionary-encoded. Free-text notes and
+metadata are not exported.
+
+Usage:
+    python -m app.services.vitals_export --output vitals.parquet --ward ICU --start 2026-01-01
+    python -m app.services.vitals_export --format arrow --output vitals.arrows --patient-id <uuid>
+"""
+
+from typing import AsyncIterator, List, Optional, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+import argparse
+import asyncio
+import io
+import logging
+import uuid
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.database import engine as default_engine
+from app.models.patient import Patient
+from app.models.vitals import VitalsObservation
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_EXTENSIONS = {
+    "arrow": "arrows",
+    "parquet": "parquet",
+}
+
+COMPRESSION = "zstd"
+
+_category = pa.dictionary(pa.int32(), pa.string())
+
+# Exported columns, in order: (name, source column, Arrow type)
+EXPORT_COLUMNS = (
+    ("id", VitalsObservation.id, pa.string()),
+    ("patient_id", VitalsObservation.patient_id, _category),
+    ("ward", Patient.ward, _category),
+    ("observed_at", VitalsObservation.observed_at, pa.timestamp("us")),
+    ("heart_rate", VitalsObservation.heart_rate, pa.float32()),
+    ("systolic_bp", VitalsObservation.systolic_bp, pa.float32()),
+    ("diastolic_bp", VitalsObservation.diastolic_bp, pa.float32()),
+    ("spo2", VitalsObservation.spo2, pa.float32()),
+    ("respiratory_rate", VitalsObservation.respiratory_rate, pa.float32()),
+    ("temperature", VitalsObservation.temperature, pa.float32()),
+    ("consciousness_level", VitalsObservation.consciousness_level, _category),
+    ("supplemental_oxygen", VitalsObservation.supplemental_oxygen, pa.bool_()),
+    ("oxygen_flow_rate", VitalsObservation.oxygen_flow_rate, pa.float32()),
+    ("news2_score", VitalsObservation.news2_score, pa.float32()),
+    ("news2_components", VitalsObservation.news2_components, pa.int32()),
+    ("mews_score", VitalsObservation.mews_score, pa.float32()),
+    ("mews_components", VitalsObservation.mews_components, pa.int32()),
+    ("source", VitalsObservation.source, _category),
+    ("device_id", VitalsObservation.device_id, _category),
+    ("is_valid", VitalsObservation.is_valid, pa.bool_()),
+)
+
+EXPORT_SCHEMA = pa.schema([(name, arrow_type) for name, _, arrow_type in EXPORT_COLUMNS])
+
+
+@dataclass
+class ExportFilter:
+    """Rows to export (every filter is optional)"""
+    ward: Optional[str] = None
+    patient_ids: List[uuid.UUID] = field(default_factory=list)
+    start: Optional[datetime] = None  # inclusive
+    end: Optional[datetime] = None    # exclusive
+
+    def apply(self, query: Select) -> Select:
+        if self.ward is not None:
+            query = query.where(Patient.ward == self.ward)
+        if self.patient_ids:
+            query = query.where(VitalsObservation.patient_id.in_(self.patient_ids))
+        # Time bounds limit the scan to the partitions of those months
+        if self.start is not None:
+            query = query.where(VitalsObservation.observed_at >= self.start)
+        if self.end is not None:
+            query = query.where(VitalsObservation.observed_at < self.end)
+        return query
+
+
+def export_query(filters: ExportFilter) -> Select:
+    """Export rows in observed_at order (read from the observed_at index, partition by partition)"""
+    query = (
+        select(*(column for _, column, _ in EXPORT_COLUMNS))
+        .join(Patient, Patient.id == VitalsObservation.patient_id)
+        .order_by(VitalsObservation.observed_at)
+    )
+    return filters.apply(query)
+
+
+def to_record_batch(rows: Sequence) -> pa.RecordBatch:
+    """Record batch of EXPORT_SCHEMA from result rows"""
+    arrays = []
+    for position, (name, _, arrow_type) in enumerate(EXPORT_COLUMNS):
+        values = [row[position] for row in rows]
+        if name in ("id", "patient_id"):
+            values = [str(value) for value in values]
+        if pa.types.is_dictionary(arrow_type):
+            arrays.append(pa.array(values, type=arrow_type.value_type).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=arrow_type))
+    return pa.RecordBatch.from_arrays(arrays, schema=EXPORT_SCHEMA)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last take()"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet records absolute offsets in its footer
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _Encoder:
+    """Incremental Arrow IPC / Parquet writer over a _ChunkSink"""
+
+    def __init__(self, fmt: str):
+        self.sink = _ChunkSink()
+        stream = pa.PythonFile(self.sink, mode="w")
+        if fmt == "parquet":
+            self.writer = pq.ParquetWriter(stream, EXPORT_SCHEMA, compression=COMPRESSION, use_dictionary=True)
+        else:
+            # Each batch brings its own dictionaries, which the stream format allows
+            self.writer = pa.ipc.new_stream(stream, EXPORT_SCHEMA, options=pa.ipc.IpcWriteOptions(compression=COMPRESSION))
+
+    def encode(self, rows: Sequence) -> bytes:
+        self.writer.write_batch(to_record_batch(rows))
+        return self.sink.take()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.sink.take()
+
+
+async def export_vitals(
+    filters: ExportFilter,
+    fmt: str = "parquet",
+    batch_size: int = settings.EXPORT_BATCH_SIZE,
+    engine: AsyncEngine = default_engine
+) -> AsyncIterator[bytes]:
+    """
+    Encoded export, chunk by chunk.
+
+    Rows are read through a server-side cursor batch_size at a time;
+    encoding and compression run in a worker thread so the event loop
+    keeps serving other requests.
+
+    Yields:
+        Consecutive pieces of the Arrow IPC stream / Parquet file
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    encoder = _Encoder(fmt)
+    rows_exported = 0
+    async with engine.connect() as conn:
+        result = await conn.stream(export_query(filters).execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield await asyncio.to_thread(encoder.encode, rows)
+            rows_exported += len(rows)
+    yield encoder.close()
+    logger.info(f"Exported {rows_exported} vitals observations as {fmt}")
+
+
+async def export_to_file(path: str, filters: ExportFilter, fmt: str, batch_size: int = settings.EXPORT_BATCH_SIZE) -> None:
+    with open(path, "wb") as output:
+        async for chunk in export_vitals(filters, fmt, batch_size):
+            output.write(chunk)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export vitals observations as Arrow IPC or Parquet")
+    parser.add_argument("--output", required=True, help="Output file")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="parquet", help="Output format")
+    parser.add_argument("--ward", default=None, help="Only patients on this ward")
+    parser.add_argument("--patient-id", type=uuid.UUID, action="append", default=[], help="Only this patient (repeatable)")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="Observed at or after (UTC)")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="Observed before (UTC)")
+    parser.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE, help="Rows per record batch / row group")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    filters = ExportFilter(ward=args.ward, patient_ids=args.patient_id, start=args.start, end=args.end)
+    asyncio.run(export_to_file(args.output, filters, args.format, args.batch_size))
+    print(f"✅ Vitals exported to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Vitals Ingestion for MedObsMind
+
+Bulk path for storing many observations at once (gateway batches, NDJSON
+streams, device sockets). A batch is scored in one pass with each
+patient's cached scoring profile, resolved with a single patient SELECT,
+and written with multi-row INSERT statements in one transaction together
+with any alerts it raises and the rollup buckets it falls into.
+
+Bad items never fail the batch: validation and unknown-patient errors are
+reported per item, and if the multi-row insert is rejected by the
+database the batch is retried row by row inside savepoints so only the
+offending rows are dropped.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime
+import logging
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import is_foreign_key_violation
+from app.ml.scoring import ScoringEngine, ScoreOutcome, VitalsColumns, scoring_engine
+from app.models.alert import Alert
+from app.models.vitals import VitalsObservation
+from app.services.alert_engine import AlertEngine, alert_engine
+from app.services.patient_registry import patient_registry
+from app.services.latest_vitals import LatestVitalsCache, latest_vitals_cache
+from app.services.recent_vitals import RecentObservation, RecentVitalsBuffer, recent_vitals
+from app.services.scoring_profiles import ScoringProfileCache, scoring_profiles
+from app.services import vitals_rollups
+
+logger = logging.getLogger(__name__)
+
+
+# Observation fields copied verbatim from the submitted reading
+OBSERVATION_FIELDS = (
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "spo2",
+    "respiratory_rate",
+    "temperature",
+    "consciousness_level",
+    "supplemental_oxygen",
+    "oxygen_flow_rate",
+    "notes",
+)
+
+# Bind parameters per statement are capped at 32767 by the Postgres wire protocol
+MAX_BIND_PARAMETERS = 32767
+
+# Rejection reasons callers can map to HTTP status codes
+INVALID_PATIENT_ID = "patient_id: invalid UUID"
+PATIENT_NOT_FOUND = "Patient not found"
+NOT_STORED = "Observation could not be stored"
+
+
+@dataclass
+class IngestResult:
+    """Outcome of one submitted observation"""
+    index: int
+    status: str  # created, rejected
+    id: Optional[str] = None
+    news2_score: Optional[float] = None
+    mews_score: Optional[float] = None
+    alerts: List[str] = field(default_factory=list)  # alert types raised
+    errors: List[str] = field(default_factory=list)
+
+    @classmethod
+    def rejected(cls, index: int, *errors: str) -> "IngestResult":
+        return cls(index=index, status="rejected", errors=list(errors))
+
+
+@dataclass
+class PreparedObservation:
+    """A scored observation ready to be inserted"""
+    index: int
+    row: Dict[str, Any]
+    outcomes: Dict[str, ScoreOutcome]
+    alerts: List[Alert]
+
+    def result(self) -> IngestResult:
+        return IngestResult(
+            index=self.index,
+            status="created",
+            id=str(self.row["id"]),
+            news2_score=self.row["news2_score"],
+            mews_score=self.row["mews_score"],
+            alerts=[alert.alert_type for alert in self.alerts]
+        )
+
+
+class VitalsIngestor:
+    """
+    Scores and stores batches of observations.
+
+    Observations are objects or dicts carrying the VitalsCreate fields
+    (patient_id, vitals, notes, data_source and optionally device_id,
+    observed_at and extra_metadata), each paired with its index in the
+    submitted batch.
+    """
+
+    def __init__(
+        self,
+        engine: ScoringEngine = scoring_engine,
+        alerts: AlertEngine = alert_engine,
+        profiles: ScoringProfileCache = scoring_profiles,
+        recent: RecentVitalsBuffer = recent_vitals,
+        latest: LatestVitalsCache = latest_vitals_cache
+    ):
+        self.engine = engine
+        self.alerts = alerts
+        self.profiles = profiles
+        self.recent = recent
+        self.latest = latest
+
+    async def prepare(
+        self,
+        db: AsyncSession,
+        observations: Sequence[Tuple[int, Any]]
+    ) -> Tuple[List[PreparedObservation], List[IngestResult]]:
+        """
+        Resolve patients and score a batch without writing anything.
+
+        Returns:
+            (prepared observations, rejected results)
+        """
+        rejected = []
+        valid = []
+        for index, observation in observations:
+            try:
+                patient_id = uuid.UUID(str(_get(observation, "patient_id")))
+            except ValueError:
+                rejected.append(IngestResult.rejected(index, INVALID_PATIENT_ID))
+                continue
+            valid.append((index, patient_id, observation))
+
+        # Registered patients are served from the profile cache without a SELECT
+        profiles = await self.profiles.get_many(
+            db, {patient_id for _, patient_id, _ in valid}, known=patient_registry
+        )
+
+        known = []
+        for index, patient_id, observation in valid:
+            profile = profiles.get(str(patient_id))
+            if profile is None:
+                rejected.append(IngestResult.rejected(index, PATIENT_NOT_FOUND))
+                continue
+            known.append((index, patient_id, observation, profile))
+
+        # Score the whole batch in one vectorized pass, each row under its patient's profile
+        columns = batch = None
+        try:
+            columns = VitalsColumns.from_records(
+                [observation for _, _, observation, _ in known],
+                [profile for _, _, _, profile in known]
+            )
+            batch = self.engine.score_batch(columns)
+        except Exception as e:
+            # Don't drop the readings if scoring fails
+            logger.warning(f"Clinical scoring failed for a batch of {len(known)} observations: {e}")
+
+        prepared = []
+        for position, (index, patient_id, observation, profile) in enumerate(known):
+            outcomes = self.engine.outcomes_at(batch, columns, position, profile) if batch is not None else {}
+            row = self.build_row(observation, patient_id, outcomes)
+            prepared.append(PreparedObservation(
+                index=index,
+                row=row,
+                outcomes=outcomes,
+                alerts=self.alerts.build_alerts(patient_id, outcomes, vitals_id=row["id"])
+            ))
+
+        return prepared, rejected
+
+    @staticmethod
+    def build_row(observation: Any, patient_id: uuid.UUID, outcomes: Dict[str, ScoreOutcome]) -> Dict[str, Any]:
+        """vitals_observations column values for one scored observation"""
+        news2 = outcomes.get("news2")
+        mews = outcomes.get("mews")
+        now = datetime.utcnow()
+        row = {name: _get(observation, name) for name in OBSERVATION_FIELDS}
+        row["supplemental_oxygen"] = bool(row["supplemental_oxygen"])
+        row.update(
+            id=uuid.uuid4(),
+            patient_id=patient_id,
+            observed_at=_get(observation, "observed_at") or now,
+            news2_score=news2.value if news2 else None,
+            news2_components=news2.detail.packed_components if news2 else None,
+            mews_score=mews.value if mews else None,
+            mews_components=mews.detail.packed_components if mews else None,
+            source=_get(observation, "data_source") or "manual",
+            device_id=_get(observation, "device_id"),
+            is_valid=True,
+            metadata=_get(observation, "extra_metadata") or {},
+            created_at=now,
+        )
+        return row
+
+    async def ingest(self, db: AsyncSession, observations: Sequence[Tuple[int, Any]]) -> List[IngestResult]:
+        """
+        Score and store a batch in one transaction.
+
+        Args:
+            db: Session; committed on return
+            observations: (index, observation) pairs
+
+        Returns:
+            One IngestResult per observation, ordered by index
+        """
+        prepared, results = await self.prepare(db, observations)
+        results.extend(await self.write(db, prepared))
+        return sorted(results, key=lambda result: result.index)
+
+    async def write(self, db: AsyncSession, prepared: List[PreparedObservation]) -> List[IngestResult]:
+        """Insert prepared observations and their alerts, isolating rows the database rejects"""
+        if not prepared:
+            return []
+        try:
+            await self.insert_rows(db, [item.row for item in prepared])
+            await vitals_rollups.apply(db, [item.row for item in prepared])
+            db.add_all([alert for item in prepared for alert in item.alerts])
+            await db.commit()
+            await self._publish([item.row for item in prepared])
+            return [item.result() for item in prepared]
+        except DBAPIError as e:
+            await db.rollback()
+            logger.warning(f"Multi-row vitals insert failed ({e.__class__.__name__}); retrying row by row")
+
+        results = []
+        stored = []
+        for item in prepared:
+            try:
+                async with db.begin_nested():
+                    await self.insert_rows(db, [item.row])
+                    await vitals_rollups.apply(db, [item.row])
+                    db.add_all(item.alerts)
+                    await db.flush()
+                results.append(item.result())
+                stored.append(item.row)
+            except DBAPIError as e:
+                if is_foreign_key_violation(e):
+                    # Patient deleted since it was cached
+                    patient_registry.discard(item.row["patient_id"])
+                    self.profiles.invalidate(item.row["patient_id"])
+                    results.append(IngestResult.rejected(item.index, PATIENT_NOT_FOUND))
+                    continue
+                logger.warning(f"Vitals batch item {item.index} rejected by the database: {e.orig}")
+                results.append(IngestResult.rejected(item.index, NOT_STORED))
+        await db.commit()
+        await self._publish(stored)
+        return results
+
+    async def committed(self, rows: List[Dict[str, Any]]) -> None:
+        """Publish committed rows to the recent vitals buffer and the latest vitals cache"""
+        observations = [RecentObservation.from_row(row) for row in rows]
+        self.recent.record(observations)
+        await self.latest.put_many(observations)
+
+    async def _publish(self, rows: List[Dict[str, Any]]) -> None:
+        """committed(), after the commit: a failure only leaves the caches behind, so it is logged, not raised"""
+        try:
+            await self.committed(rows)
+        except Exception as e:
+            logger.error(f"Publishing {len(rows)} committed vitals failed: {e}")
+
+    @staticmethod
+    async def insert_rows(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        """Multi-row INSERT ... VALUES, split to stay under the bind parameter limit"""
+        if not rows:
+            return
+        table = VitalsObservation.__table__
+        rows_per_statement = MAX_BIND_PARAMETERS // len(rows[0])
+        for start in range(0, len(rows), rows_per_statement):
+            await db.execute(insert(table).values(rows[start:start + rows_per_statement]))
+
+
+def _get(observation: Any, name: str) -> Any:
+    if isinstance(observation, dict):
+        return observation.get(name)
+    return getattr(observation, name, None)
+
+
+vitals_ingestor = VitalsIngestor()
@@ -0,0 +1,325 @@
+"""
+Vitals Rollups for MedObsMind
+
+Keeps 5-minute, hourly and daily aggregates per patient and parameter
+(count, sum, sum of squares, min, max, last) in vitals_rollups, so
+dashboards and trend summaries read a few buckets instead of every raw
+observation.
+
+- Ingest folds each batch into its buckets with one INSERT ... ON CONFLICT
+  DO UPDATE in the same transaction as the observations. The aggregates
+  merge by addition / comparison, so late and out-of-order observations
+  land correctly in buckets that are already "closed".
+- Amending or deleting an observation recomputes the buckets it belongs to
+  from the raw rows (min / max / last cannot be subtracted).
+- `python -m app.services.vitals_rollups --since 2026-01-01` rebuilds the
+  rollups of existing observations from the start of that day.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import logging
+import uuid
+
+import numpy as np
+from sqlalchemy import Float, and_, case, delete, desc, func, literal, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.models.vitals import VitalsObservation
+from app.models.vitals_rollup import VitalsRollup
+from app.services.vitals_trends import TREND_PARAMETERS, TrendStatistics, classify_trend
+
+logger = logging.getLogger(__name__)
+
+# Bucket width in seconds per resolution
+RESOLUTIONS = {
+    "5min": 300,
+    "hour": 3600,
+    "day": 86400,
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+# 12 bind parameters per upserted row; stay under the Postgres wire protocol limit
+MAX_ROWS_PER_UPSERT = 32767 // 12
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """Start of the bucket of a (naive UTC) timestamp"""
+    width = RESOLUTIONS[resolution]
+    seconds = int((moment - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=seconds - seconds % width)
+
+
+def aggregate(rows: Iterable) -> List[Dict]:
+    """
+    Fold observations into rollup rows.
+
+    Args:
+        rows: Objects or dicts with patient_id, observed_at and the parameters
+
+    Returns:
+        One vitals_rollups row per (patient, resolution, parameter, bucket),
+        ordered by primary key so concurrent upserts lock rows in one order
+    """
+    buckets: Dict[Tuple, List] = {}
+    for row in rows:
+        get = row.get if isinstance(row, dict) else lambda name, row=row: getattr(row, name, None)
+        patient_id, observed_at = get("patient_id"), get("observed_at")
+        for parameter in TREND_PARAMETERS:
+            value = get(parameter)
+            if value is None:
+                continue
+            value = float(value)
+            for resolution in RESOLUTIONS:
+                key = (str(patient_id), resolution, parameter, bucket_start(observed_at, resolution))
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = [1, value, value * value, value, value, value, observed_at]
+                    continue
+                bucket[0] += 1
+                bucket[1] += value
+                bucket[2] += value * value
+                bucket[3] = min(bucket[3], value)
+                bucket[4] = max(bucket[4], value)
+                if observed_at >= bucket[6]:
+                    bucket[5], bucket[6] = value, observed_at
+
+    now = datetime.utcnow()
+    return [
+        {
+            "patient_id": uuid.UUID(patient_id),
+            "resolution": resolution,
+            "parameter": parameter,
+            "bucket_start": start,
+            "count": count,
+            "sum_value": total,
+            "sum_squares": squares,
+            "min_value": low,
+            "max_value": high,
+            "last_value": last,
+            "last_observed_at": last_at,
+            "updated_at": now,
+        }
+        for (patient_id, resolution, parameter, start), (count, total, squares, low, high, last, last_at)
+        in sorted(buckets.items(), key=lambda item: item[0])
+    ]
+
+
+async def apply(db: AsyncSession, rows: Iterable) -> int:
+    """
+    Merge observations into their buckets (caller commits).
+
+    Returns:
+        Number of rollup rows upserted
+    """
+    rollups = aggregate(rows)
+    table = VitalsRollup.__table__
+    for start in range(0, len(rollups), MAX_ROWS_PER_UPSERT):
+        statement = insert(table).values(rollups[start:start + MAX_ROWS_PER_UPSERT])
+        new = statement.excluded
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.patient_id, table.c.resolution, table.c.parameter, table.c.bucket_start],
+            set_={
+                "count": table.c.count + new.count,
+                "sum_value": table.c.sum_value + new.sum_value,
+                "sum_squares": table.c.sum_squares + new.sum_squares,
+                "min_value": func.least(table.c.min_value, new.min_value),
+                "max_value": func.greatest(table.c.max_value, new.max_value),
+                # A late observation does not replace the bucket's latest value
+                "last_value": case(
+                    (new.last_observed_at >= table.c.last_observed_at, new.last_value),
+                    else_=table.c.last_value
+                ),
+                "last_observed_at": func.greatest(table.c.last_observed_at, new.last_observed_at),
+                "updated_at": new.updated_at,
+            }
+        ))
+    return len(rollups)
+
+
+async def recompute(db: AsyncSession, patient_id, moments: Iterable[datetime]) -> int:
+    """
+    Rebuild a patient's buckets around amended or deleted observations from
+    the raw rows (caller flushes the change first and commits after).
+
+    Every resolution of each affected day is rebuilt, since a day contains
+    all of its hour and 5-minute buckets.
+
+    Returns:
+        Number of rollup rows written
+    """
+    patient_id = uuid.UUID(str(patient_id))
+    days = sorted({bucket_start(moment, "day") for moment in moments})
+    if not days:
+        return 0
+
+    def in_days(column):
+        return or_(*(and_(column >= day, column < day + timedelta(days=1)) for day in days))
+
+    await db.execute(
+        delete(VitalsRollup).where(and_(VitalsRollup.patient_id == patient_id, in_days(VitalsRollup.bucket_start)))
+    )
+    result = await db.execute(
+        select(
+            VitalsObservation.patient_id,
+            VitalsObservation.observed_at,
+            *(getattr(VitalsObservation, name) for name in TREND_PARAMETERS)
+        )
+        .where(and_(VitalsObservation.patient_id == patient_id, in_days(VitalsObservation.observed_at)))
+    )
+    return await apply(db, [row._asdict() for row in result])
+
+
+async def read(
+    db: AsyncSession,
+    patient_id,
+    resolution: str,
+    since: datetime,
+    parameters: Sequence[str] = TREND_PARAMETERS
+) -> List[VitalsRollup]:
+    """Buckets overlapping [since, now), oldest first"""
+    result = await db.execute(
+        select(VitalsRollup)
+        .where(
+            and_(
+                VitalsRollup.patient_id == uuid.UUID(str(patient_id)),
+                VitalsRollup.resolution == resolution,
+                VitalsRollup.parameter.in_(list(parameters)),
+                VitalsRollup.bucket_start >= bucket_start(since, resolution)
+            )
+        )
+        .order_by(VitalsRollup.bucket_start)
+    )
+    return list(result.scalars())
+
+
+def series_from_rollups(
+    rollups: Sequence[VitalsRollup],
+    parameters: Sequence[str] = TREND_PARAMETERS
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Columnar (bucket start epoch ms, bucket mean per parameter; NaN = empty bucket)"""
+    starts = sorted({rollup.bucket_start for rollup in rollups})
+    position = {start: index for index, start in enumerate(starts)}
+    series = {name: np.full(len(starts), np.nan) for name in parameters}
+    for rollup in rollups:
+        series[rollup.parameter][position[rollup.bucket_start]] = rollup.mean
+    timestamps = np.array(starts, dtype="datetime64[ms]").astype(np.int64)
+    return timestamps, series
+
+
+def statistics_from_rollups(
+    rollups: Sequence[VitalsRollup],
+    hours: float,
+    parameters: Sequence[str] = TREND_PARAMETERS
+) -> Dict[str, TrendStatistics]:
+    """
+    Window statistics from buckets: count, mean, stddev, min and max are
+    exact; the slope is fitted to the bucket means (weighted by count, at
+    bucket midpoints).
+    """
+    statistics = {}
+    for name in parameters:
+        buckets = [rollup for rollup in rollups if rollup.parameter == name]
+        count = sum(rollup.count for rollup in buckets)
+        if not count:
+            statistics[name] = TrendStatistics(0, None, None, None, None, None, "insufficient_data")
+            continue
+        total = sum(rollup.sum_value for rollup in buckets)
+        squares = sum(rollup.sum_squares for rollup in buckets)
+        stddev = None
+        if count >= 2:
+            stddev = round(float(np.sqrt(max(squares - total * total / count, 0.0) / (count - 1))), 2)
+
+        slope = None
+        if len(buckets) >= 2:
+            width = RESOLUTIONS[buckets[0].resolution]
+            x = np.array([((rollup.bucket_start - EPOCH).total_seconds() + width / 2) / 3600.0 for rollup in buckets])
+            y = np.array([rollup.mean for rollup in buckets])
+            w = np.array([rollup.count for rollup in buckets], dtype=np.float64)
+            centred = x - np.average(x, weights=w)
+            slope = round(float(np.sum(w * centred * (y - np.average(y, weights=w))) / np.sum(w * centred * centred)), 4)
+
+        statistics[name] = TrendStatistics(
+            count=count,
+            min_value=round(min(rollup.min_value for rollup in buckets), 2),
+            max_value=round(max(rollup.max_value for rollup in buckets), 2),
+            avg_value=round(total / count, 2),
+            stddev=stddev,
+            slope_per_hour=slope,
+            trend=classify_trend(name, slope, hours),
+        )
+    return statistics
+
+
+async def rebuild(since: datetime, session_factory=AsyncSessionLocal) -> None:
+    """
+    Recompute every bucket from the start of since's day from raw observations.
+
+    Each resolution is deleted and rebuilt in its own transaction, so
+    readers see either its old or its new buckets, never an empty range.
+    """
+    since = bucket_start(since, "day")
+    table = VitalsRollup.__table__
+    async with session_factory() as db:
+        for resolution, width in RESOLUTIONS.items():
+            await db.execute(delete(VitalsRollup).where(
+                and_(VitalsRollup.resolution == resolution, VitalsRollup.bucket_start >= since)
+            ))
+            # Inlined constants keep the SELECT and GROUP BY expressions identical
+            width = literal_column(str(width))
+            bucket = func.timezone(literal_column("'UTC'"), func.to_timestamp(
+                func.floor(func.extract("epoch", VitalsObservation.observed_at) / width) * width
+            ))
+            for name in TREND_PARAMETERS:
+                column = getattr(VitalsObservation, name)
+                source = (
+                    select(
+                        VitalsObservation.patient_id,
+                        literal(resolution),
+                        literal(name),
+                        bucket,
+                        func.count(column),
+                        func.sum(column),
+                        func.sum(column * column),
+                        func.min(column),
+                        func.max(column),
+                        func.array_agg(aggregate_order_by(column, desc(VitalsObservation.observed_at)), type_=ARRAY(Float))[1],
+                        func.max(VitalsObservation.observed_at),
+                        literal(datetime.utcnow()),
+                    )
+                    .where(and_(column.isnot(None), VitalsObservation.observed_at >= since))
+                    .group_by(VitalsObservation.patient_id, bucket)
+                )
+                statement = insert(table).from_select(
+                    ["patient_id", "resolution", "parameter", "bucket_start", "count", "sum_value", "sum_squares",
+                     "min_value", "max_value", "last_value", "last_observed_at", "updated_at"],
+                    source
+                )
+                result = await db.execute(statement.on_conflict_do_update(
+                    index_elements=[table.c.patient_id, table.c.resolution, table.c.parameter, table.c.bucket_start],
+                    set_={column_name: statement.excluded[column_name] for column_name in (
+                        "count", "sum_value", "sum_squares", "min_value", "max_value",
+                        "last_value", "last_observed_at", "updated_at"
+                    )}
+                ))
+                logger.info(f"Rebuilt {result.rowcount} {resolution} {name} rollups")
+            await db.commit()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild vitals rollups from raw observations")
+    parser.add_argument("--since", required=True, type=datetime.fromisoformat, help="Start date (UTC), e.g. 2026-01-01")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(rebuild(args.since))
+    print(f"✅ Vitals rollups rebuilt from {bucket_start(args.since, 'day').date()}")
+
+
+if __name__ == "__main__":
+    main()
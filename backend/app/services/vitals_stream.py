@@ -0,0 +1,275 @@
+"""
+Streaming Vitals Ingestion for MedObsMind
+
+Incremental NDJSON ingestion for bedside monitor gateways. The request body
+is parsed line by line as it arrives and readings are grouped into
+micro-batches that go through the bulk ingestion path (app.services.
+vitals_ingest) while the upload is still in progress.
+
+Memory is bounded: lines longer than max_line_bytes are rejected without
+being buffered, and parsed readings wait in a bounded queue. When the
+queue is full the body reader stops pulling from the socket, so a gateway
+that sends faster than the database can absorb is slowed down by TCP flow
+control instead of growing server memory.
+
+Readings carrying a device_id go through the device coalescer
+(app.services.coalescing): they are acknowledged but only charted
+observations are stored, and open windows of the stream's devices are
+charted when the body ends.
+
+Acknowledgements are streamed back as NDJSON records:
+    {"line": 7, "status": "rejected", "errors": [...]}   every rejected line
+    {"line": 8, "status": "created", "id": ...}          every stored line (verbose only)
+    {"ack": 200, "created": 198, "buffered": 0, "rejected": 2}   after each micro-batch
+    {"done": true, "lines": 1000, "created": 995, "buffered": 0, "rejected": 5}
+"""
+
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+from dataclasses import dataclass, asdict
+import asyncio
+import json
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.database import AsyncSessionLocal
+from app.services.coalescing import ReadingCoalescer, device_coalescer
+from app.services.vitals_ingest import IngestResult, VitalsIngestor, vitals_ingestor
+
+logger = logging.getLogger(__name__)
+
+
+# (line number, decoded JSON value) or (line number, IngestResult) for unparseable lines
+ParsedLine = Tuple[int, Any]
+
+# Validates (line, payload) pairs into (valid pairs, rejected results)
+Validator = Callable[[List[ParsedLine]], Tuple[List[ParsedLine], List[IngestResult]]]
+
+
+@dataclass
+class StreamStats:
+    """Running totals for one stream"""
+    lines: int = 0
+    created: int = 0
+    buffered: int = 0
+    rejected: int = 0
+    batches: int = 0
+    started: float = 0.0
+
+    @property
+    def lines_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.lines / elapsed if elapsed > 0 else 0.0
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_line_bytes: int = 65536) -> AsyncIterator[ParsedLine]:
+    """
+    Split a chunked byte stream into decoded NDJSON lines.
+
+    Line numbers count every newline, so they point at the physical line
+    even though blank lines are skipped. Lines that are not valid JSON
+    objects, or that exceed max_line_bytes, are yielded as rejected
+    IngestResults.
+    """
+    buffer = b""
+    line_number = 1  # line being read
+    oversized = False
+
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline < 0:
+                if len(buffer) - start > max_line_bytes:
+                    # Drop the oversized line as it streams in; report it once
+                    if not oversized:
+                        oversized = True
+                        yield line_number, _too_long(line_number, max_line_bytes)
+                    start = len(buffer)
+                break
+
+            line_start, start = start, newline + 1
+            number, line_number = line_number, line_number + 1
+            if oversized:
+                oversized = False
+                continue
+            if newline - line_start > max_line_bytes:
+                yield number, _too_long(number, max_line_bytes)
+                continue
+            line = buffer[line_start:newline]
+            if line.strip():
+                yield number, _decode(number, line)
+        # Keep only the unfinished line (one copy per chunk, not per line)
+        buffer = buffer[start:]
+
+    if buffer.strip() and not oversized:
+        yield line_number, _decode(line_number, buffer)
+
+
+def _too_long(line_number: int, max_line_bytes: int) -> IngestResult:
+    return IngestResult.rejected(line_number, f"Line exceeds {max_line_bytes} bytes")
+
+
+def _decode(line_number: int, line: bytes) -> Any:
+    try:
+        value = json.loads(line)
+    except ValueError as e:
+        return IngestResult.rejected(line_number, f"Invalid JSON: {e}")
+    if not isinstance(value, dict):
+        return IngestResult.rejected(line_number, "Each line must be a JSON object")
+    return value
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator reads the request body.
+
+    StreamingResponse polls receive() for a disconnect while it streams,
+    which swallows the http.request messages a body still being uploaded
+    arrives in. This one leaves receive() to the body iterator: a client
+    disconnect surfaces as ClientDisconnect from request.stream().
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def collect_batch(queue: asyncio.Queue, batch_size: int, flush_interval: float) -> Tuple[List[Any], bool]:
+    """
+    Collect up to batch_size queued items, waiting at most flush_interval
+    after the first one. A None item marks the end of the stream.
+
+    Returns:
+        (items, finished)
+    """
+    batch = []
+    item = await queue.get()
+    if item is None:
+        return batch, True
+    batch.append(item)
+
+    deadline = time.monotonic() + flush_interval
+    while len(batch) < batch_size:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            item = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            break
+        if item is None:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+class NDJSONIngest:
+    """
+    Pipeline from a chunked NDJSON body to streamed acknowledgements.
+
+    A reader task parses the body into a bounded queue; the response
+    generator drains it in micro-batches of up to batch_size lines, or
+    whatever has arrived after flush_interval seconds, and ingests each
+    batch in its own transaction.
+    """
+
+    def __init__(
+        self,
+        validate: Validator,
+        ingestor: VitalsIngestor = vitals_ingestor,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        coalescer: ReadingCoalescer = device_coalescer,
+        batch_size: int = 200,
+        flush_interval: float = 0.25,
+        max_queued_lines: Optional[int] = None,
+        max_line_bytes: int = 65536,
+        verbose: bool = False
+    ):
+        self.validate = validate
+        self.ingestor = ingestor
+        self.session_factory = session_factory
+        self.coalescer = coalescer
+        self.devices = set()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queued_lines = max_queued_lines or batch_size * 2
+        self.max_line_bytes = max_line_bytes
+        self.verbose = verbose
+        self.stats = StreamStats()
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Consume the body and yield NDJSON acknowledgement records"""
+        self.stats = StreamStats(started=time.monotonic())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queued_lines)
+        reader = asyncio.create_task(self._read(chunks, queue))
+
+        try:
+            async with self.session_factory() as db:
+                finished = False
+                while not finished:
+                    batch, finished = await collect_batch(queue, self.batch_size, self.flush_interval)
+                    if batch:
+                        for record in await self._ingest(db, batch):
+                            yield _encode(record)
+                await reader  # surface body read errors
+                tail = [item for device_id in self.devices for item in self.coalescer.flush_device(device_id)]
+                if tail:
+                    for record in self._records(await self.ingestor.ingest(db, tail), tail[-1][0]):
+                        yield _encode(record)
+        except Exception as e:
+            logger.error(f"NDJSON vitals stream aborted after {self.stats.lines} lines: {e}")
+            yield _encode({"error": str(e), "ack": self.stats.lines})
+            return
+        finally:
+            reader.cancel()
+
+        logger.info(
+            f"NDJSON vitals stream: {self.stats.lines} lines, {self.stats.created} created, "
+            f"{self.stats.rejected} rejected ({self.stats.lines_per_second:.0f} lines/s)"
+        )
+        yield _encode({"done": True, **{k: v for k, v in asdict(self.stats).items() if k != "started"}})
+
+    async def _read(self, chunks: AsyncIterator[bytes], queue: asyncio.Queue) -> None:
+        try:
+            async for parsed in iter_ndjson(chunks, self.max_line_bytes):
+                await queue.put(parsed)  # blocks while the queue is full
+        except Exception:
+            await queue.put(None)
+            raise
+        await queue.put(None)
+
+    async def _ingest(self, db: AsyncSession, batch: List[ParsedLine]) -> List[dict]:
+        rejected = [value for _, value in batch if isinstance(value, IngestResult)]
+        valid, invalid = self.validate([(line, value) for line, value in batch if not isinstance(value, IngestResult)])
+        self.devices.update(reading.device_id for _, reading in valid if reading.device_id)
+        charted, buffered = self.coalescer.offer(valid)
+        results = sorted(rejected + invalid + await self.ingestor.ingest(db, charted), key=lambda result: result.index)
+
+        self.stats.lines += len(batch)
+        self.stats.buffered += buffered
+        self.stats.batches += 1
+        return self._records(results, batch[-1][0], buffered)
+
+    def _records(self, results: List[IngestResult], ack: int, buffered: int = 0) -> List[dict]:
+        """Per-line records (rejected, or all when verbose) and the batch ack"""
+        created = sum(result.status == "created" for result in results)
+        self.stats.created += created
+        self.stats.rejected += len(results) - created
+
+        records = [
+            {"line": result.index, **{k: v for k, v in asdict(result).items() if k != "index" and v not in (None, [])}}
+            for result in results
+            if self.verbose or result.status != "created"
+        ]
+        records.append({"ack": ack, "created": created, "buffered": buffered, "rejected": len(results) - created})
+        return records
+
+
+def _encode(record: dict) -> bytes:
+    return (json.dumps(record, default=str) + "\n").encode()
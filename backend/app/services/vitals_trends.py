@@ -0,0 +1,218 @@
+"""
+Vitals Trend Statistics for MedObsMind
+
+Per-parameter statistics over a time window (min, max, mean, count,
+sample standard deviation and the least-squares slope per hour), computed
+by Postgres in one aggregate query, or with NumPy when the observations
+are already in memory (app.services.recent_vitals) or have been fetched
+as a series anyway, so one scan yields both.
+
+The trend is classified from the slope: the change it projects over the
+window is compared with the smallest change that is clinically
+meaningful for the parameter (TREND_MIN_CHANGE).
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+from datetime import datetime
+import uuid
+
+import numpy as np
+from sqlalchemy import Select, and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.vitals import VitalsObservation
+
+TREND_PARAMETERS = (
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "spo2",
+    "respiratory_rate",
+    "temperature",
+)
+
+# Smallest change over a window reported as a trend, in the parameter's unit
+TREND_MIN_CHANGE = {
+    "heart_rate": 10.0,
+    "systolic_bp": 10.0,
+    "diastolic_bp": 8.0,
+    "spo2": 2.0,
+    "respiratory_rate": 3.0,
+    "temperature": 0.5,
+}
+
+
+@dataclass
+class TrendStatistics:
+    """Statistics of one parameter over a window"""
+    count: int
+    min_value: Optional[float]
+    max_value: Optional[float]
+    avg_value: Optional[float]
+    stddev: Optional[float]
+    slope_per_hour: Optional[float]
+    trend: str  # increasing, decreasing, stable, insufficient_data
+
+
+def classify_trend(parameter: str, slope_per_hour: Optional[float], hours: float) -> str:
+    """
+    Classify a trend from its regression slope.
+
+    Args:
+        parameter: Vital sign name
+        slope_per_hour: Least-squares slope (None with fewer than two points)
+        hours: Window length
+
+    Returns:
+        "increasing", "decreasing", "stable" or "insufficient_data"
+    """
+    if slope_per_hour is None:
+        return "insufficient_data"
+    projected = slope_per_hour * hours
+    if projected >= TREND_MIN_CHANGE[parameter]:
+        return "increasing"
+    if projected <= -TREND_MIN_CHANGE[parameter]:
+        return "decreasing"
+    return "stable"
+
+
+def _hours(column):
+    """Timestamp as hours since the epoch (the regression's x axis)"""
+    return func.extract("epoch", column) / 3600.0
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return None if value is None else round(float(value), digits)
+
+
+def trend_statistics_query(patient_id, since: datetime, parameters: Sequence[str] = TREND_PARAMETERS) -> Select:
+    """The aggregate query of trend_statistics() (six columns per parameter)"""
+    x = _hours(VitalsObservation.observed_at)
+    columns = []
+    for name in parameters:
+        column = getattr(VitalsObservation, name)
+        columns += [
+            func.count(column),
+            func.min(column),
+            func.max(column),
+            func.avg(column),
+            func.stddev_samp(column),
+            func.regr_slope(column, x),
+        ]
+    return select(*columns).where(
+        and_(
+            VitalsObservation.patient_id == uuid.UUID(str(patient_id)),
+            VitalsObservation.observed_at >= since
+        )
+    )
+
+
+async def trend_statistics(
+    db: AsyncSession,
+    patient_id,
+    since: datetime,
+    hours: float,
+    parameters: Sequence[str] = TREND_PARAMETERS
+) -> Dict[str, TrendStatistics]:
+    """
+    Statistics of several parameters with one aggregate query.
+
+    Returns:
+        TrendStatistics per parameter
+    """
+    result = await db.execute(trend_statistics_query(patient_id, since, parameters))
+    row = result.one()
+
+    statistics = {}
+    for position, name in enumerate(parameters):
+        count, min_value, max_value, avg_value, stddev, slope = row[position * 6:position * 6 + 6]
+        slope = _round(slope, 4)
+        statistics[name] = TrendStatistics(
+            count=count,
+            min_value=_round(min_value),
+            max_value=_round(max_value),
+            avg_value=_round(avg_value),
+            stddev=_round(stddev),
+            slope_per_hour=slope,
+            trend=classify_trend(name, slope, hours),
+        )
+    return statistics
+
+
+def series_from_observations(observations: Sequence, parameters: Sequence[str] = TREND_PARAMETERS) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Columnar (epoch ms timestamps, float64 values per parameter; NaN = not recorded) from observations"""
+    timestamps = np.array([observation.observed_at for observation in observations], dtype="datetime64[ms]").astype(np.int64)
+    series = {
+        name: np.array([getattr(observation, name) for observation in observations], dtype=np.float64)
+        for name in parameters
+    }
+    return timestamps, series
+
+
+def series_from_rows(rows: Sequence[tuple], parameters: Sequence[str] = TREND_PARAMETERS) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Columnar series from trend_points() rows"""
+    timestamps = np.array([row[0] for row in rows], dtype="datetime64[ms]").astype(np.int64)
+    series = {
+        name: np.array([row[position + 1] for row in rows], dtype=np.float64)
+        for position, name in enumerate(parameters)
+    }
+    return timestamps, series
+
+
+def statistics_from_series(timestamps: np.ndarray, series: Dict[str, np.ndarray], hours: float) -> Dict[str, TrendStatistics]:
+    """Same statistics as trend_statistics() for series already in memory"""
+    x = timestamps / 3_600_000.0
+    statistics = {}
+    for name, y in series.items():
+        present = ~np.isnan(y)
+        values, times = y[present], x[present]
+        count = len(values)
+        slope = None
+        if count >= 2 and np.ptp(times) > 0:
+            centred = times - times.mean()
+            slope = _round(np.dot(centred, values - values.mean()) / np.dot(centred, centred), 4)
+        statistics[name] = TrendStatistics(
+            count=count,
+            min_value=_round(values.min()) if count else None,
+            max_value=_round(values.max()) if count else None,
+            avg_value=_round(values.mean()) if count else None,
+            stddev=_round(values.std(ddof=1)) if count >= 2 else None,
+            slope_per_hour=slope,
+            trend=classify_trend(name, slope, hours),
+        )
+    return statistics
+
+
+def statistics_from_observations(
+    observations: Sequence,
+    hours: float,
+    parameters: Sequence[str] = TREND_PARAMETERS
+) -> Dict[str, TrendStatistics]:
+    """Same statistics as trend_statistics() for observations already in memory"""
+    return statistics_from_series(*series_from_observations(observations, parameters), hours)
+
+
+def trend_points_query(patient_id, since: datetime, parameters: Sequence[str] = TREND_PARAMETERS) -> Select:
+    """The query of trend_points()"""
+    return (
+        select(VitalsObservation.observed_at, *(getattr(VitalsObservation, name) for name in parameters))
+        .where(
+            and_(
+                VitalsObservation.patient_id == uuid.UUID(str(patient_id)),
+                VitalsObservation.observed_at >= since
+            )
+        )
+        .order_by(VitalsObservation.observed_at)
+    )
+
+
+async def trend_points(
+    db: AsyncSession,
+    patient_id,
+    since: datetime,
+    parameters: Sequence[str] = TREND_PARAMETERS
+) -> List[tuple]:
+    """(observed_at, value per parameter) rows of the window, oldest first, without loading ORM objects"""
+    result = await db.execute(trend_points_query(patient_id, since, parameters))
+    return result.all()
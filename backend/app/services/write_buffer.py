@@ -0,0 +1,133 @@
+"""
+Write-Behind Group Commit for MedObsMind
+
+Collects single observations submitted by concurrent requests and writes
+them together: one multi-row INSERT and one COMMIT per group instead of
+one transaction per request, so the Postgres fsync is paid once per group.
+
+A group is flushed when it reaches max_rows or max_delay seconds after its
+first observation arrived. Each caller's future resolves only after the
+group's commit has landed (or with the error that prevented it), so a
+successful response still means the observation is durable. Work after
+the commit (publishing to the vitals caches, closing the session) is
+only logged when it fails: those callers' rows are already stored.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.vitals_ingest import IngestResult, VitalsIngestor, vitals_ingestor
+from app.services.vitals_stream import collect_batch
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitBuffer:
+    """
+    In-process group commit for vitals inserts.
+
+    Attributes:
+        max_rows: Observations per group commit
+        max_delay: Seconds the first observation of a group may wait
+        max_pending: Submitted observations buffered before submit() waits
+        flushers: Groups that may be committing concurrently
+    """
+
+    def __init__(
+        self,
+        ingestor: VitalsIngestor = vitals_ingestor,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        max_rows: int = settings.VITALS_GROUP_COMMIT_MAX_ROWS,
+        max_delay: float = settings.VITALS_GROUP_COMMIT_MAX_DELAY_MS / 1000,
+        max_pending: int = 10000,
+        flushers: int = 2
+    ):
+        self.ingestor = ingestor
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.flushers = flushers
+        self.groups = 0
+        self.rows = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def submit(self, observation: Any) -> Tuple[IngestResult, Optional[Dict[str, Any]]]:
+        """
+        Queue one validated observation and wait for its group commit.
+
+        Returns:
+            (IngestResult, stored column values or None if rejected)
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((future, observation))
+        return await future
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+        # Restart dead flush tasks on the same queue, so observations already queued are still flushed
+        alive = []
+        for task in self._tasks:
+            if not task.done():
+                alive.append(task)
+            elif not task.cancelled() and task.exception() is not None:
+                logger.error(f"Vitals group commit flush task died: {task.exception()!r}; restarting it")
+        alive.extend(asyncio.create_task(self._flush_loop()) for _ in range(self.flushers - len(alive)))
+        self._tasks = alive
+
+    async def _flush_loop(self) -> None:
+        finished = False
+        while not finished:
+            group, finished = await collect_batch(self._queue, self.max_rows, self.max_delay)
+            if group:
+                await self._flush(group)
+
+    async def _flush(self, group: List[Tuple[asyncio.Future, Any]]) -> None:
+        observations = [(index, observation) for index, (_, observation) in enumerate(group)]
+        committed = False
+        try:
+            async with self.session_factory() as db:
+                prepared, results = await self.ingestor.prepare(db, observations)
+                results.extend(await self.ingestor.write(db, prepared))
+                committed = True
+        except Exception as e:
+            if committed:
+                # Only closing the session failed: the group is durable, so callers get their results
+                logger.error(f"Closing the session after a group commit of {len(group)} observations failed: {e}")
+            else:
+                logger.error(f"Group commit of {len(group)} observations failed: {e}")
+                for future, _ in group:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        self.groups += 1
+        self.rows += len(group)
+        rows = {item.index: item.row for item in prepared}
+        for result in results:
+            future = group[result.index][0]
+            # A caller that went away still had its observation committed
+            if not future.done():
+                future.set_result((result, rows.get(result.index) if result.status == "created" else None))
+
+    async def close(self) -> None:
+        """Flush everything submitted so far and stop the flush tasks"""
+        if self._queue is None:
+            return
+        for _ in self._tasks:
+            await self._queue.put(None)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._queue = None
+        self._tasks = []
+        logger.info(f"Vitals group commit closed after {self.groups} groups / {self.rows} observations")
+
+
+vitals_write_buffer = GroupCommitBuffer()
@@ -0,0 +1 @@
+"""Performance benchmarks for the MedObsMind backend (not collected by pytest)"""
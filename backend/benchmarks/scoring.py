@@ -0,0 +1,309 @@
+"""
+Clinical Scoring Benchmarks for MedObsMind
+
+Micro-benchmarks for app/ml on synthetic but clinically realistic vitals
+(ward population: mostly normal readings with deteriorating tails, ~2%
+missing values per field, ~20% on supplemental oxygen, ~5% on SpO2 Scale 2).
+
+Each case is timed on 1, 1k, 100k and 10M observations (scalar cases stop
+at 100k; at ~10 us per call 10M would take minutes) and reports throughput
+plus peak memory traced by tracemalloc, which includes numpy buffers.
+
+Results are compared against benchmarks/baselines/scoring.json, so a
+regression in app/ml shows up as a throughput ratio. Baselines are only
+comparable on the machine that recorded them; re-record with --save after
+moving CI runners.
+
+Usage:
+    python -m benchmarks.scoring                  # run and compare
+    python -m benchmarks.scoring --save           # record new baselines
+    python -m benchmarks.scoring --sizes 1 1000 --cases news2.calculate
+"""
+
+from typing import Callable, Dict, List, Optional
+from dataclasses import dataclass, asdict
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.ml.mews import MEWSCalculator
+from app.ml.news2 import AVPU_CODES, NEWS2Calculator, unpack_component_matrix
+from app.ml.scoring import VitalsColumns, scoring_engine
+
+SIZES = (1, 1_000, 100_000, 10_000_000)
+SCALAR_MAX_ROWS = 100_000
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "scoring.json")
+
+# Minimum wall time per measurement; small sizes are repeated to reach it
+MIN_MEASURE_SECONDS = 0.2
+REPEATS = 3
+
+
+def generate_vitals(n: int, seed: int = 42) -> VitalsColumns:
+    """Synthetic ward observations, rounded the way they are charted"""
+    rng = np.random.default_rng(seed)
+
+    def charted(mean, sd, low, high, decimals=0):
+        values = np.clip(rng.normal(mean, sd, n), low, high).round(decimals)
+        values[rng.random(n) < 0.02] = np.nan
+        return values
+
+    spo2 = np.clip(100 - rng.gamma(2.0, 1.5, n), 70, 100).round()
+    spo2[rng.random(n) < 0.02] = np.nan
+    avpu = rng.choice(
+        np.array([AVPU_CODES["A"], AVPU_CODES["V"], AVPU_CODES["P"], AVPU_CODES["U"]], dtype=np.int8),
+        size=n,
+        p=[0.95, 0.03, 0.015, 0.005]
+    )
+
+    return VitalsColumns(
+        heart_rate=charted(85, 18, 30, 220),
+        systolic_bp=charted(125, 22, 50, 250),
+        diastolic_bp=charted(75, 12, 30, 150),
+        spo2=spo2,
+        respiratory_rate=charted(18, 5, 5, 60),
+        temperature=charted(37.1, 0.7, 32.0, 43.0, decimals=1),
+        consciousness_level=avpu,
+        supplemental_oxygen=rng.random(n) < 0.2,
+        use_scale_2=rng.random(n) < 0.05
+    )
+
+
+def to_records(columns: VitalsColumns) -> List[Dict]:
+    """Per-observation dicts as the API hands them to the scalar path"""
+    avpu_names = {code: name for name, code in AVPU_CODES.items()}
+    fields = ("heart_rate", "systolic_bp", "diastolic_bp", "spo2", "respiratory_rate", "temperature")
+    arrays = [getattr(columns, name).tolist() for name in fields]
+    records = []
+    for row in range(len(columns)):
+        record = {name: (None if values[row] != values[row] else values[row]) for name, values in zip(fields, arrays)}
+        record["consciousness_level"] = avpu_names.get(int(columns.consciousness_level[row]))
+        record["supplemental_oxygen"] = bool(columns.supplemental_oxygen[row])
+        record["use_scale_2"] = bool(columns.use_scale_2[row])
+        records.append(record)
+    return records
+
+
+def _news2_scalar(records):
+    calculator = NEWS2Calculator()
+    for record in records:
+        calculator.calculate(
+            respiratory_rate=record["respiratory_rate"],
+            spo2=record["spo2"],
+            supplemental_oxygen=record["supplemental_oxygen"],
+            temperature=record["temperature"],
+            systolic_bp=record["systolic_bp"],
+            heart_rate=record["heart_rate"],
+            consciousness_level=record["consciousness_level"],
+            use_scale_2=record["use_scale_2"]
+        )
+
+
+def _news2_batch(columns):
+    NEWS2Calculator().calculate_batch(
+        respiratory_rate=columns.respiratory_rate,
+        spo2=columns.spo2,
+        supplemental_oxygen=columns.supplemental_oxygen,
+        temperature=columns.temperature,
+        systolic_bp=columns.systolic_bp,
+        heart_rate=columns.heart_rate,
+        consciousness_level=columns.consciousness_level,
+        use_scale_2=columns.use_scale_2
+    )
+
+
+def _mews_batch(columns):
+    MEWSCalculator().calculate_batch(
+        systolic_bp=columns.systolic_bp,
+        heart_rate=columns.heart_rate,
+        respiratory_rate=columns.respiratory_rate,
+        temperature=columns.temperature,
+        consciousness_level=columns.consciousness_level
+    )
+
+
+def _engine_scalar(records):
+    for record in records:
+        scoring_engine.score(record)
+
+
+def _engine_batch(columns):
+    scoring_engine.score_batch(columns)
+
+
+def _unpack(packed):
+    unpack_component_matrix(packed)
+
+
+@dataclass
+class Case:
+    """One benchmarked operation and the input it consumes"""
+    name: str
+    run: Callable
+    input: str  # "records", "columns" or "packed"
+    max_rows: Optional[int] = None
+
+
+CASES = (
+    Case("news2.calculate", _news2_scalar, "records", SCALAR_MAX_ROWS),
+    Case("news2.calculate_batch", _news2_batch, "columns"),
+    Case("mews.calculate_batch", _mews_batch, "columns"),
+    Case("engine.score", _engine_scalar, "records", SCALAR_MAX_ROWS),
+    Case("engine.score_batch", _engine_batch, "columns"),
+    Case("columns.from_records", VitalsColumns.from_records, "records", SCALAR_MAX_ROWS),
+    Case("news2.unpack_component_matrix", _unpack, "packed"),
+)
+
+
+@dataclass
+class Measurement:
+    case: str
+    rows: int
+    seconds: float          # best wall time of one call
+    rows_per_second: float
+    peak_memory_mb: float   # tracemalloc peak during one call
+
+
+def measure(case: Case, data, rows: int) -> Measurement:
+    """Best-of-REPEATS timing, then one traced call for peak memory"""
+    case.run(data)  # warm up lazily built calculators and caches
+
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            case.run(data)
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_MEASURE_SECONDS or calls >= 1_000_000:
+            break
+        calls *= 10
+
+    best = elapsed / calls
+    for _ in range(REPEATS - 1):
+        started = time.perf_counter()
+        for _ in range(calls):
+            case.run(data)
+        best = min(best, (time.perf_counter() - started) / calls)
+
+    gc.collect()
+    tracemalloc.start()
+    case.run(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Measurement(
+        case=case.name,
+        rows=rows,
+        seconds=best,
+        rows_per_second=rows / best if best > 0 else float("inf"),
+        peak_memory_mb=peak / 2**20
+    )
+
+
+def run(sizes=SIZES, case_names: Optional[List[str]] = None) -> List[Measurement]:
+    cases = [case for case in CASES if case_names is None or case.name in case_names]
+    results = []
+    for rows in sizes:
+        columns = generate_vitals(rows)
+        inputs = {"columns": columns}
+        if any(case.input == "records" and (case.max_rows is None or rows <= case.max_rows) for case in cases):
+            inputs["records"] = to_records(columns)
+        if any(case.input == "packed" for case in cases):
+            inputs["packed"] = scoring_engine.get("news2").score_batch(columns).detail.packed_components
+
+        for case in cases:
+            if case.max_rows is not None and rows > case.max_rows:
+                continue
+            result = measure(case, inputs[case.input], rows)
+            results.append(result)
+            print(
+                f"{result.case:<32} {rows:>10,} rows  {result.seconds * 1e3:>10.3f} ms  "
+                f"{result.rows_per_second:>14,.0f} rows/s  {result.peak_memory_mb:>9.1f} MB"
+            )
+        del columns, inputs
+        gc.collect()
+    return results
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": str(os.cpu_count()),
+    }
+
+
+def save_baseline(results: List[Measurement], path: str = BASELINE_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": [asdict(r) for r in results]}, f, indent=2)
+        f.write("\n")
+
+
+def compare(results: List[Measurement], path: str = BASELINE_PATH, tolerance: float = 0.25) -> List[str]:
+    """
+    Compare throughput with the stored baseline.
+
+    Args:
+        results: Fresh measurements
+        path: Baseline JSON written by save_baseline
+        tolerance: Allowed fractional throughput drop before a case regresses
+
+    Returns:
+        Descriptions of regressed cases (empty if none)
+    """
+    if not os.path.exists(path):
+        print(f"No baseline at {path}; record one with --save")
+        return []
+    with open(path) as f:
+        baseline = {(r["case"], r["rows"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        reference = baseline.get((result.case, result.rows))
+        if reference is None:
+            continue
+        ratio = result.rows_per_second / reference["rows_per_second"]
+        memory_ratio = result.peak_memory_mb / reference["peak_memory_mb"] if reference["peak_memory_mb"] else 1.0
+        line = f"{result.case:<32} {result.rows:>10,} rows  {ratio:>6.2f}x throughput  {memory_ratio:>6.2f}x memory"
+        if ratio < 1 - tolerance:
+            regressions.append(line)
+            line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark app/ml clinical scoring")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Observation counts to run")
+    parser.add_argument("--cases", nargs="+", default=None, help="Only run these cases")
+    parser.add_argument("--save", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed throughput drop (fraction)")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.cases)
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, args.baseline, args.tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark regression(s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
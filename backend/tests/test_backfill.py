@@ -0,0 +1,67 @@
+# Tests for the NEWS2 backfill: rescoring and the write-back race with amendments
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.ml.news2 import NEWS2Calculator
+from app.models.vitals import VitalsObservation
+from app.services.backfill import NEWS2Backfill, score_chunk
+from tests.conftest import test_engine
+
+STABLE = {"heart_rate": 75, "systolic_bp": 120, "spo2": 98, "respiratory_rate": 16, "temperature": 37.0, "consciousness_level": "A"}
+
+
+async def add_stale_observations(db_session, patient, count):
+    """Observations carrying a wrong NEWS2 score"""
+    observations = [
+        VitalsObservation(
+            patient_id=patient.id,
+            observed_at=datetime.utcnow() - timedelta(minutes=n),
+            news2_score=99,
+            **STABLE
+        )
+        for n in range(count)
+    ]
+    db_session.add_all(observations)
+    await db_session.commit()
+    return [observation.id for observation in observations]
+
+
+async def scores(db_session, patient):
+    result = await db_session.execute(
+        select(VitalsObservation.id, VitalsObservation.news2_score).where(VitalsObservation.patient_id == patient.id)
+    )
+    return dict(result.all())
+
+
+async def test_backfill_rescores_every_row(db_session, patient):
+    ids = await add_stale_observations(db_session, patient, 7)
+
+    checkpoint = await NEWS2Backfill(engine=test_engine, chunk_size=3).run()
+    assert (checkpoint.rows_scored, checkpoint.rows_updated, checkpoint.chunks) == (7, 7, 3)
+
+    expected = NEWS2Calculator().calculate(**STABLE).total_score
+    assert await scores(db_session, patient) == {row_id: expected for row_id in ids}
+
+
+async def test_amendment_between_fetch_and_write_wins(db_session, patient):
+    """A row whose readings changed after the chunk was read keeps the amendment's score"""
+    ids = await add_stale_observations(db_session, patient, 3)
+    backfill = NEWS2Backfill(engine=test_engine)
+
+    rows, columns = await backfill.fetch_chunk(None)
+    news2, packed = score_chunk(columns)
+
+    amended = ids[1]
+    await db_session.execute(
+        update(VitalsObservation)
+        .where(VitalsObservation.id == amended)
+        .values(heart_rate=135, news2_score=3)
+    )
+    await db_session.commit()
+
+    assert await backfill.write_chunk(rows, news2, packed) == 2
+    stored = await scores(db_session, patient)
+    assert stored[amended] == 3
+    assert [stored[ids[0]], stored[ids[2]]] == [0, 0]
@@ -0,0 +1,78 @@
+# Tests for per-device coalescing of full-rate readings
+
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models.vitals import VitalsObservation
+from app.services.coalescing import ReadingCoalescer
+from tests.conftest import TestSessionLocal
+
+START = datetime(2024, 1, 1, 8, 0)
+
+
+def device_reading(patient_id, seconds, **values):
+    """A monitor reading: no AVPU or temperature"""
+    return {
+        "patient_id": patient_id,
+        "device_id": "monitor-1",
+        "observed_at": START + timedelta(seconds=seconds),
+        **values,
+    }
+
+
+NORMAL = {"heart_rate": 75, "systolic_bp": 120, "spo2": 98, "respiratory_rate": 16}
+
+
+def test_band_change_without_avpu_or_temperature():
+    """A monitor feed that never sends AVPU / temperature still charts on deterioration"""
+    coalescer = ReadingCoalescer(interval=300, store=None)
+    patient_id = str(uuid.uuid4())
+
+    charted, _ = coalescer.offer([(0, device_reading(patient_id, 0, **NORMAL))])
+    assert len(charted) == 1  # first band for the device
+
+    charted, buffered = coalescer.offer([(1, device_reading(patient_id, 5, **NORMAL))])
+    assert (charted, buffered) == ([], 1)
+
+    deteriorating = {**NORMAL, "heart_rate": 135, "respiratory_rate": 26, "spo2": 90}
+    charted, _ = coalescer.offer([(2, device_reading(patient_id, 10, **deteriorating))])
+    assert [index for index, _ in charted] == [2]
+    assert charted[0][1]["extra_metadata"]["window"]["charted"] == "band_change"
+    assert coalescer.last_band["monitor-1"] == "high"
+
+
+def test_missing_readings_are_carried_forward():
+    """AVPU and temperature sent once keep counting towards the band of later monitor readings"""
+    coalescer = ReadingCoalescer(interval=300, store=None)
+    patient_id = str(uuid.uuid4())
+
+    coalescer.offer([(0, device_reading(patient_id, 0, **NORMAL, consciousness_level="V", temperature=39.5))])
+    assert coalescer.last_band["monitor-1"] == "medium"  # 3 for AVPU + 2 for temperature
+
+    charted, buffered = coalescer.offer([(1, device_reading(patient_id, 5, **NORMAL))])
+    assert (charted, buffered) == ([], 1)
+
+
+def test_readings_without_news2_parameters_are_buffered():
+    coalescer = ReadingCoalescer(interval=300, store=None)
+    charted, buffered = coalescer.offer([(0, device_reading(str(uuid.uuid4()), 0, diastolic_bp=80))])
+    assert (charted, buffered) == ([], 1)
+
+
+async def test_close_charts_open_windows(db_session, patient):
+    """Shutdown stores the windows still open instead of dropping acknowledged readings"""
+    coalescer = ReadingCoalescer(interval=300, store=None)
+    patient_id = str(patient.id)
+    coalescer.offer([(n, device_reading(patient_id, n, **NORMAL)) for n in range(5)])
+    assert coalescer.windows
+
+    await coalescer.close(session_factory=TestSessionLocal)
+    assert not coalescer.windows
+
+    stored = (await db_session.scalars(
+        select(VitalsObservation).where(VitalsObservation.patient_id == patient.id)
+    )).all()
+    # The first reading was charted on its band (returned by offer); the rest were still open
+    assert [observation.extra_metadata["window"]["readings"] for observation in stored] == [4]
@@ -0,0 +1,119 @@
+# Tests for the device WebSocket channel: acknowledgements and sequence numbers
+
+import asyncio
+import json
+
+from fastapi import WebSocketDisconnect
+from sqlalchemy import func, select
+
+from app.api.vitals import validate_observations
+from app.core.security import create_device_token
+from app.models.vitals import VitalsObservation
+from app.services.coalescing import ReadingCoalescer
+from app.services.device_channel import DeviceChannelHub
+from tests.conftest import TestSessionLocal
+
+DEVICE = "monitor-1"
+NORMAL = {"heart_rate": 75, "systolic_bp": 120, "spo2": 98, "respiratory_rate": 16}
+
+
+class FakeWebSocket:
+    """Plays the given frames with a pause between them, then disconnects"""
+
+    def __init__(self, auth, frames, pause=0.05):
+        self.auth = auth
+        self.frames = list(frames)
+        self.pause = pause
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000):
+        pass
+
+    async def receive_json(self):
+        return self.auth
+
+    async def receive_text(self):
+        if not self.frames:
+            raise WebSocketDisconnect()
+        await asyncio.sleep(self.pause)
+        return json.dumps(self.frames.pop(0))
+
+    async def send_json(self, payload):
+        self.sent.append(payload)
+
+
+def hub():
+    return DeviceChannelHub(
+        validate_observations,
+        session_factory=TestSessionLocal,
+        coalescer=ReadingCoalescer(interval=300, store=None),
+        flush_interval=0.01
+    )
+
+
+def auth(session=None):
+    message = {"type": "auth", "token": create_device_token(DEVICE)}
+    if session is not None:
+        message["session"] = session
+    return message
+
+
+def frames(patient, seqs):
+    return [{"seq": seq, "data": {"patient_id": str(patient.id), **NORMAL}} for seq in seqs]
+
+
+async def stored(db_session, patient):
+    return await db_session.scalar(
+        select(func.count()).select_from(VitalsObservation).where(VitalsObservation.patient_id == patient.id)
+    )
+
+
+async def test_buffered_readings_are_not_acknowledged(db_session, patient):
+    """The ack stays below readings only buffered in the open window until they are stored"""
+    channels = hub()
+    websocket = FakeWebSocket(auth(), frames(patient, [1, 2, 3]))
+    await channels.serve(websocket)
+
+    acks = [message for message in websocket.sent if message["type"] == "ack"]
+    assert [(ack["seq"], ack["created"], ack["buffered"]) for ack in acks] == [(1, 1, 0), (1, 0, 1)]
+    # The disconnect charted the open window: now everything is acknowledged
+    assert channels.last_acked[DEVICE] == 3
+    assert await stored(db_session, patient) == 2
+
+
+async def test_reconnect_resumes_after_last_seq(db_session, patient):
+    channels = hub()
+    await channels.serve(FakeWebSocket(auth("boot-1"), frames(patient, [1, 2])))
+
+    websocket = FakeWebSocket(auth("boot-1"), frames(patient, [2, 3]))
+    await channels.serve(websocket)
+    assert websocket.sent[0] == {"type": "auth_ok", "device_id": DEVICE, "last_seq": 2}
+    assert channels.last_acked[DEVICE] == 3
+
+
+async def test_new_session_restarts_sequence(db_session, patient):
+    """A rebooted device starting again at seq 1 is not dropped as duplicates"""
+    channels = hub()
+    await channels.serve(FakeWebSocket(auth("boot-1"), frames(patient, [1, 2, 3])))
+    assert channels.last_acked[DEVICE] == 3
+
+    websocket = FakeWebSocket(auth("boot-2"), frames(patient, [1]))
+    await channels.serve(websocket)
+    assert websocket.sent[0]["last_seq"] == 0
+    assert await stored(db_session, patient) == 3
+
+
+async def test_sequence_restart_without_session(db_session, patient):
+    """Without a session id, a first reading at or below last_seq means the numbering restarted"""
+    channels = hub()
+    channels.last_acked[DEVICE] = 500
+
+    websocket = FakeWebSocket(auth(), frames(patient, [1, 2]))
+    await channels.serve(websocket)
+    ack = next(message for message in websocket.sent if message["type"] == "ack")
+    assert ack["duplicates"] == 0
+    assert channels.last_acked[DEVICE] == 2
+    assert await stored(db_session, patient) == 2
@@ -0,0 +1,114 @@
+# Tests for keyset (cursor) pagination
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core.pagination import MAX_ID, Cursor, InvalidCursor, fetch_page
+from app.models.vitals import VitalsObservation
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+async def add_observations(db_session, patient, moments):
+    """One observation per timestamp; returns ids newest first, ties by id descending"""
+    observations = [VitalsObservation(patient_id=patient.id, observed_at=moment, heart_rate=70) for moment in moments]
+    db_session.add_all(observations)
+    await db_session.commit()
+    ordered = sorted(observations, key=lambda observation: (observation.observed_at, observation.id), reverse=True)
+    return [observation.id for observation in ordered]
+
+
+async def page(db_session, patient, limit, cursor=None, since=None):
+    return await fetch_page(
+        db_session,
+        select(VitalsObservation).where(VitalsObservation.patient_id == patient.id),
+        VitalsObservation.observed_at,
+        VitalsObservation.id,
+        limit,
+        cursor=Cursor.decode(cursor) if cursor else None,
+        since=since
+    )
+
+
+def ids(page):
+    return [row.id for row in page.rows]
+
+
+def test_cursor_round_trip():
+    cursor = Cursor(NOW, uuid.uuid4(), newer=True)
+    assert Cursor.decode(cursor.encode()) == cursor
+
+    aware = Cursor(NOW.replace(tzinfo=timezone.utc), cursor.id).encode()
+    assert Cursor.decode(aware).moment == NOW
+
+    with pytest.raises(InvalidCursor):
+        Cursor.decode("not-a-cursor")
+
+
+async def test_pages_forward_and_back(db_session, patient):
+    """Following next cursors visits every row once; previous cursors lead back to the same pages"""
+    expected = await add_observations(db_session, patient, [NOW - timedelta(minutes=n) for n in range(8)])
+
+    pages = [await page(db_session, patient, 3)]
+    assert pages[0].previous_cursor is None
+    while pages[-1].next_cursor:
+        pages.append(await page(db_session, patient, 3, pages[-1].next_cursor))
+    assert [len(p.rows) for p in pages] == [3, 3, 2]
+    assert [row_id for p in pages for row_id in ids(p)] == expected
+
+    back = await page(db_session, patient, 3, pages[2].previous_cursor)
+    assert ids(back) == ids(pages[1])
+    back = await page(db_session, patient, 3, back.previous_cursor)
+    assert ids(back) == ids(pages[0])
+    assert back.previous_cursor is None
+
+    # And forward again from a page reached backwards
+    assert ids(await page(db_session, patient, 3, back.next_cursor)) == ids(pages[1])
+
+
+async def test_equal_timestamps_are_ordered_by_id(db_session, patient):
+    """Rows sharing a timestamp are split across pages without gaps or repeats"""
+    expected = await add_observations(db_session, patient, [NOW] * 5 + [NOW - timedelta(minutes=1)] * 2)
+
+    seen = []
+    cursor = None
+    while True:
+        current = await page(db_session, patient, 2, cursor)
+        seen.extend(ids(current))
+        if not current.next_cursor:
+            break
+        cursor = current.next_cursor
+    assert seen == expected
+
+    middle = await page(db_session, patient, 2, Cursor(NOW, expected[2]).encode())
+    assert ids(middle) == expected[3:5]
+    newer = await page(db_session, patient, 2, Cursor(NOW, expected[2], newer=True).encode())
+    assert ids(newer) == expected[:2]
+
+
+async def test_since_bounds_the_first_page(db_session, patient):
+    expected = await add_observations(db_session, patient, [NOW - timedelta(hours=n) for n in range(5)])
+    since = NOW - timedelta(hours=1, minutes=30)
+
+    first = await page(db_session, patient, 10, since=since)
+    assert ids(first) == expected[:2]
+    assert Cursor.decode(first.next_cursor) == Cursor(since, MAX_ID)
+
+    older = await page(db_session, patient, 10, first.next_cursor)
+    assert ids(older) == expected[2:]
+    assert older.next_cursor is None
+
+
+async def test_since_without_older_rows(db_session, patient):
+    expected = await add_observations(db_session, patient, [NOW - timedelta(minutes=n) for n in range(3)])
+
+    first = await page(db_session, patient, 10, since=NOW - timedelta(hours=1))
+    assert ids(first) == expected
+    assert first.next_cursor is None
+
+    full = await page(db_session, patient, 2, since=NOW - timedelta(hours=1))
+    assert ids(full) == expected[:2]
+    assert ids(await page(db_session, patient, 2, full.next_cursor)) == expected[2:]
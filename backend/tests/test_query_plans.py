@@ -0,0 +1,10 @@
+# Query plan regression test: history and alert queries use their indexes
+
+from benchmarks import query_plans
+from tests.conftest import TEST_DATABASE_URL
+
+
+async def test_history_and_alert_queries_use_their_indexes(capsys):
+    """Runs benchmarks.query_plans on a migrated, seeded copy of the schema"""
+    failures = await query_plans.run(TEST_DATABASE_URL, query_plans.PATIENTS, query_plans.DAYS)
+    assert failures == 0, capsys.readouterr().out
@@ -0,0 +1,82 @@
+# Tests for the recent vitals buffer: history cursors and cross-worker invalidation
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.models.vitals import VitalsObservation
+from app.services.recent_vitals import PatientRing, RecentObservation, RecentVitalsBuffer, recent_vitals
+
+API = "/api/v1/vitals"
+
+
+async def add_observation(db_session, patient, hours_ago):
+    """Stored directly (the API stamps observations with the current time)"""
+    vitals = VitalsObservation(
+        patient_id=patient.id,
+        observed_at=datetime.utcnow() - timedelta(hours=hours_ago),
+        heart_rate=70
+    )
+    db_session.add(vitals)
+    await db_session.commit()
+    return vitals
+
+
+async def test_buffered_first_page_has_next_cursor_only_with_older_rows(client, db_session, patient):
+    for hours_ago in (1, 2):
+        await add_observation(db_session, patient, hours_ago)
+
+    hits = recent_vitals.hits
+    response = await client.get(f"{API}/patient/{patient.id}", params={"hours": 6})
+    assert recent_vitals.hits == hits + 1
+    assert len(response.json()) == 2
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    # Older than the window but inside the buffer, recorded as the ingestor does
+    older = await add_observation(db_session, patient, 10)
+    recent_vitals.record([RecentObservation.from_model(older)])
+    response = await client.get(f"{API}/patient/{patient.id}", params={"hours": 6})
+    assert recent_vitals.hits == hits + 2
+    assert len(response.json()) == 2
+    next_page = await client.get(f"{API}/patient/{patient.id}", params={"cursor": response.headers[NEXT_CURSOR_HEADER]})
+    assert [vitals["id"] for vitals in next_page.json()] == [str(older.id)]
+
+
+async def test_rows_beyond_the_buffer_are_known_at_load(client, db_session, patient):
+    await add_observation(db_session, patient, 1)
+    await add_observation(db_session, patient, 48)
+    recent_vitals.invalidate(patient.id)
+
+    response = await client.get(f"{API}/patient/{patient.id}", params={"hours": 6})
+    assert len(response.json()) == 1
+    assert NEXT_CURSOR_HEADER in response.headers
+
+
+async def test_changes_are_announced_to_other_workers():
+    """An amend / delete on one worker drops the patient's ring on the others"""
+    announcing, listening = RecentVitalsBuffer(), RecentVitalsBuffer()
+    task = asyncio.create_task(listening.listen_forever())
+    try:
+        for _ in range(100):
+            if listening.listening:
+                break
+            await asyncio.sleep(0.02)
+        patient_id, other_id = str(uuid.uuid4()), str(uuid.uuid4())
+        for key in (patient_id, other_id):
+            listening._rings[key] = PatientRing(datetime.utcnow())
+
+        await announcing.announce_change(patient_id)
+        for _ in range(100):
+            if patient_id not in listening._rings:
+                break
+            await asyncio.sleep(0.02)
+        assert patient_id not in listening._rings
+        assert other_id in listening._rings
+
+        # A worker ignores its own announcements (its ring is already current)
+        await listening.announce_change(other_id)
+        await asyncio.sleep(0.2)
+        assert other_id in listening._rings
+    finally:
+        task.cancel()
@@ -0,0 +1,161 @@
+# Tests for NEWS2 / MEWS scoring: scalar and vectorized paths, packed components
+
+import math
+
+import numpy as np
+import pytest
+
+from app.ml.mews import MEWS_COMPONENTS, MEWSCalculator
+from app.ml.scoring import scoring_engine
+from app.ml.news2 import (
+    AVPU_MISSING,
+    COMPONENTS,
+    RISK_LEVELS,
+    NEWS2Calculator,
+    encode_avpu,
+    pack_components,
+    unpack_component_matrix,
+    unpack_components,
+)
+
+# Readings around every band edge, plus missing (None) and NaN
+RESPIRATORY_RATES = [None, math.nan, 5, 8, 8.5, 9, 11, 12, 14, 15, 20, 21, 24, 25, 29, 30, 40]
+SPO2_VALUES = [None, math.nan, 80, 83, 84, 85, 86, 87, 88, 91, 92, 93, 94, 95, 96, 97, 100]
+TEMPERATURES = [None, math.nan, 34.5, 34.9, 34.95, 35.0, 35.05, 36.0, 36.05, 38.0, 38.05, 38.4, 38.45, 38.5, 39.0, 39.05, 41]
+SYSTOLIC_BPS = [None, math.nan, 60, 70, 71, 80, 81, 90, 91, 100, 101, 110, 111, 199, 200, 219, 220, 240]
+HEART_RATES = [None, math.nan, 35, 40, 41, 50, 51, 90, 90.5, 91, 100, 101, 110, 111, 129, 130, 131, 160]
+AVPU_LEVELS = [None, "", "A", "V", "P", "U", "a"]
+
+
+def observations(n=2000, seed=7):
+    """Random observations drawn from the edge readings above"""
+    rng = np.random.default_rng(seed)
+
+    def pick(values):
+        return [values[i] for i in rng.integers(0, len(values), n)]
+
+    return {
+        "respiratory_rate": pick(RESPIRATORY_RATES),
+        "spo2": pick(SPO2_VALUES),
+        "supplemental_oxygen": list(rng.random(n) < 0.3),
+        "temperature": pick(TEMPERATURES),
+        "systolic_bp": pick(SYSTOLIC_BPS),
+        "heart_rate": pick(HEART_RATES),
+        "consciousness_level": pick(AVPU_LEVELS),
+        "use_scale_2": list(rng.random(n) < 0.2),
+    }
+
+
+def as_float(values):
+    return np.array([math.nan if value is None else value for value in values], dtype=np.float64)
+
+
+@pytest.mark.parametrize("thresholds", [(5, 7), (4, 6)])
+def test_news2_batch_matches_scalar(thresholds):
+    """calculate_batch gives calculate()'s totals, components and risk levels row by row"""
+    calculator = NEWS2Calculator(*thresholds)
+    data = observations()
+    batch = calculator.calculate_batch(
+        respiratory_rate=as_float(data["respiratory_rate"]),
+        spo2=as_float(data["spo2"]),
+        supplemental_oxygen=np.array(data["supplemental_oxygen"]),
+        temperature=as_float(data["temperature"]),
+        systolic_bp=as_float(data["systolic_bp"]),
+        heart_rate=as_float(data["heart_rate"]),
+        consciousness_level=encode_avpu(data["consciousness_level"]),
+        use_scale_2=np.array(data["use_scale_2"]),
+    )
+
+    for row in range(len(data["spo2"])):
+        result = calculator.calculate(**{name: values[row] for name, values in data.items()})
+        assert batch.total_scores[row] == result.total_score, row
+        assert RISK_LEVELS[batch.risk_levels[row]] == result.risk_level, row
+        assert batch.packed_components[row] == result.packed_components, row
+        assert unpack_components(int(batch.packed_components[row])) == result.component_scores, row
+
+
+def test_mews_batch_matches_scalar():
+    """MEWS calculate_batch gives calculate()'s totals, components and risk levels row by row"""
+    calculator = MEWSCalculator()
+    data = observations()
+    batch = calculator.calculate_batch(
+        systolic_bp=as_float(data["systolic_bp"]),
+        heart_rate=as_float(data["heart_rate"]),
+        respiratory_rate=as_float(data["respiratory_rate"]),
+        temperature=as_float(data["temperature"]),
+        consciousness_level=encode_avpu(data["consciousness_level"]),
+    )
+
+    for row in range(len(data["spo2"])):
+        result = calculator.calculate(
+            systolic_bp=data["systolic_bp"][row],
+            heart_rate=data["heart_rate"][row],
+            respiratory_rate=data["respiratory_rate"][row],
+            temperature=data["temperature"][row],
+            consciousness_level=data["consciousness_level"][row],
+        )
+        assert batch.total_scores[row] == result.total_score, row
+        assert RISK_LEVELS[batch.risk_levels[row]] == result.risk_level, row
+        scored = {name: int(score) for name, score in zip(MEWS_COMPONENTS, batch.component_scores[row])}
+        assert {name: scored[name] for name in result.component_scores} == result.component_scores, row
+
+
+def test_missing_and_nan_readings_are_not_scored():
+    """None and NaN both mean "not recorded": no component, nothing added to the total"""
+    calculator = NEWS2Calculator()
+    for missing in (None, math.nan):
+        result = calculator.calculate(respiratory_rate=missing, spo2=missing, temperature=missing, heart_rate=missing)
+        assert result.component_scores == {"supplemental_oxygen": 0}
+        assert result.total_score == 0
+
+        mews = MEWSCalculator().calculate(systolic_bp=missing, heart_rate=missing, respiratory_rate=missing)
+        assert mews.component_scores == {}
+
+
+@pytest.mark.parametrize("respiratory_rate, expected", [(8.5, 2), (9, 0), (14, 0), (14.5, 1), (29.5, 3)])
+def test_mews_respiratory_rate_bands(respiratory_rate, expected):
+    assert MEWSCalculator().score_component("respiratory_rate", respiratory_rate) == expected
+
+
+@pytest.mark.parametrize("temperature, expected", [(34.9, 2), (34.95, 2), (35.0, 0), (38.4, 0), (38.45, 2)])
+def test_mews_temperature_bands(temperature, expected):
+    assert MEWSCalculator().score_component("temperature", temperature) == expected
+
+
+@pytest.mark.parametrize("missing", [None, math.nan, ""])
+def test_is_scorable_treats_nan_and_empty_as_missing(missing):
+    """is_scorable agrees with scorable_mask on what counts as recorded"""
+    complete = {"respiratory_rate": 16, "spo2": 98, "temperature": 37.0, "systolic_bp": 120,
+                "heart_rate": 75, "consciousness_level": "A"}
+    news2 = scoring_engine.get("news2")
+    assert news2.is_scorable(complete)
+    for name in news2.required:
+        assert not news2.is_scorable({**complete, name: missing}), name
+
+
+def test_pack_unpack_round_trip():
+    """Every subset of components with every score survives pack / unpack"""
+    rng = np.random.default_rng(3)
+    for _ in range(500):
+        present = rng.random(len(COMPONENTS)) < 0.6
+        scores = {name: int(rng.integers(0, 4)) for name, keep in zip(COMPONENTS, present) if keep}
+        packed = pack_components(scores)
+        assert unpack_components(packed) == scores
+
+        matrix, mask = unpack_component_matrix(np.array([packed]))
+        assert {name: int(score) for name, score, keep in zip(COMPONENTS, matrix[0], mask[0]) if keep} == scores
+
+
+def test_pack_unpack_tells_missing_from_zero():
+    packed = pack_components({"spo2": 0})
+    assert unpack_components(packed) == {"spo2": 0}
+    assert unpack_components(0) == {}
+
+
+def test_pack_unpack_with_mews_layout():
+    scores = {"systolic_bp": 3, "consciousness": 1}
+    assert unpack_components(pack_components(scores, MEWS_COMPONENTS), MEWS_COMPONENTS) == scores
+
+
+def test_encode_avpu():
+    assert encode_avpu(["A", "u", None, ""]).tolist() == [0, 3, AVPU_MISSING, AVPU_MISSING]
@@ -0,0 +1,60 @@
+# Tests for per-patient scoring profiles (NEWS2 thresholds, SpO2 scale)
+
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.models.patient import Patient
+from app.services.scoring_profiles import resolve_profile
+
+GLOBAL = (settings.NEWS2_MEDIUM_RISK_THRESHOLD, settings.NEWS2_HIGH_RISK_THRESHOLD)
+
+
+def thresholds(extra_metadata, ward="ICU"):
+    profile = resolve_profile(Patient(id=uuid.uuid4(), ward=ward, extra_metadata=extra_metadata))
+    return profile.news2_medium_risk_threshold, profile.news2_high_risk_threshold
+
+
+@pytest.fixture
+def icu_thresholds(monkeypatch):
+    monkeypatch.setattr(settings, "NEWS2_WARD_THRESHOLDS", {"ICU": {"medium": 6, "high": 8}})
+
+
+def test_patient_overrides_ward(icu_thresholds):
+    assert thresholds(None) == (6, 8)
+    assert thresholds({"news2_thresholds": {"medium": 4, "high": 9}}) == (4, 9)
+    assert thresholds({"news2_thresholds": {"high": 9}}) == (6, 9)
+
+
+def test_integer_strings_are_coerced(icu_thresholds):
+    assert thresholds({"news2_thresholds": {"medium": "5", "high": "7.0"}}) == (5, 7)
+
+
+@pytest.mark.parametrize("overrides", [
+    {"medium": "five"},
+    {"medium": 4.5},
+    {"medium": None},
+    {"medium": True},
+    {"medium": 0},
+    {"medium": [5]},
+    {"medium": 9, "high": 7},
+    [5, 7],
+    "5/7",
+])
+def test_invalid_overrides_fall_back_to_ward(icu_thresholds, overrides):
+    assert thresholds({"news2_thresholds": overrides}) == (6, 8)
+
+
+def test_invalid_ward_thresholds_fall_back_to_global(monkeypatch):
+    monkeypatch.setattr(settings, "NEWS2_WARD_THRESHOLDS", {"ICU": {"medium": 9, "high": 7}})
+    assert thresholds(None) == GLOBAL
+
+
+def test_non_object_metadata():
+    assert thresholds(["not", "an", "object"], ward=None) == GLOBAL
+
+
+def test_scale_2():
+    profile = resolve_profile(Patient(id=uuid.uuid4(), extra_metadata={"spo2_scale": "2"}))
+    assert profile.use_scale_2
@@ -0,0 +1,97 @@
+# Tests for the vitals write endpoints: batch ingestion and amendments
+
+import uuid
+
+from app.ml.news2 import NEWS2Calculator
+from app.ml.mews import MEWSCalculator
+
+API = "/api/v1/vitals"
+
+# A complete set of normal readings (NEWS2 0)
+STABLE = {"heart_rate": 75, "systolic_bp": 120, "spo2": 98, "respiratory_rate": 16, "temperature": 37.0, "consciousness_level": "A"}
+
+
+def reading(patient, **values):
+    """A VitalsCreate body for the patient"""
+    return {"patient_id": str(patient.id), **values}
+
+
+async def test_batch_reports_every_item(client, patient):
+    """Valid, invalid and unknown-patient items each get their own result, in request order"""
+    body = [
+        reading(patient, **STABLE),
+        reading(patient, heart_rate=500),
+        {"patient_id": str(uuid.uuid4()), **STABLE},
+        {"patient_id": "not-a-uuid", **STABLE},
+        reading(patient, **{**STABLE, "respiratory_rate": 26, "spo2": 90, "heart_rate": 135}),
+    ]
+
+    response = await client.post(f"{API}/batch", json=body)
+    assert response.status_code == 200
+    data = response.json()
+    results = data["results"]
+
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result["status"] for result in results] == ["created", "rejected", "rejected", "rejected", "created"]
+    assert (data["created"], data["rejected"]) == (2, 3)
+    assert any("heart_rate" in error for error in results[1]["errors"])
+    assert results[2]["errors"] and results[3]["errors"]
+
+    assert results[0]["news2_score"] == NEWS2Calculator().calculate(**STABLE).total_score
+    assert results[0]["mews_score"] == MEWSCalculator().calculate(
+        systolic_bp=120, heart_rate=75, respiratory_rate=16, temperature=37.0, consciousness_level="A"
+    ).total_score
+    assert results[4]["news2_score"] >= 7
+    assert results[4]["alerts"]
+
+    for result in (results[0], results[4]):
+        stored = await client.get(f"{API}/{result['id']}")
+        assert stored.status_code == 200
+        assert stored.json()["news2_score"] == result["news2_score"]
+
+
+async def test_batch_of_only_invalid_items(client):
+    response = await client.post(f"{API}/batch", json=[{"heart_rate": 75}])
+    assert response.status_code == 200
+    assert response.json()["created"] == 0
+
+
+async def test_amend_rescores_changed_components(client, patient):
+    """Amending a reading rescores NEWS2 / MEWS and records the correction"""
+    created = (await client.post(f"{API}/batch", json=[reading(patient, **STABLE)])).json()["results"][0]
+    assert created["news2_score"] == 0
+
+    response = await client.patch(
+        f"{API}/{created['id']}",
+        json={"heart_rate": 135, "temperature": 39.5, "amended_by": "Nurse", "reason": "Misread"}
+    )
+    assert response.status_code == 200
+    amended = response.json()
+
+    expected = NEWS2Calculator().calculate(**{**STABLE, "heart_rate": 135, "temperature": 39.5})
+    assert amended["heart_rate"] == 135
+    assert amended["news2_score"] == expected.total_score
+    assert amended["news2_breakdown"] == expected.component_scores
+    assert amended["mews_score"] == MEWSCalculator().calculate(
+        systolic_bp=120, heart_rate=135, respiratory_rate=16, temperature=39.5, consciousness_level="A"
+    ).total_score
+
+    # Back to the original value: the score follows
+    response = await client.patch(f"{API}/{created['id']}", json={"heart_rate": 75, "temperature": 37.0})
+    assert response.json()["news2_score"] == 0
+
+
+async def test_amend_supplemental_oxygen(client, patient):
+    created = (await client.post(f"{API}/batch", json=[reading(patient, **STABLE)])).json()["results"][0]
+
+    response = await client.patch(f"{API}/{created['id']}", json={"supplemental_oxygen": True})
+    assert response.status_code == 200
+    assert response.json()["news2_breakdown"]["supplemental_oxygen"] == 2
+
+    response = await client.patch(f"{API}/{created['id']}", json={"supplemental_oxygen": None})
+    assert response.status_code == 422
+
+
+async def test_amend_unknown_observation(client):
+    response = await client.patch(f"{API}/{uuid.uuid4()}", json={"heart_rate": 80})
+    assert response.status_code == 404
@@ -0,0 +1,87 @@
+# Tests for NDJSON streaming ingestion (POST /vitals/stream)
+
+import asyncio
+import json
+
+import httpx
+import pytest
+import uvicorn
+from sqlalchemy import func, select
+
+from app.main import app
+from app.models.vitals import VitalsObservation
+from app.services.vitals_stream import iter_ndjson
+
+
+async def chunked(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def parse(*chunks: bytes, max_line_bytes: int = 65536):
+    return [item async for item in iter_ndjson(chunked(*chunks), max_line_bytes)]
+
+
+async def test_line_numbers_count_blank_lines():
+    """Line numbers are physical lines, blank ones included"""
+    lines = await parse(b'{"a": 1}\n\n  \n{"b"', b': 2}\n\n{"c": 3}')
+    assert [(number, value) for number, value in lines] == [(1, {"a": 1}), (4, {"b": 2}), (6, {"c": 3})]
+
+
+async def test_rejected_lines_keep_their_line_numbers():
+    lines = await parse(b'\n[1, 2]\n\nnot json\n' + b'{"x": "' + b"y" * 100 + b'"}\n{"ok": 1}\n', max_line_bytes=50)
+    assert [number for number, _ in lines] == [2, 4, 5, 6]
+    assert "JSON object" in lines[0][1].errors[0]
+    assert "Invalid JSON" in lines[1][1].errors[0]
+    assert "exceeds 50 bytes" in lines[2][1].errors[0]
+    assert lines[3][1] == {"ok": 1}
+
+
+async def test_oversized_line_spanning_chunks_is_reported_once():
+    lines = await parse(b'{"a": 1}\n{"x": "', b"y" * 40, b"y" * 40, b'"}\n\n{"b": 2}\n', max_line_bytes=50)
+    assert [number for number, _ in lines] == [1, 2, 4]
+    assert lines[2][1] == {"b": 2}
+
+
+@pytest.fixture
+async def server():
+    """The app behind a real uvicorn server on a free port (no lifespan events)"""
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    await task
+
+
+async def test_chunked_upload_through_server(server, db_session, patient):
+    """Every line of a chunked upload is read and stored while acks stream back"""
+    lines = [
+        json.dumps({"patient_id": str(patient.id), "heart_rate": 60 + n % 40, "spo2": 97, "respiratory_rate": 16})
+        for n in range(210)
+    ]
+    lines[100] = "not json"
+
+    async def body():
+        for start in range(0, len(lines), 7):
+            yield ("\n".join(lines[start:start + 7]) + "\n").encode()
+            await asyncio.sleep(0.005)
+
+    async with httpx.AsyncClient(base_url=server, timeout=30) as client:
+        async with client.stream("POST", "/api/v1/vitals/stream", params={"batch_size": 50}, content=body()) as response:
+            assert response.status_code == 200
+            records = [json.loads(line) async for line in response.aiter_lines() if line]
+
+    done = records[-1]
+    assert done["done"] is True
+    assert (done["lines"], done["created"], done["rejected"]) == (210, 209, 1)
+    assert [record["line"] for record in records if record.get("status") == "rejected"] == [101]
+    assert sum(record.get("created", 0) for record in records if "ack" in record) == 209
+
+    stored = await db_session.scalar(
+        select(func.count()).select_from(VitalsObservation).where(VitalsObservation.patient_id == patient.id)
+    )
+    assert stored == 209
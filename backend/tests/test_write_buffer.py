@@ -0,0 +1,54 @@
+# Tests for the write-behind group commit buffer
+
+import pytest
+from sqlalchemy import func, select
+
+from app.api.vitals import VitalsCreate
+from app.models.vitals import VitalsObservation
+from app.services.vitals_ingest import VitalsIngestor
+from app.services.write_buffer import GroupCommitBuffer
+from tests.conftest import TestSessionLocal
+
+
+class FailingPublishIngestor(VitalsIngestor):
+    """Commits normally, then fails to publish to the caches"""
+
+    async def committed(self, rows):
+        raise ConnectionError("Redis unavailable")
+
+
+class FailingWriteIngestor(VitalsIngestor):
+    async def write(self, db, prepared):
+        raise ConnectionError("database unavailable")
+
+
+def observation(patient):
+    return VitalsCreate(patient_id=str(patient.id), heart_rate=75, spo2=98, respiratory_rate=16)
+
+
+async def stored(db_session, patient):
+    return await db_session.scalar(
+        select(func.count()).select_from(VitalsObservation).where(VitalsObservation.patient_id == patient.id)
+    )
+
+
+async def test_post_commit_failure_is_not_reported_to_callers(db_session, patient):
+    """Rows that were committed are reported as created even if publishing them failed"""
+    buffer = GroupCommitBuffer(FailingPublishIngestor(), session_factory=TestSessionLocal, max_delay=0.01)
+    try:
+        result, row = await buffer.submit(observation(patient))
+    finally:
+        await buffer.close()
+    assert result.status == "created"
+    assert row["heart_rate"] == 75
+    assert await stored(db_session, patient) == 1
+
+
+async def test_write_failure_reaches_callers(db_session, patient):
+    buffer = GroupCommitBuffer(FailingWriteIngestor(), session_factory=TestSessionLocal, max_delay=0.01)
+    try:
+        with pytest.raises(ConnectionError):
+            await buffer.submit(observation(patient))
+    finally:
+        await buffer.close()
+    assert await stored(db_session, patient) == 0